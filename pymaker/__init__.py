@@ -24,18 +24,18 @@ import time
 from enum import Enum, auto
 from functools import total_ordering, wraps
 from threading import Lock
-from typing import Optional
+from typing import Optional, Iterable, List
 
 import eth_utils
 import pkg_resources
 from hexbytes import HexBytes
 
 from web3 import Web3
-from web3.utils.contracts import get_function_info, encode_abi
 from web3.utils.events import get_event_data
 
 from pymaker.gas import DefaultGasPrice, GasPrice
 from pymaker.numeric import Wad
+from pymaker.stub import ContractStub, FunctionStub
 from pymaker.util import synchronize, bytes_to_hexstring, is_contract_at
 
 filter_threads = []
@@ -155,6 +155,14 @@ class Contract:
 
         return web3.eth.contract(abi=abi)(address=address.address)
 
+    @staticmethod
+    def _get_stub(web3: Web3, abi: list, address: Address):
+        assert(isinstance(web3, Web3))
+        assert(isinstance(abi, list))
+        assert(isinstance(address, Address))
+
+        return ContractStub.for_abi(abi).bind(web3, address)
+
     def _past_events(self, contract, event, cls, number_of_past_blocks, event_filter) -> list:
         block_number = contract.web3.eth.blockNumber
         return self._past_events_in_block_range(contract, event, cls, max(block_number-number_of_past_blocks, 0),
@@ -208,10 +216,30 @@ class Calldata:
         else:
             raise Exception(f"Unable to create calldata from '{value}'")
 
+    # Compiled signatures, keyed by the signature string.
+    # Each one is a `FunctionStub` with a precomputed selector and argument encoder.
+    _compiled_signatures = {}
+
+    @staticmethod
+    def _compile_signature(fn_sign: str) -> FunctionStub:
+        compiled = Calldata._compiled_signatures.get(fn_sign)
+        if compiled is None:
+            fn_split = re.split('[(),]', fn_sign)
+            fn_name = fn_split[0]
+            fn_args_type = [{"type": type} for type in fn_split[1:] if type]
+
+            compiled = FunctionStub({"type": "function", "name": fn_name, "inputs": fn_args_type})
+            Calldata._compiled_signatures[fn_sign] = compiled
+
+        return compiled
+
     @classmethod
     def from_signature(cls, fn_sign: str, fn_args: list):
         """ Allow to create a `Calldata` from a function signature and a list of arguments.
 
+        The selector and the argument encoder are compiled only once per signature
+        and reused in subsequent calls.
+
         :param fn_sign: the function signature ie. "function(uint256,address)"
         :param fn_args: arguments to the function ie. [123, "0x00...00"]
         :return:
@@ -219,16 +247,27 @@ class Calldata:
         assert isinstance(fn_sign, str)
         assert isinstance(fn_args, list)
 
-        fn_split = re.split('[(),]', fn_sign)
-        fn_name = fn_split[0]
-        fn_args_type = [{"type": type} for type in fn_split[1:] if type]
+        return cls(cls._compile_signature(fn_sign).encode(fn_args))
+
+    @classmethod
+    def encode_many(cls, fn_sign: str, rows: Iterable[list]) -> List['Calldata']:
+        """ Create a `Calldata` for each list of arguments in `rows`, all for the same function signature.
 
-        fn_abi = {"type": "function", "name": fn_name, "inputs": fn_args_type}
-        fn_abi, fn_selector, fn_arguments = get_function_info("test", fn_abi=fn_abi, args=fn_args)
+        Useful for generating large numbers of calldatas, i.e. for batched `DSProxy` operations.
+
+        :param fn_sign: the function signature ie. "function(uint256,address)"
+        :param rows: lists of arguments to the function ie. [[123, "0x00...00"], [456, "0x00...01"]]
+        :return: list of `Calldata`, in the same order as `rows`
+        """
+        assert isinstance(fn_sign, str)
 
-        calldata = encode_abi(Web3, fn_abi, fn_arguments, fn_selector)
+        compiled = cls._compile_signature(fn_sign)
+        result = []
+        for fn_args in rows:
+            assert isinstance(fn_args, list)
+            result.append(cls(compiled.encode(fn_args)))
 
-        return cls(calldata)
+        return result
 
     def as_bytes(self) -> bytes:
         """Return the calldata as a byte array."""
@@ -15,16 +15,19 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pprint import pformat
-from typing import List
+from typing import List, Optional, Tuple
+from eth_utils import event_abi_to_log_topic
 from web3 import Web3
 from web3.utils.events import get_event_data
 
 from pymaker import Contract, Address, Transact
-from pymaker.logging import LogNote
+from pymaker.logging import EventIndex, LogNote
 from pymaker.numeric import Wad, Rad, Ray
 from pymaker.token import ERC20Token
+from pymaker.util import bytes_to_hexstring
 
 
 def toBytes(string: str):
@@ -57,7 +60,9 @@ class AuctionContract(Contract):
         self.address = address
         self.abi = abi
         self._contract = self._get_contract(web3, abi, address)
+        self._stub = self._get_stub(web3, abi, address)
         self._bids = bids
+        self._index = None
 
         self.log_note_abi = None
         self.kick_abi = None
@@ -70,14 +75,14 @@ class AuctionContract(Contract):
     def wards(self, address: Address) -> bool:
         assert isinstance(address, Address)
 
-        return bool(self._contract.call().wards(address.address))
+        return bool(self._stub.wards(address.address))
 
     def vat(self) -> Address:
         """Returns the `vat` address.
          Returns:
             The address of the `vat` contract.
         """
-        return Address(self._contract.call().vat())
+        return Address(self._stub.vat())
 
     def approve(self, source: Address, approval_function, **kwargs):
         """Approve the auction to access our collateral, Dai, or MKR so we can participate in auctions.
@@ -96,7 +101,24 @@ class AuctionContract(Contract):
         approval_function(token=ERC20Token(web3=self.web3, address=source),
                           spender_address=self.address, spender_name=self.__class__.__name__, **kwargs)
 
+    def use_index(self, index: Optional['AuctionIndex']):
+        """Makes `active_auctions()` use an event-driven index instead of checking every auction ever started.
+
+        Args:
+            index: The :py:class:`pymaker.auctions.AuctionIndex` of this auction contract,
+                or `None` to stop using it.
+        """
+        assert(isinstance(index, AuctionIndex) or (index is None))
+
+        if index is not None:
+            assert(index.auction.address == self.address)
+
+        self._index = index
+
     def active_auctions(self) -> list:
+        if self._index is not None:
+            return self._index.active_auctions()
+
         active_auctions = []
         auction_count = self.kicks()+1
         for index in range(1, auction_count):
@@ -108,13 +130,42 @@ class AuctionContract(Contract):
             index += 1
         return active_auctions
 
+    def finished_auctions(self, block_identifier='latest') -> list:
+        """Returns auctions which have finished but have not been dealt yet, so `deal` can be called on them.
+
+        Mirrors the `deal` check of the contract, using the timestamp of the block the auction details
+        have been read at. Auctions which have ended without any bid need a `tick`, so they are not returned.
+        If an :py:class:`pymaker.auctions.AuctionIndex` is used (see `use_index()`), it gets updated and
+        its details are used. Otherwise details of all auctions ever started get read concurrently.
+
+        Args:
+            block_identifier: Block to read the auction details at, the latest block by default.
+                Ignored if an index is used.
+
+        Returns:
+            List of `Bid` objects of the finished auctions.
+        """
+        if self._index is not None:
+            self._index.update()
+            block_number, bids = self._index.snapshot()
+
+        else:
+            block_number = self.web3.eth.blockNumber if block_identifier == 'latest' else block_identifier
+            kicks = int(self._stub.call('kicks', [], block_number))
+            with ThreadPoolExecutor(max_workers=AuctionIndex.max_workers) as executor:
+                bids = list(executor.map(lambda id: self._bids(id, block_number), range(1, kicks + 1)))
+
+        now = self.web3.eth.getBlock(block_number)['timestamp']
+        return [bid for bid in bids if bid.guy != Address("0x0000000000000000000000000000000000000000")
+                and bid.tic != 0 and (bid.tic < now or bid.end < now)]
+
     def beg(self) -> Wad:
         """Returns the percentage minimum bid increase.
 
         Returns:
             The percentage minimum bid increase.
         """
-        return Wad(self._contract.call().beg())
+        return Wad(self._stub.beg())
 
     def ttl(self) -> int:
         """Returns the bid lifetime.
@@ -122,7 +173,7 @@ class AuctionContract(Contract):
         Returns:
             The bid lifetime (in seconds).
         """
-        return int(self._contract.call().ttl())
+        return int(self._stub.ttl())
 
     def tau(self) -> int:
         """Returns the total auction length.
@@ -130,7 +181,7 @@ class AuctionContract(Contract):
         Returns:
             The total auction length (in seconds).
         """
-        return int(self._contract.call().tau())
+        return int(self._stub.tau())
 
     def kicks(self) -> int:
         """Returns the number of auctions started so far.
@@ -138,16 +189,36 @@ class AuctionContract(Contract):
         Returns:
             The number of auctions started so far.
         """
-        return int(self._contract.call().kicks())
+        return int(self._stub.kicks())
 
     def deal(self, id: int) -> Transact:
         assert(isinstance(id, int))
 
         return Transact(self, self.web3, self.abi, self.address, self._contract, 'deal', [id])
 
-    def get_past_lognotes(self, number_of_past_blocks: int, abi: list) -> List[LogNote]:
+    def get_past_lognotes(self, number_of_past_blocks: int, abi: list, signatures: Optional[List[str]] = None,
+                          id: Optional[int] = None) -> List[LogNote]:
+        """Synchronously retrieves past `Kick` events and log notes of this auction contract.
+
+        If `signatures` are specified, only `Kick` events and log notes of these functions are fetched,
+        and if `id` is specified as well, only the ones of this auction. Filtering is done by the node,
+        using event topics, except for `Kick` events which do not have the auction id indexed. These are
+        fetched separately and filtered locally.
+
+        Args:
+            number_of_past_blocks: Number of past Ethereum blocks to retrieve the events from.
+            abi: ABI of the auction contract.
+            signatures: Function selectors (i.e. `0x4b43ed12`) of the log notes to retrieve.
+            id: Auction identifier to retrieve the events of.
+
+        Returns:
+            List of `KickLog` and :py:class:`pymaker.logging.LogNote` objects.
+        """
         assert isinstance(number_of_past_blocks, int)
         assert isinstance(abi, list)
+        assert isinstance(signatures, list) or (signatures is None)
+        assert isinstance(id, int) or (id is None)
+        assert (id is None) or (signatures is not None)
 
         block_number = self._contract.web3.eth.blockNumber
         filter_params = {
@@ -156,7 +227,23 @@ class AuctionContract(Contract):
             'toBlock': block_number
         }
 
-        logs = self.web3.eth.getLogs(filter_params)
+        if signatures is None:
+            logs = self.web3.eth.getLogs(filter_params)
+
+        else:
+            kick_topic = bytes_to_hexstring(event_abi_to_log_topic(self.kick_abi))
+            note_topics = [signature.ljust(66, '0') for signature in signatures]
+
+            if id is None:
+                logs = self.web3.eth.getLogs({**filter_params, 'topics': [[kick_topic] + note_topics]})
+
+            else:
+                id_topic = bytes_to_hexstring(id.to_bytes(32, 'big'))
+                logs = self.web3.eth.getLogs({**filter_params, 'topics': [note_topics, None, id_topic]}) + \
+                       [log for log in self.web3.eth.getLogs({**filter_params, 'topics': [kick_topic]})
+                        if self.parse_event(log).id == id]
+                logs = sorted(logs, key=lambda log: (log['blockNumber'], log['logIndex']))
+
         events = list(map(lambda l: self.parse_event(l), logs))
         return list(filter(lambda l: l is not None, events))
 
@@ -255,18 +342,19 @@ class Flipper(AuctionContract):
     def __init__(self, web3: Web3, address: Address):
         super(Flipper, self).__init__(web3, address, Flipper.abi, self.bids)
 
-    def bids(self, id: int) -> Bid:
+    def bids(self, id: int, block_identifier='latest') -> Bid:
         """Returns the auction details.
 
         Args:
             id: Auction identifier.
+            block_identifier: Block to read the auction details at, the latest block by default.
 
         Returns:
             The auction details.
         """
         assert(isinstance(id, int))
 
-        array = self._contract.call().bids(id)
+        array = self._stub.call('bids', [id], block_identifier)
 
         return Flipper.Bid(id=id,
                            bid=Rad(array[0]),
@@ -305,9 +393,20 @@ class Flipper(AuctionContract):
 
         return Transact(self, self.web3, self.abi, self.address, self._contract, 'dent', [id, lot.value, bid.value])
 
-    def past_logs(self, number_of_past_blocks: int):
+    def past_logs(self, number_of_past_blocks: int, id: Optional[int] = None):
+        """Synchronously retrieves past `kick`, `tend`, `dent` and `deal` events.
+
+        Args:
+            number_of_past_blocks: Number of past Ethereum blocks to retrieve the events from.
+            id: If specified, only events of this auction are retrieved.
+
+        Returns:
+            List of events, in the order they have been emitted.
+        """
         assert isinstance(number_of_past_blocks, int)
-        logs = super().get_past_lognotes(number_of_past_blocks, Flipper.abi)
+        assert isinstance(id, int) or (id is None)
+        logs = super().get_past_lognotes(number_of_past_blocks, Flipper.abi,
+                                         ['0x4b43ed12', '0x5ff3a382', '0xc959c42b'], id)
 
         history = []
         for log in logs:
@@ -405,20 +504,21 @@ class Flapper(AuctionContract):
         super(Flapper, self).__init__(web3, address, Flapper.abi, self.bids)
 
     def live(self) -> bool:
-        return self._contract.call().live() > 0
+        return self._stub.live() > 0
 
-    def bids(self, id: int) -> Bid:
+    def bids(self, id: int, block_identifier='latest') -> Bid:
         """Returns the auction details.
 
         Args:
             id: Auction identifier.
+            block_identifier: Block to read the auction details at, the latest block by default.
 
         Returns:
             The auction details.
         """
         assert(isinstance(id, int))
 
-        array = self._contract.call().bids(id)
+        array = self._stub.call('bids', [id], block_identifier)
 
         return Flapper.Bid(id=id,
                            bid=Wad(array[0]),
@@ -453,9 +553,19 @@ class Flapper(AuctionContract):
 
         return Transact(self, self.web3, self.abi, self.address, self._contract, 'yank', [id])
 
-    def past_logs(self, number_of_past_blocks: int):
+    def past_logs(self, number_of_past_blocks: int, id: Optional[int] = None):
+        """Synchronously retrieves past `kick`, `tend` and `deal` events.
+
+        Args:
+            number_of_past_blocks: Number of past Ethereum blocks to retrieve the events from.
+            id: If specified, only events of this auction are retrieved.
+
+        Returns:
+            List of events, in the order they have been emitted.
+        """
         assert isinstance(number_of_past_blocks, int)
-        logs = super().get_past_lognotes(number_of_past_blocks, Flapper.abi)
+        assert isinstance(id, int) or (id is None)
+        logs = super().get_past_lognotes(number_of_past_blocks, Flapper.abi, ['0x4b43ed12', '0xc959c42b'], id)
 
         history = []
         for log in logs:
@@ -555,25 +665,26 @@ class Flopper(AuctionContract):
         super(Flopper, self).__init__(web3, address, Flopper.abi, self.bids)
 
     def live(self) -> bool:
-        return self._contract.call().live() > 0
+        return self._stub.live() > 0
 
     def pad(self) -> Wad:
         """Returns the lot increase applied after an auction has been `tick`ed."""
 
-        return Wad(self._contract.call().pad())
+        return Wad(self._stub.pad())
 
-    def bids(self, id: int) -> Bid:
+    def bids(self, id: int, block_identifier='latest') -> Bid:
         """Returns the auction details.
 
         Args:
             id: Auction identifier.
+            block_identifier: Block to read the auction details at, the latest block by default.
 
         Returns:
             The auction details.
         """
         assert(isinstance(id, int))
 
-        array = self._contract.call().bids(id)
+        array = self._stub.call('bids', [id], block_identifier)
 
         return Flopper.Bid(id=id,
                            bid=Rad(array[0]),
@@ -610,9 +721,19 @@ class Flopper(AuctionContract):
 
         return Transact(self, self.web3, self.abi, self.address, self._contract, 'yank', [id])
 
-    def past_logs(self, number_of_past_blocks: int):
+    def past_logs(self, number_of_past_blocks: int, id: Optional[int] = None):
+        """Synchronously retrieves past `kick`, `dent` and `deal` events.
+
+        Args:
+            number_of_past_blocks: Number of past Ethereum blocks to retrieve the events from.
+            id: If specified, only events of this auction are retrieved.
+
+        Returns:
+            List of events, in the order they have been emitted.
+        """
         assert isinstance(number_of_past_blocks, int)
-        logs = super().get_past_lognotes(number_of_past_blocks, Flopper.abi)
+        assert isinstance(id, int) or (id is None)
+        logs = super().get_past_lognotes(number_of_past_blocks, Flopper.abi, ['0x5ff3a382', '0xc959c42b'], id)
 
         history = []
         for log in logs:
@@ -637,3 +758,639 @@ class Flopper(AuctionContract):
 
     def __repr__(self):
         return f"Flopper('{self.address}')"
+
+
+class AuctionIndex(EventIndex):
+    """Event-driven index of live auctions of a `Flipper`, `Flapper` or `Flopper` contract.
+
+    `AuctionContract.active_auctions()` reads every auction ever started, so its cost grows forever.
+    This index consumes `Kick` events and `tend`, `dent`, `deal`, `tick` and `yank` log notes (see
+    :py:class:`pymaker.logging.EventIndex`) and keeps the details of auctions which have not been dealt
+    or yanked yet. Only auctions touched by one of these events get their details read again, concurrently.
+
+    Attributes:
+        auction: The `Flipper`, `Flapper` or `Flopper` contract.
+        from_block: The first block events are consumed from, should be the block the auction contract
+            has been deployed at (or any block before).
+        last_block: The last block the index has been updated to.
+    """
+
+    def __init__(self, auction: AuctionContract, from_block: int = 0):
+        assert(isinstance(auction, AuctionContract))
+        super().__init__(auction.web3, auction.address, from_block)
+
+        self.auction = auction
+        self._bids = {}
+
+        self._kick_topic = event_abi_to_log_topic(auction.kick_abi)
+        self._note_topics = {}
+        for name in ['tend', 'dent', 'deal', 'tick', 'yank']:
+            if any(member.get('type') == 'function' and member.get('name') == name for member in auction.abi):
+                selector = auction._stub.stub.function(name).selector
+                self._note_topics[selector.ljust(32, bytes(1))] = name
+
+    def apply(self, log: dict):
+        """Applies a single raw `Kick` event or `tend`, `dent`, `deal`, `tick` or `yank` log note.
+
+        Auctions which have been kicked, bid on or ticked are only marked as stale, their details
+        get read at the end of `update()`. Events with other topics are ignored.
+
+        Args:
+            log: Raw event, as returned by `eth_getLogs`.
+        """
+        topics = log.get('topics')
+        if not topics:
+            return
+
+        with self._lock:
+            if bytes(topics[0]) == self._kick_topic:
+                id = self.auction.parse_event(log).id
+                self._stale.add(id)
+
+            elif bytes(topics[0]) in self._note_topics:
+                id = Web3.toInt(bytes(topics[2]))
+                if self._note_topics[bytes(topics[0])] in ['deal', 'yank']:
+                    self._bids.pop(id, None)
+                    self._stale.discard(id)
+                else:
+                    self._stale.add(id)
+
+    def _topics(self) -> List[bytes]:
+        return [self._kick_topic] + list(self._note_topics.keys())
+
+    def _refresh(self, stale: list, block_number: int):
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            bids = list(executor.map(lambda id: self.auction._bids(id, block_number), stale))
+
+        for bid in bids:
+            if bid.guy != Address("0x0000000000000000000000000000000000000000"):
+                self._bids[bid.id] = bid
+            else:
+                self._bids.pop(bid.id, None)
+
+    def live_ids(self) -> List[int]:
+        """Returns identifiers of auctions which have been kicked and have not been dealt or yanked yet.
+
+        Returns:
+            List of auction identifiers, as of `last_block`.
+        """
+        with self._lock:
+            return sorted(self._bids.keys())
+
+    def bids(self, id: int):
+        """Returns the auction details, as of `last_block`.
+
+        Args:
+            id: Auction identifier.
+
+        Returns:
+            The auction details, or `None` if the auction is not live.
+        """
+        assert(isinstance(id, int))
+
+        with self._lock:
+            return self._bids.get(id)
+
+    def snapshot(self) -> Tuple[int, list]:
+        """Returns the details of all live auctions along with the block they are as of, read consistently.
+
+        Returns:
+            A tuple of `last_block` and the list of `Bid` objects of the live auctions, sorted by their ids.
+        """
+        with self._lock:
+            return self.last_block, [self._bids[id] for id in sorted(self._bids.keys())]
+
+    def active_auctions(self) -> list:
+        """Updates the index and returns the active auctions.
+
+        Equivalent of `AuctionContract.active_auctions()`.
+
+        Returns:
+            List of `Bid` objects of the auctions which are still active.
+        """
+        self.update()
+
+        now = datetime.now().timestamp()
+        with self._lock:
+            return [self._bids[id] for id in sorted(self._bids.keys())
+                    if self._bids[id].guy != Address("0x0000000000000000000000000000000000000000")
+                    and (self._bids[id].tic == 0 or now < self._bids[id].tic) and now < self._bids[id].end]
+
+    def __repr__(self):
+        return f"AuctionIndex('{self.auction.address}', from_block={self.from_block})"
+
+
+class AuctionModel:
+    """Offline model of the rules of an auction contract.
+
+    Mirrors the `require` checks of the auction contracts, so bids can be validated against a cached
+    `Bid` and the minimal winning bid can be calculated without calling the Ethereum node. All checks
+    are done on raw integer values, exactly as the contracts do them.
+
+    Validation methods return the reason the contract would revert the transaction with,
+    or `None` if the transaction should succeed. Methods which apply a transaction return
+    the new state of the auction as a new `Bid` object and raise `ValueError` if it would fail.
+
+    `now` arguments default to the current time. Pass the timestamp of the latest block to mirror
+    the contract exactly.
+
+    Attributes:
+        beg: Minimum bid increase (or lot decrease), i.e. `1.05` means 5%.
+        ttl: Bid lifetime (in seconds).
+        tau: Total auction length (in seconds).
+    """
+
+    ONE = 10**18
+    NO_GUY = Address("0x0000000000000000000000000000000000000000")
+    contract_name = None
+
+    def __init__(self, beg: Wad, ttl: int, tau: int):
+        assert(isinstance(beg, Wad))
+        assert(isinstance(ttl, int))
+        assert(isinstance(tau, int))
+
+        self.beg = beg
+        self.ttl = ttl
+        self.tau = tau
+
+    @staticmethod
+    def _now(now: Optional[int]) -> int:
+        return int(datetime.now().timestamp()) if now is None else now
+
+    def _bidding_error(self, bid, now: int) -> Optional[str]:
+        if bid.guy == self.NO_GUY:
+            return f"{self.contract_name}/guy-not-set"
+        if not (bid.tic > now or bid.tic == 0):
+            return f"{self.contract_name}/already-finished-tic"
+        if not (bid.end > now):
+            return f"{self.contract_name}/already-finished-end"
+
+        return None
+
+    def is_active(self, bid, now: Optional[int] = None) -> bool:
+        """Checks whether the auction still accepts bids.
+
+        Args:
+            bid: The current state of the auction.
+            now: Current timestamp.
+
+        Returns:
+            `True` if the auction still accepts bids, `False` otherwise.
+        """
+        return self._bidding_error(bid, self._now(now)) is None
+
+    def validate_deal(self, bid, now: Optional[int] = None) -> Optional[str]:
+        """Validates a `deal` of the auction.
+
+        Args:
+            bid: The current state of the auction.
+            now: Current timestamp.
+
+        Returns:
+            The reason `deal` would revert with, or `None` if it should succeed.
+        """
+        now = self._now(now)
+
+        if not (bid.tic != 0 and (bid.tic < now or bid.end < now)):
+            return f"{self.contract_name}/not-finished"
+
+        return None
+
+    def validate_tick(self, bid, now: Optional[int] = None) -> Optional[str]:
+        """Validates a `tick` (restart) of the auction.
+
+        Args:
+            bid: The current state of the auction.
+            now: Current timestamp.
+
+        Returns:
+            The reason `tick` would revert with, or `None` if it should succeed.
+        """
+        now = self._now(now)
+
+        if not (bid.end < now):
+            return f"{self.contract_name}/not-finished"
+        if not (bid.tic == 0):
+            return f"{self.contract_name}/bid-already-placed"
+
+        return None
+
+    def tick(self, bid, now: Optional[int] = None):
+        """Applies a `tick` (restart) of the auction.
+
+        Args:
+            bid: The current state of the auction.
+            now: Current timestamp.
+
+        Returns:
+            The state of the auction after `tick`.
+        """
+        now = self._now(now)
+        self._raise(self.validate_tick(bid, now))
+
+        return self._copy(bid, end=now + self.tau)
+
+    def _min_bid_increase(self, bid: int) -> int:
+        # the smallest `bid` for which `bid > old_bid` and `bid * ONE >= beg * old_bid`
+        return max(bid + 1, -(-(self.beg.value * bid) // self.ONE))
+
+    def _max_lot_decrease(self, lot: int) -> int:
+        # the largest `lot` for which `lot < old_lot` and `beg * lot <= old_lot * ONE`
+        return min(lot - 1, (lot * self.ONE) // self.beg.value)
+
+    @staticmethod
+    def _raise(error: Optional[str]):
+        if error is not None:
+            raise ValueError(error)
+
+    @staticmethod
+    def _copy(original, **changes):
+        return original.__class__(**{**vars(original), **changes})
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({pformat(vars(self))})"
+
+
+class FlipperModel(AuctionModel):
+    """Offline model of the rules of the `Flipper` contract.
+
+    A collateral auction starts in the `tend` phase, in which bidders offer increasing amounts of Dai
+    for a fixed `lot` of collateral, up to `tab`. Once a bid reaches `tab`, the auction switches to the
+    `dent` phase, in which bidders accept decreasing amounts of collateral for `tab`.
+    """
+
+    contract_name = "Flipper"
+
+    @staticmethod
+    def from_contract(flipper: Flipper) -> 'FlipperModel':
+        """Creates a model using the parameters read from a `Flipper` contract.
+
+        Args:
+            flipper: The `Flipper` contract.
+
+        Returns:
+            A `FlipperModel` instance.
+        """
+        assert(isinstance(flipper, Flipper))
+
+        return FlipperModel(beg=flipper.beg(), ttl=flipper.ttl(), tau=flipper.tau())
+
+    def is_dent_phase(self, bid: Flipper.Bid) -> bool:
+        """Checks whether the auction has switched to the `dent` phase, i.e. whether the bid has reached `tab`."""
+        assert(isinstance(bid, Flipper.Bid))
+
+        return bid.bid == bid.tab
+
+    def validate_tend(self, bid: Flipper.Bid, lot: Wad, new_bid: Rad, now: Optional[int] = None) -> Optional[str]:
+        """Validates a `tend` bid.
+
+        Args:
+            bid: The current state of the auction.
+            lot: Amount of collateral, has to be equal to the current `lot`.
+            new_bid: Amount of Dai offered.
+            now: Current timestamp.
+
+        Returns:
+            The reason `tend` would revert with, or `None` if it should succeed.
+        """
+        assert(isinstance(bid, Flipper.Bid))
+        assert(isinstance(lot, Wad))
+        assert(isinstance(new_bid, Rad))
+
+        error = self._bidding_error(bid, self._now(now))
+        if error is not None:
+            return error
+
+        if lot.value != bid.lot.value:
+            return "Flipper/lot-not-matching"
+        if new_bid.value > bid.tab.value:
+            return "Flipper/higher-than-tab"
+        if new_bid.value <= bid.bid.value:
+            return "Flipper/bid-not-higher"
+        if new_bid.value * self.ONE < self.beg.value * bid.bid.value and new_bid.value != bid.tab.value:
+            return "Flipper/insufficient-increase"
+
+        return None
+
+    def validate_dent(self, bid: Flipper.Bid, lot: Wad, new_bid: Rad, now: Optional[int] = None) -> Optional[str]:
+        """Validates a `dent` bid.
+
+        Args:
+            bid: The current state of the auction.
+            lot: Amount of collateral accepted.
+            new_bid: Amount of Dai, has to be equal to the current bid (and `tab`).
+            now: Current timestamp.
+
+        Returns:
+            The reason `dent` would revert with, or `None` if it should succeed.
+        """
+        assert(isinstance(bid, Flipper.Bid))
+        assert(isinstance(lot, Wad))
+        assert(isinstance(new_bid, Rad))
+
+        error = self._bidding_error(bid, self._now(now))
+        if error is not None:
+            return error
+
+        if new_bid.value != bid.bid.value:
+            return "Flipper/not-matching-bid"
+        if new_bid.value != bid.tab.value:
+            return "Flipper/tend-not-finished"
+        if lot.value >= bid.lot.value:
+            return "Flipper/lot-not-lower"
+        if self.beg.value * lot.value > bid.lot.value * self.ONE:
+            return "Flipper/insufficient-decrease"
+
+        return None
+
+    def min_tend_bid(self, bid: Flipper.Bid) -> Optional[Rad]:
+        """Calculates the lowest winning `tend` bid.
+
+        Args:
+            bid: The current state of the auction.
+
+        Returns:
+            The lowest amount of Dai which can be bid, or `None` if the auction is in the `dent` phase.
+        """
+        assert(isinstance(bid, Flipper.Bid))
+
+        if bid.bid.value >= bid.tab.value:
+            return None
+
+        return Rad(min(self._min_bid_increase(bid.bid.value), bid.tab.value))
+
+    def max_dent_lot(self, bid: Flipper.Bid) -> Optional[Wad]:
+        """Calculates the highest winning `dent` lot.
+
+        Args:
+            bid: The current state of the auction.
+
+        Returns:
+            The highest amount of collateral which can be accepted, or `None` if the auction
+            is still in the `tend` phase or the lot cannot be decreased any further.
+        """
+        assert(isinstance(bid, Flipper.Bid))
+
+        if not self.is_dent_phase(bid) or bid.lot.value == 0:
+            return None
+
+        return Wad(self._max_lot_decrease(bid.lot.value))
+
+    def tend(self, bid: Flipper.Bid, guy: Address, lot: Wad, new_bid: Rad, now: Optional[int] = None) -> Flipper.Bid:
+        """Applies a `tend` bid.
+
+        Args:
+            bid: The current state of the auction.
+            guy: The bidder.
+            lot: Amount of collateral, has to be equal to the current `lot`.
+            new_bid: Amount of Dai offered.
+            now: Current timestamp.
+
+        Returns:
+            The state of the auction after the bid.
+        """
+        assert(isinstance(guy, Address))
+
+        now = self._now(now)
+        self._raise(self.validate_tend(bid, lot, new_bid, now))
+
+        return self._copy(bid, guy=guy, bid=new_bid, tic=now + self.ttl)
+
+    def dent(self, bid: Flipper.Bid, guy: Address, lot: Wad, new_bid: Rad, now: Optional[int] = None) -> Flipper.Bid:
+        """Applies a `dent` bid.
+
+        Args:
+            bid: The current state of the auction.
+            guy: The bidder.
+            lot: Amount of collateral accepted.
+            new_bid: Amount of Dai, has to be equal to the current bid (and `tab`).
+            now: Current timestamp.
+
+        Returns:
+            The state of the auction after the bid.
+        """
+        assert(isinstance(guy, Address))
+
+        now = self._now(now)
+        self._raise(self.validate_dent(bid, lot, new_bid, now))
+
+        return self._copy(bid, guy=guy, lot=lot, tic=now + self.ttl)
+
+
+class FlapperModel(AuctionModel):
+    """Offline model of the rules of the `Flapper` contract.
+
+    In a surplus auction bidders offer increasing amounts of MKR for a fixed `lot` of Dai.
+
+    Attributes:
+        live: Whether the `Flapper` has not been caged.
+    """
+
+    contract_name = "Flapper"
+
+    def __init__(self, beg: Wad, ttl: int, tau: int, live: bool = True):
+        assert(isinstance(live, bool))
+
+        super().__init__(beg, ttl, tau)
+        self.live = live
+
+    @staticmethod
+    def from_contract(flapper: Flapper) -> 'FlapperModel':
+        """Creates a model using the parameters read from a `Flapper` contract.
+
+        Args:
+            flapper: The `Flapper` contract.
+
+        Returns:
+            A `FlapperModel` instance.
+        """
+        assert(isinstance(flapper, Flapper))
+
+        return FlapperModel(beg=flapper.beg(), ttl=flapper.ttl(), tau=flapper.tau(), live=flapper.live())
+
+    def validate_tend(self, bid: Flapper.Bid, lot: Rad, new_bid: Wad, now: Optional[int] = None) -> Optional[str]:
+        """Validates a `tend` bid.
+
+        Args:
+            bid: The current state of the auction.
+            lot: Amount of Dai, has to be equal to the current `lot`.
+            new_bid: Amount of MKR offered.
+            now: Current timestamp.
+
+        Returns:
+            The reason `tend` would revert with, or `None` if it should succeed.
+        """
+        assert(isinstance(bid, Flapper.Bid))
+        assert(isinstance(lot, Rad))
+        assert(isinstance(new_bid, Wad))
+
+        if not self.live:
+            return "Flapper/not-live"
+
+        error = self._bidding_error(bid, self._now(now))
+        if error is not None:
+            return error
+
+        if lot.value != bid.lot.value:
+            return "Flapper/lot-not-matching"
+        if new_bid.value <= bid.bid.value:
+            return "Flapper/bid-not-higher"
+        if new_bid.value * self.ONE < self.beg.value * bid.bid.value:
+            return "Flapper/insufficient-increase"
+
+        return None
+
+    def validate_deal(self, bid: Flapper.Bid, now: Optional[int] = None) -> Optional[str]:
+        if not self.live:
+            return "Flapper/not-live"
+
+        return super().validate_deal(bid, now)
+
+    def min_tend_bid(self, bid: Flapper.Bid) -> Wad:
+        """Calculates the lowest winning `tend` bid.
+
+        Args:
+            bid: The current state of the auction.
+
+        Returns:
+            The lowest amount of MKR which can be bid.
+        """
+        assert(isinstance(bid, Flapper.Bid))
+
+        return Wad(self._min_bid_increase(bid.bid.value))
+
+    def tend(self, bid: Flapper.Bid, guy: Address, lot: Rad, new_bid: Wad, now: Optional[int] = None) -> Flapper.Bid:
+        """Applies a `tend` bid.
+
+        Args:
+            bid: The current state of the auction.
+            guy: The bidder.
+            lot: Amount of Dai, has to be equal to the current `lot`.
+            new_bid: Amount of MKR offered.
+            now: Current timestamp.
+
+        Returns:
+            The state of the auction after the bid.
+        """
+        assert(isinstance(guy, Address))
+
+        now = self._now(now)
+        self._raise(self.validate_tend(bid, lot, new_bid, now))
+
+        return self._copy(bid, guy=guy, bid=new_bid, tic=now + self.ttl)
+
+
+class FlopperModel(AuctionModel):
+    """Offline model of the rules of the `Flopper` contract.
+
+    In a debt auction bidders accept decreasing amounts of MKR (`lot`) for a fixed `bid` of Dai.
+
+    Attributes:
+        pad: Lot increase applied when the auction gets restarted with `tick`.
+        live: Whether the `Flopper` has not been caged.
+    """
+
+    contract_name = "Flopper"
+
+    def __init__(self, beg: Wad, ttl: int, tau: int, pad: Wad, live: bool = True):
+        assert(isinstance(pad, Wad))
+        assert(isinstance(live, bool))
+
+        super().__init__(beg, ttl, tau)
+        self.pad = pad
+        self.live = live
+
+    @staticmethod
+    def from_contract(flopper: Flopper) -> 'FlopperModel':
+        """Creates a model using the parameters read from a `Flopper` contract.
+
+        Args:
+            flopper: The `Flopper` contract.
+
+        Returns:
+            A `FlopperModel` instance.
+        """
+        assert(isinstance(flopper, Flopper))
+
+        return FlopperModel(beg=flopper.beg(), ttl=flopper.ttl(), tau=flopper.tau(), pad=flopper.pad(),
+                            live=flopper.live())
+
+    def validate_dent(self, bid: Flopper.Bid, lot: Wad, new_bid: Rad, now: Optional[int] = None) -> Optional[str]:
+        """Validates a `dent` bid.
+
+        Args:
+            bid: The current state of the auction.
+            lot: Amount of MKR accepted.
+            new_bid: Amount of Dai, has to be equal to the current bid.
+            now: Current timestamp.
+
+        Returns:
+            The reason `dent` would revert with, or `None` if it should succeed.
+        """
+        assert(isinstance(bid, Flopper.Bid))
+        assert(isinstance(lot, Wad))
+        assert(isinstance(new_bid, Rad))
+
+        if not self.live:
+            return "Flopper/not-live"
+
+        error = self._bidding_error(bid, self._now(now))
+        if error is not None:
+            return error
+
+        if new_bid.value != bid.bid.value:
+            return "Flopper/not-matching-bid"
+        if lot.value >= bid.lot.value:
+            return "Flopper/lot-not-lower"
+        if self.beg.value * lot.value > bid.lot.value * self.ONE:
+            return "Flopper/insufficient-decrease"
+
+        return None
+
+    def validate_deal(self, bid: Flopper.Bid, now: Optional[int] = None) -> Optional[str]:
+        if not self.live:
+            return "Flopper/not-live"
+
+        return super().validate_deal(bid, now)
+
+    def max_dent_lot(self, bid: Flopper.Bid) -> Optional[Wad]:
+        """Calculates the highest winning `dent` lot.
+
+        Args:
+            bid: The current state of the auction.
+
+        Returns:
+            The highest amount of MKR which can be accepted, or `None` if the lot cannot be decreased any further.
+        """
+        assert(isinstance(bid, Flopper.Bid))
+
+        if bid.lot.value == 0:
+            return None
+
+        return Wad(self._max_lot_decrease(bid.lot.value))
+
+    def dent(self, bid: Flopper.Bid, guy: Address, lot: Wad, new_bid: Rad, now: Optional[int] = None) -> Flopper.Bid:
+        """Applies a `dent` bid.
+
+        Args:
+            bid: The current state of the auction.
+            guy: The bidder.
+            lot: Amount of MKR accepted.
+            new_bid: Amount of Dai, has to be equal to the current bid.
+            now: Current timestamp.
+
+        Returns:
+            The state of the auction after the bid.
+        """
+        assert(isinstance(guy, Address))
+
+        now = self._now(now)
+        self._raise(self.validate_dent(bid, lot, new_bid, now))
+
+        return self._copy(bid, guy=guy, lot=lot, tic=now + self.ttl)
+
+    def tick(self, bid: Flopper.Bid, now: Optional[int] = None) -> Flopper.Bid:
+        now = self._now(now)
+        self._raise(self.validate_tick(bid, now))
+
+        return self._copy(bid, lot=Wad(self.pad.value * bid.lot.value // self.ONE), end=now + self.tau)
@@ -19,14 +19,18 @@ import eth_utils
 import json
 import os
 import re
+import threading
 import warnings
+from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import Dict, List, Optional
 
 import pkg_resources
-from pymaker.auctions import Flapper, Flopper, Flipper
+from pymaker.auctions import Flapper, Flopper, Flipper, AuctionIndex
 from web3 import Web3, HTTPProvider
 
-from pymaker import Address
+from pymaker import Address, Transact
 from pymaker.approval import directly, hope_directly
 from pymaker.auth import DSGuard
 from pymaker.etherdelta import EtherDelta
@@ -39,6 +43,7 @@ from pymaker.oasis import MatchingMarket
 from pymaker.sai import Tub, Tap, Top, Vox
 from pymaker.shutdown import ShutdownModule, End
 from pymaker.token import DSToken, DSEthToken
+from pymaker.transactional import TxManager
 from pymaker.vault import DSVault
 
 
@@ -147,11 +152,96 @@ class Deployment:
         self.web3.manager.request_blocking("evm_increaseTime", [seconds])
 
 
+class _Deferred:
+    """A contract client which gets constructed on first use.
+
+    Constructing a client checks the code at its address, which is a node round-trip, so building
+    all clients of a deployment upfront makes startup as slow as the node is far away.
+    `conf` holds the configuration entries the client is constructed from, so the configuration
+    can be serialized without constructing it.
+    """
+    def __init__(self, factory, conf: dict):
+        assert(callable(factory))
+        assert(isinstance(conf, dict))
+
+        self.conf = conf
+        self.constructed = False
+        self._factory = factory
+        self._value = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if not self.constructed:
+                self._value = self._factory()
+                self.constructed = True
+
+            return self._value
+
+
+class _DeferredMember:
+    """Attribute which transparently constructs a `_Deferred` value assigned to it on first read."""
+    def __set_name__(self, owner, name):
+        self.name = f'_{name}'
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        value = instance.__dict__[self.name]
+        return value.get() if isinstance(value, _Deferred) else value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.name] = value
+
+
+class _DeferredDict(MutableMapping):
+    """Dictionary which constructs `_Deferred` values on first access.
+
+    Values can be added, replaced and removed like in a regular `dict`.
+    """
+    def __init__(self, items: dict):
+        assert(isinstance(items, dict))
+
+        self.items_deferred = items
+
+    def __getitem__(self, key):
+        value = self.items_deferred[key]
+        return value.get() if isinstance(value, _Deferred) else value
+
+    def __setitem__(self, key, value):
+        self.items_deferred[key] = value
+
+    def __delitem__(self, key):
+        del self.items_deferred[key]
+
+    def __iter__(self):
+        return iter(self.items_deferred)
+
+    def __len__(self):
+        return len(self.items_deferred)
+
+
+class _ConfigMember:
+    """Attribute of `DssDeployment` which delegates to the corresponding attribute of its `Config`."""
+    def __init__(self, name: str):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        return getattr(instance.config, self.name)
+
+
 class DssDeployment:
     """Represents a Dai Stablecoin System deployment for multi-collateral Dai (MCD).
 
     Static method `from_json()` should be used to instantiate all the objet of
     a deployment from a json description of all the system addresses.
+
+    Contract clients of a deployment created with `from_json()` get constructed on first access.
+    `prewarm()` constructs all of them upfront, concurrently.
     """
 
     NETWORKS = {
@@ -160,6 +250,43 @@ class DssDeployment:
     }
 
     class Config:
+        # Configuration keys of the core contracts, with the attribute names and classes of their clients.
+        CONTRACTS = [('MCD_PAUSE', 'pause', DSPause),
+                     ('MCD_VAT', 'vat', Vat),
+                     ('MCD_VOW', 'vow', Vow),
+                     ('MCD_JUG', 'jug', Jug),
+                     ('MCD_CAT', 'cat', Cat),
+                     ('MCD_FLAP', 'flapper', Flapper),
+                     ('MCD_FLOP', 'flopper', Flopper),
+                     ('MCD_POT', 'pot', Pot),
+                     ('MCD_DAI', 'dai', DSToken),
+                     ('MCD_JOIN_DAI', 'dai_join', DaiJoin),
+                     ('MCD_GOV', 'mkr', DSToken),
+                     ('MCD_SPOT', 'spotter', Spotter),
+                     ('MCD_ADM', 'ds_chief', DSChief),
+                     ('MCD_ESM', 'esm', ShutdownModule),
+                     ('MCD_END', 'end', End),
+                     ('PROXY_REGISTRY', 'proxy_registry', ProxyRegistry),
+                     ('PROXY_ACTIONS_DSR', 'dss_proxy_actions', DssProxyActionsDsr)]
+
+        pause = _DeferredMember()
+        vat = _DeferredMember()
+        vow = _DeferredMember()
+        jug = _DeferredMember()
+        cat = _DeferredMember()
+        flapper = _DeferredMember()
+        flopper = _DeferredMember()
+        pot = _DeferredMember()
+        dai = _DeferredMember()
+        dai_join = _DeferredMember()
+        mkr = _DeferredMember()
+        spotter = _DeferredMember()
+        ds_chief = _DeferredMember()
+        esm = _DeferredMember()
+        end = _DeferredMember()
+        proxy_registry = _DeferredMember()
+        dss_proxy_actions = _DeferredMember()
+
         def __init__(self, pause: DSPause, vat: Vat, vow: Vow, jug: Jug, cat: Cat, flapper: Flapper,
                      flopper: Flopper, pot: Pot, dai: DSToken, dai_join: DaiJoin, mkr: DSToken,
                      spotter: Spotter, ds_chief: DSChief, esm: ShutdownModule, end: End,
@@ -186,49 +313,44 @@ class DssDeployment:
 
         @staticmethod
         def from_json(web3: Web3, conf: str):
+            """Creates the configuration of a deployment from a json description of all the system addresses.
+
+            No contract client gets constructed at this point, so no node requests are made. Each client
+            gets constructed on first access to it, which is also when a missing contract would be reported.
+            """
             conf = json.loads(conf)
-            pause = DSPause(web3, Address(conf['MCD_PAUSE']))
-            vat = Vat(web3, Address(conf['MCD_VAT']))
-            vow = Vow(web3, Address(conf['MCD_VOW']))
-            jug = Jug(web3, Address(conf['MCD_JUG']))
-            cat = Cat(web3, Address(conf['MCD_CAT']))
-            dai = DSToken(web3, Address(conf['MCD_DAI']))
-            dai_adapter = DaiJoin(web3, Address(conf['MCD_JOIN_DAI']))
-            flapper = Flapper(web3, Address(conf['MCD_FLAP']))
-            flopper = Flopper(web3, Address(conf['MCD_FLOP']))
-            pot = Pot(web3, Address(conf['MCD_POT']))
-            mkr = DSToken(web3, Address(conf['MCD_GOV']))
-            spotter = Spotter(web3, Address(conf['MCD_SPOT']))
-            ds_chief = DSChief(web3, Address(conf['MCD_ADM']))
-            esm = ShutdownModule(web3, Address(conf['MCD_ESM']))
-            end = End(web3, Address(conf['MCD_END']))
-            proxy_registry = ProxyRegistry(web3, Address(conf['PROXY_REGISTRY']))
-            dss_proxy_actions = DssProxyActionsDsr(web3, Address(conf['PROXY_ACTIONS_DSR']))
+
+            members = [_Deferred(partial(cls, web3, Address(conf[key])), {key: conf[key]})
+                       for key, _, cls in DssDeployment.Config.CONTRACTS]
 
             collaterals = {}
             for name in DssDeployment.Config._infer_collaterals_from_addresses(conf.keys()):
-                ilk = Ilk(name[0].replace('_', '-'))
-                if name[1] == "ETH":
-                    gem = DSEthToken(web3, Address(conf[name[1]]))
-                else:
-                    gem = DSToken(web3, Address(conf[name[1]]))
+                keys = [name[1], f'PIP_{name[1]}', f'MCD_JOIN_{name[0]}', f'MCD_FLIP_{name[0]}']
+                collaterals[name[0].replace('_', '-')] = \
+                    _Deferred(partial(DssDeployment.Config._collateral, web3, conf, name),
+                              {key: conf[key] for key in keys if key in conf})
 
-                # PIP contract may be a DSValue, OSM, or bogus address.
-                pip_address = Address(conf[f'PIP_{name[1]}'])
-                try:
-                    pip = DSValue(web3, pip_address)
-                except Exception:
-                    pip = None
+            return DssDeployment.Config(*members, collaterals=_DeferredDict(collaterals))
 
-                collateral = Collateral(ilk=ilk, gem=gem,
-                                        adapter=GemJoin(web3, Address(conf[f'MCD_JOIN_{name[0]}'])),
-                                        flipper=Flipper(web3, Address(conf[f'MCD_FLIP_{name[0]}'])),
-                                        pip=pip)
-                collaterals[ilk.name] = collateral
-
-            return DssDeployment.Config(pause, vat, vow, jug, cat, flapper, flopper, pot,
-                                        dai, dai_adapter, mkr, spotter, ds_chief, esm, end,
-                                        proxy_registry, dss_proxy_actions, collaterals)
+        @staticmethod
+        def _collateral(web3: Web3, conf: dict, name: tuple) -> Collateral:
+            ilk = Ilk(name[0].replace('_', '-'))
+            if name[1] == "ETH":
+                gem = DSEthToken(web3, Address(conf[name[1]]))
+            else:
+                gem = DSToken(web3, Address(conf[name[1]]))
+
+            # PIP contract may be a DSValue, OSM, or bogus address.
+            pip_address = Address(conf[f'PIP_{name[1]}'])
+            try:
+                pip = DSValue(web3, pip_address)
+            except Exception:
+                pip = None
+
+            return Collateral(ilk=ilk, gem=gem,
+                              adapter=GemJoin(web3, Address(conf[f'MCD_JOIN_{name[0]}'])),
+                              flipper=Flipper(web3, Address(conf[f'MCD_FLIP_{name[0]}'])),
+                              pip=pip)
 
         @staticmethod
         def _infer_collaterals_from_addresses(keys: []) -> List:
@@ -244,28 +366,46 @@ class DssDeployment:
 
             return collaterals
 
+        def _deferred(self) -> list:
+            collaterals = self.collaterals.items_deferred.values() if isinstance(self.collaterals, _DeferredDict) \
+                else []
+
+            return [value for value in list(self.__dict__.values()) + list(collaterals)
+                    if isinstance(value, _Deferred) and not value.constructed]
+
+        def prewarm(self, max_workers: int = 8):
+            """Constructs all contract clients which have not been constructed yet, concurrently.
+
+            Args:
+                max_workers: Maximum number of clients being constructed at the same time.
+            """
+            assert(isinstance(max_workers, int))
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                list(executor.map(lambda deferred: deferred.get(), self._deferred()))
+
         def to_dict(self) -> dict:
-            conf_dict = {
-                'MCD_PAUSE': self.pause.address.address,
-                'MCD_VAT': self.vat.address.address,
-                'MCD_VOW': self.vow.address.address,
-                'MCD_JUG': self.jug.address.address,
-                'MCD_CAT': self.cat.address.address,
-                'MCD_FLAP': self.flapper.address.address,
-                'MCD_FLOP': self.flopper.address.address,
-                'MCD_POT': self.pot.address.address,
-                'MCD_DAI': self.dai.address.address,
-                'MCD_JOIN_DAI': self.dai_join.address.address,
-                'MCD_GOV': self.mkr.address.address,
-                'MCD_SPOT': self.spotter.address.address,
-                'MCD_ADM': self.ds_chief.address.address,
-                'MCD_ESM': self.esm.address.address,
-                'MCD_END': self.end.address.address,
-                'PROXY_REGISTRY': self.proxy_registry.address.address,
-                'PROXY_ACTIONS_DSR': self.dss_proxy_actions.address.address
-            }
-
-            for collateral in self.collaterals.values():
+            conf_dict = {}
+            for key, name, _ in DssDeployment.Config.CONTRACTS:
+                value = self.__dict__[f'_{name}']
+                if isinstance(value, _Deferred) and not value.constructed:
+                    conf_dict.update(value.conf)
+                else:
+                    conf_dict[key] = getattr(self, name).address.address
+
+            if isinstance(self.collaterals, _DeferredDict):
+                collaterals = self.collaterals.items_deferred.values()
+            else:
+                collaterals = self.collaterals.values()
+
+            for collateral in collaterals:
+                if isinstance(collateral, _Deferred):
+                    if not collateral.constructed:
+                        conf_dict.update(collateral.conf)
+                        continue
+
+                    collateral = collateral.get()
+
                 match = re.search(r'(\w+)(?:-\w+)?', collateral.ilk.name)
                 name = (collateral.ilk.name.replace('-', '_'), match.group(1))
                 conf_dict[name[1]] = collateral.gem.address.address
@@ -279,40 +419,68 @@ class DssDeployment:
         def to_json(self) -> str:
             return json.dumps(self.to_dict())
 
+    pause = _ConfigMember('pause')
+    vat = _ConfigMember('vat')
+    vow = _ConfigMember('vow')
+    jug = _ConfigMember('jug')
+    cat = _ConfigMember('cat')
+    flapper = _ConfigMember('flapper')
+    flopper = _ConfigMember('flopper')
+    pot = _ConfigMember('pot')
+    dai = _ConfigMember('dai')
+    dai_adapter = _ConfigMember('dai_join')
+    mkr = _ConfigMember('mkr')
+    collaterals = _ConfigMember('collaterals')
+    spotter = _ConfigMember('spotter')
+    ds_chief = _ConfigMember('ds_chief')
+    esm = _ConfigMember('esm')
+    end = _ConfigMember('end')
+    proxy_registry = _ConfigMember('proxy_registry')
+    dss_proxy_actions = _ConfigMember('dss_proxy_actions')
+
     def __init__(self, web3: Web3, config: Config):
         assert isinstance(web3, Web3)
         assert isinstance(config, DssDeployment.Config)
 
         self.web3 = web3
         self.config = config
-        self.pause = config.pause
-        self.vat = config.vat
-        self.vow = config.vow
-        self.jug = config.jug
-        self.cat = config.cat
-        self.flapper = config.flapper
-        self.flopper = config.flopper
-        self.pot = config.pot
-        self.dai = config.dai
-        self.dai_adapter = config.dai_join
-        self.mkr = config.mkr
-        self.collaterals = config.collaterals
-        self.spotter = config.spotter
-        self.ds_chief = config.ds_chief
-        self.esm = config.esm
-        self.end = config.end
-        self.proxy_registry = config.proxy_registry
-        self.dss_proxy_actions = config.dss_proxy_actions
 
     @staticmethod
-    def from_json(web3: Web3, conf: str):
-        return DssDeployment(web3, DssDeployment.Config.from_json(web3, conf))
+    def from_json(web3: Web3, conf: str, prewarm: bool = False):
+        """Creates a deployment from a json description of all the system addresses.
+
+        Args:
+            web3: An instance of `Web` from `web3.py`.
+            conf: Json description of the system addresses.
+            prewarm: If `True`, all contract clients get constructed upfront (see `prewarm()`),
+                otherwise each of them gets constructed on first access.
+
+        Returns:
+            A `DssDeployment` instance.
+        """
+        assert isinstance(prewarm, bool)
+
+        deployment = DssDeployment(web3, DssDeployment.Config.from_json(web3, conf))
+        if prewarm:
+            deployment.prewarm()
+
+        return deployment
+
+    def prewarm(self, max_workers: int = 8):
+        """Constructs all contract clients of the deployment which have not been constructed yet.
+
+        Each construction checks the contract code on the node, so they are run concurrently.
+
+        Args:
+            max_workers: Maximum number of clients being constructed at the same time.
+        """
+        self.config.prewarm(max_workers)
 
     def to_json(self) -> str:
         return self.config.to_json()
 
     @staticmethod
-    def from_node(web3: Web3):
+    def from_node(web3: Web3, prewarm: bool = False):
         assert isinstance(web3, Web3)
 
         network = DssDeployment.NETWORKS.get(web3.net.version, "testnet")
@@ -322,7 +490,7 @@ class DssDeployment:
         if not os.path.isfile(addresses_path):
             raise FileNotFoundError("Network is not yet supported")
 
-        return DssDeployment.from_json(web3=web3, conf=open(addresses_path, "r").read())
+        return DssDeployment.from_json(web3=web3, conf=open(addresses_path, "r").read(), prewarm=prewarm)
 
     @staticmethod
     def from_network(web3: Web3, network: str):
@@ -347,6 +515,75 @@ class DssDeployment:
         self.dai_adapter.approve(approval_function=hope_directly(from_address=usr), source=self.vat.address)
         self.dai.approve(self.dai_adapter.address).transact(from_address=usr)
 
+    def maintenance(self, tx_manager: TxManager, gas_limit: int = 3000000, ilks: Optional[List[Ilk]] = None,
+                    eras: Optional[List[int]] = None) -> List[Transact]:
+        """Packs `Jug.drip` and `Spotter.poke` for many Ilks and `Vow.flog` for many eras into few transactions.
+
+        All the invocations get executed via `tx_manager`, see `TxManager.execute_chunked()` for how they
+        are split between transactions. Invocations which would fail (i.e. `flog` of an era which has not
+        waited for `Vow.wait()` yet) are skipped.
+
+        Args:
+            tx_manager: The `TxManager` owned by the caller, to execute the invocations with.
+            gas_limit: Maximum amount of gas each of the transactions is expected to use.
+            ilks: Ilks to `drip` and `poke`, all the Ilks of the deployment if not specified.
+            eras: Eras of queued debt to `flog`, none if not specified.
+
+        Returns:
+            A list of :py:class:`pymaker.Transact` instances, to be transacted one after another.
+        """
+        assert(isinstance(tx_manager, TxManager))
+        assert(isinstance(gas_limit, int))
+        assert(isinstance(ilks, list) or (ilks is None))
+        assert(isinstance(eras, list) or (eras is None))
+
+        if ilks is None:
+            ilks = [collateral.ilk for collateral in self.collaterals.values()]
+
+        invocations = [self.jug.drip(ilk).invocation() for ilk in ilks] + \
+                      [self.spotter.poke(ilk).invocation() for ilk in ilks] + \
+                      [self.vow.flog(era).invocation() for era in (eras or [])]
+
+        return tx_manager.execute_chunked([], invocations, gas_limit)
+
+    def deal_finished_auctions(self, tx_manager: TxManager, gas_limit: int = 3000000) -> List[Transact]:
+        """Settles all finished auctions of every flipper, the flapper and the flopper in few transactions.
+
+        Finished auctions are found using `AuctionContract.finished_auctions()`, so the auction indexes
+        get used if enabled (see `use_auction_indexes()`). All the `deal` invocations get executed via
+        `tx_manager`, see `TxManager.execute_chunked()` for how they are split between transactions.
+        Invocations which would fail (i.e. `deal` of an auction dealt by someone else meanwhile) are skipped.
+
+        Args:
+            tx_manager: The `TxManager` owned by the caller, to execute the invocations with.
+            gas_limit: Maximum amount of gas each of the transactions is expected to use.
+
+        Returns:
+            A list of :py:class:`pymaker.Transact` instances, to be transacted one after another.
+        """
+        assert(isinstance(tx_manager, TxManager))
+        assert(isinstance(gas_limit, int))
+
+        auctions = [collateral.flipper for collateral in self.collaterals.values()] + [self.flapper, self.flopper]
+        with ThreadPoolExecutor(max_workers=len(auctions)) as executor:
+            finished = list(executor.map(lambda auction: auction.finished_auctions(), auctions))
+
+        invocations = [auction.deal(bid.id).invocation() for auction, bids in zip(auctions, finished) for bid in bids]
+
+        return tx_manager.execute_chunked([], invocations, gas_limit)
+
+    def use_auction_indexes(self, from_block: int = 0):
+        """Makes `active_auctions()` use an :py:class:`pymaker.auctions.AuctionIndex` for every auction contract.
+
+        Args:
+            from_block: The first block the indexes consume events from, should not be later
+                than the block the auction contracts have been deployed at.
+        """
+        assert isinstance(from_block, int)
+
+        for auction in [collateral.flipper for collateral in self.collaterals.values()] + [self.flapper, self.flopper]:
+            auction.use_index(AuctionIndex(auction, from_block))
+
     def active_auctions(self) -> dict:
         flips = {}
         for collateral in self.collaterals.values():
@@ -16,10 +16,13 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import logging
+from bisect import bisect_left, insort
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from fractions import Fraction
 from pprint import pformat
-from typing import Optional, List
+from typing import Dict, Iterable, Optional, List
 
 from hexbytes import HexBytes
 from web3 import Web3
@@ -29,7 +32,8 @@ from web3.utils.events import get_event_data
 from pymaker import Address, Contract, Transact
 from pymaker.approval import directly, hope_directly
 from pymaker.auctions import Flapper, Flipper, Flopper
-from pymaker.logging import LogNote
+from pymaker.logging import EventIndex, LogNote
+from pymaker.stub import ContractStub
 from pymaker.token import DSToken, ERC20Token
 from pymaker.numeric import Wad, Ray, Rad
 
@@ -288,6 +292,7 @@ class Vat(Contract):
         self.web3 = web3
         self.address = address
         self._contract = self._get_contract(web3, self.abi, address)
+        self._stub = self._get_stub(web3, self.abi, address)
 
     def init(self, ilk: Ilk) -> Transact:
         assert isinstance(ilk, Ilk)
@@ -295,12 +300,12 @@ class Vat(Contract):
         return Transact(self, self.web3, self.abi, self.address, self._contract, 'init', [ilk.toBytes()])
 
     def live(self) -> bool:
-        return self._contract.call().live() > 0
+        return self._stub.live() > 0
 
     def wards(self, address: Address):
         assert isinstance(address, Address)
 
-        return bool(self._contract.call().wards(address.address))
+        return bool(self._stub.wards(address.address))
 
     def hope(self, address: Address):
         assert isinstance(address, Address)
@@ -311,40 +316,79 @@ class Vat(Contract):
         assert isinstance(sender, Address)
         assert isinstance(usr, Address)
 
-        return bool(self._contract.call().can(sender.address, usr.address))
+        return bool(self._stub.can(sender.address, usr.address))
 
     def ilk(self, name: str) -> Ilk:
         assert isinstance(name, str)
 
         b32_ilk = Ilk(name).toBytes()
-        (art, rate, spot, line, dust) = self._contract.call().ilks(b32_ilk)
+        (art, rate, spot, line, dust) = self._stub.ilks(b32_ilk)
 
         # We could get "ink" from the urn, but caller must provide an address.
         return Ilk(name, rate=Ray(rate), ink=Wad(0), art=Wad(art), spot=Ray(spot), line=Rad(line), dust=Rad(dust))
 
+    def ilks(self, names: Iterable[str], block_identifier='latest') -> Dict[str, Ilk]:
+        """Reads many Ilks at the same block, with concurrent requests.
+
+        Args:
+            names: Names of the collateral types.
+            block_identifier: Block to read the Ilks at, the latest block by default.
+
+        Returns:
+            Dictionary of :py:class:`pymaker.dss.Ilk` indexed by their names.
+        """
+        names = list(names)
+        assert all(isinstance(name, str) for name in names)
+
+        results = self._stub.call_many([('ilks', [Ilk(name).toBytes()]) for name in names], block_identifier)
+        return {name: Ilk(name, rate=Ray(rate), ink=Wad(0), art=Wad(art), spot=Ray(spot), line=Rad(line),
+                          dust=Rad(dust))
+                for name, (art, rate, spot, line, dust) in zip(names, results)}
+
     def gem(self, ilk: Ilk, urn: Address) -> Wad:
         assert isinstance(ilk, Ilk)
         assert isinstance(urn, Address)
 
-        return Wad(self._contract.call().gem(ilk.toBytes(), urn.address))
+        return Wad(self._stub.gem(ilk.toBytes(), urn.address))
 
     def dai(self, urn: Address) -> Rad:
         assert isinstance(urn, Address)
 
-        return Rad(self._contract.call().dai(urn.address))
+        return Rad(self._stub.dai(urn.address))
 
     def sin(self, urn: Address) -> Rad:
         assert isinstance(urn, Address)
 
-        return Rad(self._contract.call().sin(urn.address))
+        return Rad(self._stub.sin(urn.address))
 
     def urn(self, ilk: Ilk, address: Address) -> Urn:
         assert isinstance(ilk, Ilk)
         assert isinstance(address, Address)
 
-        (ink, art) = self._contract.call().urns(ilk.toBytes(), address.address)
+        (ink, art) = self._stub.urns(ilk.toBytes(), address.address)
         return Urn(address, ilk, Wad(ink), Wad(art))
 
+    def ilk_and_urn(self, ilk: Ilk, address: Address, block_identifier='latest') -> tuple:
+        """Reads an Ilk and an Urn of that Ilk at the same block, with concurrent requests.
+
+        Args:
+            ilk: Identifies the type of collateral.
+            address: CDP holder (address of the Urn).
+            block_identifier: Block to read the values at, the latest block by default.
+
+        Returns:
+            A tuple of :py:class:`pymaker.dss.Ilk` and :py:class:`pymaker.dss.Urn`.
+        """
+        assert isinstance(ilk, Ilk)
+        assert isinstance(address, Address)
+
+        ((art, rate, spot, line, dust), (urn_ink, urn_art)) = \
+            self._stub.call_many([('ilks', [ilk.toBytes()]),
+                                  ('urns', [ilk.toBytes(), address.address])], block_identifier)
+
+        ilk = Ilk(ilk.name, rate=Ray(rate), ink=Wad(0), art=Wad(art), spot=Ray(spot), line=Rad(line), dust=Rad(dust))
+        return ilk, Urn(address, ilk, Wad(urn_ink), Wad(urn_art))
+
     def urns(self, ilk=None, from_block=0) -> dict:
         """Retrieve a collection of Urns indexed by Ilk.name and then Urn address
 
@@ -371,15 +415,15 @@ class Vat(Contract):
 
     def debt(self) -> Rad:
         """Total quantity of Dai issued"""
-        return Rad(self._contract.call().debt())
+        return Rad(self._stub.debt())
 
     def vice(self) -> Rad:
         """Total quantity of system debt"""
-        return Rad(self._contract.call().vice())
+        return Rad(self._stub.vice())
 
     def line(self) -> Rad:
         """Total debt ceiling"""
-        return Rad(self._contract.call().Line())
+        return Rad(self._stub.Line())
 
     def frob(self, ilk: Ilk, urn_address: Address, dink: Wad, dart: Wad, collateral_owner=None, dai_recipient=None):
         """Adjust amount of collateral and reserved amount of Dai for the CDP
@@ -424,19 +468,31 @@ class Vat(Contract):
         assert isinstance(dink, Wad)
         assert isinstance(dart, Wad)
 
-        urn = self.urn(ilk, address)
-        ilk = self.ilk(ilk.name)
+        # All the values are read at the same block, so the checks below are consistent with each other.
+        ((ilk_art, rate, spot, line, dust), (urn_ink, urn_art), gem, dai, debt, total_line, live) = \
+            self._stub.call_many([('ilks', [ilk.toBytes()]),
+                                  ('urns', [ilk.toBytes(), address.address]),
+                                  ('gem', [ilk.toBytes(), address.address]),
+                                  ('dai', [address.address]),
+                                  ('debt', []),
+                                  ('Line', []),
+                                  ('live', [])])
+
+        ilk = Ilk(ilk.name, rate=Ray(rate), ink=Wad(0), art=Wad(ilk_art), spot=Ray(spot), line=Rad(line),
+                  dust=Rad(dust))
+        urn = Urn(address, ilk, Wad(urn_ink), Wad(urn_art))
+        total_line = Rad(total_line)
 
         logger.debug(f"urn.ink={urn.ink}, urn.art={urn.art}, dink={dink}, dart={dart}, "
-                     f"ilk.rate={ilk.rate}, debt={str(self.debt())}")
+                     f"ilk.rate={ilk.rate}, debt={str(Rad(debt))}")
         ink = urn.ink + dink
         art = urn.art + dart
         ilk_art = ilk.art + dart
         rate = ilk.rate
 
-        gem = self.gem(ilk, urn.address) - dink
-        dai = self.dai(urn.address) + Rad(rate * dart)
-        debt = self.debt() + Rad(rate * dart)
+        gem = Wad(gem) - dink
+        dai = Rad(dai) + Rad(rate * dart)
+        debt = Rad(debt) + Rad(rate * dart)
 
         # stablecoin debt does not increase
         cool = dart <= Wad(0)
@@ -448,9 +504,9 @@ class Vat(Contract):
         under_collateral_debt_ceiling = Rad(ilk_art * rate) <= ilk.line
         if not under_collateral_debt_ceiling:
             logger.warning(f"Vault would exceed collateral debt ceiling of {ilk.line}")
-        under_total_debt_ceiling = debt < self.line()
+        under_total_debt_ceiling = debt < total_line
         if not under_total_debt_ceiling:
-            logger.warning(f"Vault would exceed total debt ceiling of {self.line()}")
+            logger.warning(f"Vault would exceed total debt ceiling of {total_line}")
         calm = under_collateral_debt_ceiling and under_total_debt_ceiling
 
         safe = (urn.art * rate) <= ink * ilk.spot
@@ -460,7 +516,7 @@ class Vat(Contract):
 
         assert Rad(ilk_art * rate) >= ilk.dust or (art == Wad(0))
         assert rate != Ray(0)
-        assert self.live()
+        assert live > 0
 
     def past_frobs(self, number_of_past_blocks: int, ilk=None) -> List[LogFrob]:
         """Synchronously retrieve a list showing which ilks and urns have been frobbed.
@@ -636,6 +692,84 @@ class Vow(Contract):
         return f"Vow('{self.address}')"
 
 
+class RateAccumulator:
+    """Snapshot of a rate accumulator (`Vat` ilk `rate` or `Pot.chi`), projected locally to any later time.
+
+    Both `Jug.drip` and `Pot.drip` multiply the accumulator by its per-second factor raised to the number
+    of seconds since the last drip (`rho`). This class repeats that calculation with the same fixed point
+    math, so the projected value is exactly what a `drip` at that time would set, without any node requests.
+
+    Attributes:
+        value: The accumulator as of the last drip.
+        factor: The per-second factor (`base + duty` for the `Jug`, `dsr` for the `Pot`).
+        rho: Unix timestamp of the last drip.
+    """
+
+    RAY = 10 ** 27
+    MAX_UINT = 2 ** 256 - 1
+
+    def __init__(self, value: Ray, factor: Ray, rho: int):
+        assert isinstance(value, Ray)
+        assert isinstance(factor, Ray)
+        assert isinstance(rho, int)
+
+        self.value = value
+        self.factor = factor
+        self.rho = rho
+
+    @staticmethod
+    def rpow(x: int, n: int) -> int:
+        """Raises a ray to an integer power, by squaring, rounding like the `rpow` of the `Jug` and the `Pot`.
+
+        Args:
+            x: The base, as a raw ray integer.
+            n: The exponent.
+
+        Returns:
+            The result, as a raw ray integer.
+        """
+        assert isinstance(x, int)
+        assert isinstance(n, int)
+
+        b = RateAccumulator.RAY
+        half = b // 2
+        if x == 0:
+            return b if n == 0 else 0
+
+        z = x if n % 2 else b
+        n //= 2
+        while n:
+            if x * x > RateAccumulator.MAX_UINT - half:
+                raise ValueError("rpow overflow")
+            x = (x * x + half) // b
+            if n % 2:
+                if z * x > RateAccumulator.MAX_UINT - half:
+                    raise ValueError("rpow overflow")
+                z = (z * x + half) // b
+            n //= 2
+
+        return z
+
+    def at(self, timestamp: int) -> Ray:
+        """Projects the accumulator to the given time.
+
+        Args:
+            timestamp: Unix timestamp, not earlier than `rho`.
+
+        Returns:
+            The value a `drip` at `timestamp` would set the accumulator to.
+        """
+        assert isinstance(timestamp, int)
+
+        if timestamp < self.rho:
+            raise ValueError(f"Cannot project to {timestamp}, which is earlier than rho={self.rho}")
+
+        return Ray(self.rpow(self.factor.value, timestamp - self.rho) * self.value.value // self.RAY)
+
+    def __repr__(self):
+        return f"RateAccumulator(value={self.value}, factor={self.factor}, rho={self.rho})"
+
+
 class Jug(Contract):
     """A client for the `Jug` contract, which manages stability fees.
 
@@ -652,6 +786,7 @@ class Jug(Contract):
         self.web3 = web3
         self.address = address
         self._contract = self._get_contract(web3, self.abi, address)
+        self._stub = self._get_stub(web3, self.abi, address)
         self.vat = Vat(web3, Address(self._contract.call().vat()))
         self.vow = Vow(web3, Address(self._contract.call().vow()))
 
@@ -683,10 +818,57 @@ class Jug(Contract):
 
         return Web3.toInt(self._contract.call().ilks(ilk.toBytes())[1])
 
+    def accumulator(self, ilk: Ilk, block_identifier='latest') -> RateAccumulator:
+        """Reads the stability fee accumulator (`rate`) of an Ilk, so it can be projected locally.
+
+        `base`, `duty` and `rho` from the `Jug` and `rate` from the `Vat` are all read at the same block.
+
+        Args:
+            ilk: Identifies the type of collateral.
+            block_identifier: Block to read the values at, the latest block by default.
+
+        Returns:
+            A :py:class:`pymaker.dss.RateAccumulator`, projecting `rate` of the Ilk.
+        """
+        assert isinstance(ilk, Ilk)
+
+        if block_identifier == 'latest':
+            block_identifier = self.web3.eth.blockNumber
+
+        (base, (duty, rho)) = self._stub.call_many([('base', []), ('ilks', [ilk.toBytes()])], block_identifier)
+        (art, rate, spot, line, dust) = self.vat._stub.call('ilks', [ilk.toBytes()], block_identifier)
+
+        return RateAccumulator(value=Ray(rate), factor=Ray(base + duty), rho=rho)
+
     def __repr__(self):
         return f"Jug('{self.address}')"
 
 
+class BiteCandidate:
+    """An unsafe Urn, which can be liquidated with `Cat.bite`.
+
+    Attributes:
+        urn: The Urn, as it was passed to `Cat.bite_candidates`.
+        ilk: The Ilk of the Urn, with the `rate` and `spot` the Urn has been screened with.
+        tab: Debt of the Urn (`art * rate`).
+        shortfall: Difference between the debt and the collateral value (`ink * spot`) of the Urn.
+    """
+
+    def __init__(self, urn: Urn, ilk: Ilk, tab: Rad, shortfall: Rad):
+        assert isinstance(urn, Urn)
+        assert isinstance(ilk, Ilk)
+        assert isinstance(tab, Rad)
+        assert isinstance(shortfall, Rad)
+
+        self.urn = urn
+        self.ilk = ilk
+        self.tab = tab
+        self.shortfall = shortfall
+
+    def __repr__(self):
+        return f"BiteCandidate({self.urn.address}, {self.ilk.name}, tab={self.tab}, shortfall={self.shortfall})"
+
+
 class Cat(Contract):
     """A client for the `Cat` contract, used to liquidate unsafe Urns (CDPs).
     Specifically, this contract is useful for Flip auctions.
@@ -738,8 +920,23 @@ class Cat(Contract):
         self.web3 = web3
         self.address = address
         self._contract = self._get_contract(web3, self.abi, address)
-        self.vat = Vat(web3, Address(self._contract.call().vat()))
-        self.vow = Vow(web3, Address(self._contract.call().vow()))
+        self._vat = None
+        self._vow = None
+
+    @property
+    def vat(self) -> Vat:
+        # Read on first use, so constructing a `Cat` costs a single node request.
+        if self._vat is None:
+            self._vat = Vat(self.web3, Address(self._contract.call().vat()))
+
+        return self._vat
+
+    @property
+    def vow(self) -> Vow:
+        if self._vow is None:
+            self._vow = Vow(self.web3, Address(self._contract.call().vow()))
+
+        return self._vow
 
     def live(self) -> bool:
         return self._contract.call().live() > 0
@@ -754,15 +951,58 @@ class Cat(Contract):
         assert isinstance(ilk, Ilk)
         assert isinstance(urn, Urn)
 
-        ilk = self.vat.ilk(ilk.name)
-        urn = self.vat.urn(ilk, urn.address)
-        rate = self.vat.ilk(ilk.name).rate
+        ilk, urn = self.vat.ilk_and_urn(ilk, urn.address)
+        rate = ilk.rate
         logger.info(f'Biting {ilk.name} CDP {urn.address.address} with ink={urn.ink} spot={ilk.spot} '
                     f'art={urn.art} rate={rate}')
 
         return Transact(self, self.web3, self.abi, self.address, self._contract,
                         'bite', [ilk.toBytes(), urn.address.address])
 
+    def bite_candidates(self, urns: Iterable[Urn], block_identifier='latest') -> List[BiteCandidate]:
+        """Screens Urns for the ones which can be bitten, fetching their Ilks at a single block.
+
+        Args:
+            urns: Urns with their `ink` and `art`, i.e. all values of the dictionaries returned by `Vat.urns()`.
+            block_identifier: Block to read the Ilks at, the latest block by default.
+
+        Returns:
+            List of :py:class:`pymaker.dss.BiteCandidate`, see `Cat.screen()`.
+        """
+        urns = list(urns)
+        ilks = self.vat.ilks(set(urn.ilk.name for urn in urns), block_identifier)
+
+        return Cat.screen(urns, ilks)
+
+    @staticmethod
+    def screen(urns: Iterable[Urn], ilks: Dict[str, Ilk]) -> List[BiteCandidate]:
+        """Screens Urns for the ones which can be bitten, without making any node requests.
+
+        An Urn can be bitten if the value of its collateral (`ink * spot`) is lower than its debt
+        (`art * rate`), which is exactly the condition `Cat.bite` checks.
+
+        Args:
+            urns: Urns with their `ink` and `art`.
+            ilks: Ilks of the Urns, with their `rate` and `spot`, indexed by name.
+
+        Returns:
+            List of :py:class:`pymaker.dss.BiteCandidate`, the ones with the highest debt first.
+        """
+        assert isinstance(ilks, dict)
+
+        # All the math is done on raw integers, only the candidates get wrapped into `Wad`/`Rad`.
+        rates = {name: (ilk.rate.value, ilk.spot.value) for name, ilk in ilks.items()}
+        unsafe = []
+        for urn in urns:
+            rate, spot = rates[urn.ilk.name]
+            tab = urn.art.value * rate
+            value = urn.ink.value * spot
+            if value < tab and spot > 0:
+                unsafe.append((tab, tab - value, urn))
+
+        unsafe.sort(key=lambda item: item[0], reverse=True)
+        return [BiteCandidate(urn, ilks[urn.ilk.name], Rad(tab), Rad(shortfall)) for tab, shortfall, urn in unsafe]
+
     def lump(self, ilk: Ilk) -> Wad:
         assert isinstance(ilk, Ilk)
 
@@ -808,6 +1048,155 @@ class Cat(Contract):
         return f"Cat('{self.address}')"
 
 
+class UrnSafetyIndex(EventIndex):
+    """Event-driven index of Urns of all Ilks, answering which of them are unsafe without re-screening all of them.
+
+    Consumes `frob`, `grab` and `fork` log notes of the `Vat` (Urn changes), as well as `fold` (rate changes,
+    emitted by `Jug.drip`), `file` (spot changes, emitted by `Spotter.poke`, and ceiling changes) and `init`
+    log notes (see :py:class:`pymaker.logging.EventIndex`). Only the Urns and Ilks touched by one of these
+    events get read again, concurrently.
+
+    Urns of each Ilk are kept sorted by their collateral to debt ratio (`ink / art`). An Urn is unsafe if this
+    ratio is lower than `rate / spot`, so the unsafe Urns of an Ilk are always a prefix of the sorted list
+    and rate or spot changes do not require any Urn to be looked at again.
+
+    Attributes:
+        vat: The `Vat` contract.
+        from_block: The first block events are consumed from, should be the block the `Vat` has been
+            deployed at (or any block before).
+        last_block: The last block the index has been updated to.
+    """
+
+    def __init__(self, vat: Vat, from_block: int = 0):
+        assert isinstance(vat, Vat)
+        super().__init__(vat.web3, vat.address, from_block)
+
+        self.vat = vat
+        self._ilks = {}
+        self._urns = defaultdict(dict)
+        self._ratios = defaultdict(list)
+        self._stale_ilks = set()
+
+        stub = ContractStub.for_abi(Vat.abi)
+        self._note_topics = {stub.function(name).selector.ljust(32, bytes(1)): name
+                             for name in ['frob', 'grab', 'fork', 'fold', 'file(bytes32,bytes32,uint256)', 'init']}
+
+    def apply(self, log: dict):
+        """Applies a single raw `frob`, `grab`, `fork`, `fold`, `file` or `init` log note.
+
+        Urns and Ilks touched by the note are only marked as stale, they get read at the end
+        of `update()`. Notes with other topics are ignored.
+
+        Args:
+            log: Raw event, as returned by `eth_getLogs`.
+        """
+        topics = log.get('topics')
+        if not topics or len(topics) < 4:
+            return
+
+        with self._lock:
+            name = self._note_topics.get(bytes(topics[0]))
+            if name is None:
+                return
+
+            ilk = Ilk.fromBytes(bytes(topics[1])).name
+            if name in ['frob', 'grab']:
+                self._stale.add((ilk, Address(bytes(topics[2])[-20:]).address))
+            elif name == 'fork':
+                self._stale.add((ilk, Address(bytes(topics[2])[-20:]).address))
+                self._stale.add((ilk, Address(bytes(topics[3])[-20:]).address))
+            else:
+                self._stale_ilks.add(ilk)
+
+    def _topics(self) -> List[bytes]:
+        return list(self._note_topics.keys())
+
+    def _refresh(self, stale: list, block_number: int):
+        # Urns of Ilks the index has never seen need their Ilk as well.
+        self._stale_ilks.update(ilk for ilk, _ in stale if ilk not in self._ilks)
+
+        stale_ilks = sorted(self._stale_ilks)
+        self._ilks.update(self.vat.ilks(stale_ilks, block_number) if stale_ilks else {})
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            urns = list(executor.map(lambda key: self.vat._stub.call('urns', [Ilk(key[0]).toBytes(), key[1]],
+                                                                     block_number), stale))
+
+        for (ilk, address), (ink, art) in zip(stale, urns):
+            self._set_urn(ilk, address, ink, art)
+
+        self._stale_ilks.clear()
+
+    def _set_urn(self, ilk: str, address: str, ink: int, art: int):
+        previous = self._urns[ilk].pop(address, None)
+        if previous is not None and previous[1] > 0:
+            ratios = self._ratios[ilk]
+            del ratios[bisect_left(ratios, (Fraction(previous[0], previous[1]), address))]
+
+        if ink > 0 or art > 0:
+            self._urns[ilk][address] = (ink, art)
+            if art > 0:
+                insort(self._ratios[ilk], (Fraction(ink, art), address))
+
+    def urns(self, ilk: Ilk) -> List[Urn]:
+        """Returns all non-empty Urns of an Ilk, as of `last_block`.
+
+        Args:
+            ilk: Identifies the type of collateral.
+
+        Returns:
+            List of :py:class:`pymaker.dss.Urn`, the lowest collateral to debt ratio first.
+            Urns without debt come last.
+        """
+        assert isinstance(ilk, Ilk)
+
+        with self._lock:
+            urns = self._urns.get(ilk.name, {})
+            ilk = self._ilks.get(ilk.name, ilk)
+
+            return [Urn(Address(address), ilk, Wad(urns[address][0]), Wad(urns[address][1]))
+                    for _, address in self._ratios.get(ilk.name, [])] + \
+                   [Urn(Address(address), ilk, Wad(ink), Wad(art))
+                    for address, (ink, art) in sorted(urns.items()) if art == 0]
+
+    def unsafe_urns(self, ilk: Optional[Ilk] = None) -> List[Urn]:
+        """Returns Urns which can be bitten, as of `last_block`.
+
+        Args:
+            ilk: Optionally only return Urns of this Ilk.
+
+        Returns:
+            List of :py:class:`pymaker.dss.Urn` with their Ilks, the lowest collateral to debt ratio first
+            within each Ilk.
+        """
+        assert isinstance(ilk, Ilk) or (ilk is None)
+
+        with self._lock:
+            result = []
+            for name in ([ilk.name] if ilk else sorted(self._ratios.keys())):
+                current = self._ilks.get(name)
+                if current is None or current.spot.value == 0:
+                    continue
+
+                # Only the prefix of Urns with `ink / art < rate / spot` gets walked.
+                ratios = self._ratios.get(name, [])
+                end = bisect_left(ratios, (Fraction(current.rate.value, current.spot.value), ''))
+                for _, address in ratios[:end]:
+                    (ink, art) = self._urns[name][address]
+                    result.append(Urn(Address(address), current, Wad(ink), Wad(art)))
+
+            return result
+
+    def bite_candidates(self) -> List[BiteCandidate]:
+        """Returns Urns which can be bitten, as of `last_block`.
+
+        Returns:
+            List of :py:class:`pymaker.dss.BiteCandidate`, see `Cat.screen()`.
+        """
+        with self._lock:
+            return Cat.screen(self.unsafe_urns(), dict(self._ilks))
+
+
 class Pot(Contract):
     """A client for the `Pot` contract, which implements the DSR.
 
@@ -824,6 +1213,7 @@ class Pot(Contract):
         self.web3 = web3
         self.address = address
         self._contract = self._get_contract(web3, self.abi, address)
+        self._stub = self._get_stub(web3, self.abi, address)
 
     def approve(self, source: Address, approval_function, **kwargs):
         """Approve the pot to access Dai from our Urns"""
@@ -852,6 +1242,22 @@ class Pot(Contract):
         rho = self._contract.call().rho()
         return datetime.fromtimestamp(rho)
 
+    def accumulator(self, block_identifier='latest') -> RateAccumulator:
+        """Reads the savings rate accumulator (`chi`), so it can be projected locally.
+
+        `chi`, `dsr` and `rho` are all read at the same block. The amount of Dai a `pie` is worth
+        at any time is `pie * accumulator.at(timestamp)`.
+
+        Args:
+            block_identifier: Block to read the values at, the latest block by default.
+
+        Returns:
+            A :py:class:`pymaker.dss.RateAccumulator`, projecting `chi`.
+        """
+        (chi, dsr, rho) = self._stub.call_many([('chi', []), ('dsr', []), ('rho', [])], block_identifier)
+
+        return RateAccumulator(value=Ray(chi), factor=Ray(dsr), rho=rho)
+
     def drip(self) -> Transact:
         return Transact(self, self.web3, self.abi, self.address, self._contract, 'drip', [])
 
@@ -18,17 +18,24 @@
 import hashlib
 import json
 import logging
+import queue
 import random
 import threading
+import time
+from concurrent.futures import Future
 from pprint import pformat
 from subprocess import Popen, PIPE
-from typing import List
+from typing import List, Optional
 
+from eth_abi import decode_abi
+from eth_utils import event_abi_to_log_topic
 from web3 import Web3
+from web3.utils.events import get_event_data
 
 from pymaker import Contract, Address, Transact
 from pymaker.numeric import Wad
 from pymaker.sign import eth_sign, to_vrs
+from pymaker.stub import ContractStub
 from pymaker.tightly_packed import encode_address, encode_uint256
 from pymaker.token import ERC20Token
 from pymaker.util import bytes_to_hexstring, hexstring_to_bytes
@@ -416,13 +423,7 @@ class EtherDelta(Contract):
         assert(buy_amount > Wad(0))
 
         nonce = self.random_nonce()
-        order_hash = hashlib.sha256(encode_address(self.address) +
-                                    encode_address(buy_token) +
-                                    encode_uint256(buy_amount.value) +
-                                    encode_address(pay_token) +
-                                    encode_uint256(pay_amount.value) +
-                                    encode_uint256(expires) +
-                                    encode_uint256(nonce)).digest()
+        order_hash = self._order_hash(buy_token, buy_amount, pay_token, pay_amount, expires, nonce)
 
         signature = eth_sign(order_hash, self.web3)
         v, r, s = to_vrs(signature)
@@ -569,6 +570,17 @@ class EtherDelta(Contract):
                          order.r if hasattr(order, 'r') else bytes(),
                          order.s if hasattr(order, 's') else bytes()])
 
+    def _order_hash(self, buy_token: Address, buy_amount: Wad, pay_token: Address, pay_amount: Wad,
+                    expires: int, nonce: int) -> bytes:
+        # same as the `hash` calculated by the contract, i.e. `sha256` of tightly packed order fields
+        return hashlib.sha256(encode_address(self.address) +
+                              encode_address(buy_token) +
+                              encode_uint256(buy_amount.value) +
+                              encode_address(pay_token) +
+                              encode_uint256(pay_amount.value) +
+                              encode_uint256(expires) +
+                              encode_uint256(nonce)).digest()
+
     @staticmethod
     def random_nonce():
         return random.randint(1, 2**32 - 1)
@@ -577,21 +589,274 @@ class EtherDelta(Contract):
         return f"EtherDelta('{self.address}')"
 
 
+class EtherDeltaState:
+    """Local, event-sourced model of EtherDelta balances and order fills.
+
+    Consumes `Trade`, `Deposit`, `Withdraw` and `Cancel` events emitted since `from_block`, fetched in
+    a single `eth_getLogs` call each time `update()` is called, and keeps per-user token balances and
+    per-order filled amounts in memory. `amount_available()` and `amount_filled()` then mirror
+    `availableVolume` and `amountFilled` of the contract without calling the Ethereum node.
+
+    A balance or a filled amount is read from the contract only once, the first time it is asked for,
+    at `last_block`, and from then on it is kept up to date by events:
+
+    * `Deposit` and `Withdraw` carry the resulting balance.
+    * `Cancel` marks the order as completely filled.
+    * `Trade` moves balances between the maker, the taker and the fee account. The event does not
+      identify the order, so its parameters are decoded from the `trade` transaction (one
+      `eth_getTransactionByHash` call per trade). If the trade has not been made by calling
+      the exchange contract directly, the cached filled amounts of all orders of this maker
+      and token pair are dropped and read again from the contract when needed.
+
+    Order signatures are not verified, only the order expiry is. Chain reorganizations are not handled.
+
+    Attributes:
+        ether_delta: The :py:class:`pymaker.etherdelta.EtherDelta` contract.
+        from_block: The first block events are consumed from.
+        last_block: The last block the model has been updated to.
+    """
+
+    logger = logging.getLogger()
+
+    def __init__(self, ether_delta: EtherDelta, from_block: int):
+        assert(isinstance(ether_delta, EtherDelta))
+        assert(isinstance(from_block, int))
+
+        self.ether_delta = ether_delta
+        self.from_block = from_block
+        self.last_block = from_block - 1
+
+        self._lock = threading.RLock()
+        self._balances = {}
+        self._fills = {}
+        self._fill_pairs = {}
+
+        self._fee_make = ether_delta.fee_make()
+        self._fee_take = ether_delta.fee_take()
+        self._fee_account = ether_delta.fee_account()
+        self._has_account_levels = \
+            ether_delta.account_levels_addr() != Address('0x0000000000000000000000000000000000000000')
+
+        self._trade_function = ContractStub.for_abi(EtherDelta.abi).function('trade')
+        self._event_abis = {}
+        for member in ether_delta.abi:
+            if member.get('type') == 'event' and member.get('name') in ['Trade', 'Deposit', 'Withdraw', 'Cancel']:
+                self._event_abis[event_abi_to_log_topic(member)] = member
+
+    def update(self, to_block: Optional[int] = None):
+        """Applies all `Trade`, `Deposit`, `Withdraw` and `Cancel` events emitted since the last update.
+
+        Args:
+            to_block: The block to update the model to. The latest block if not specified.
+        """
+        assert(isinstance(to_block, int) or (to_block is None))
+
+        if to_block is None:
+            to_block = self.ether_delta.web3.eth.blockNumber
+
+        if to_block <= self.last_block:
+            return
+
+        logs = self.ether_delta.web3.eth.getLogs({'address': self.ether_delta.address.address,
+                                                  'fromBlock': self.last_block + 1,
+                                                  'toBlock': to_block,
+                                                  'topics': [list(map(bytes_to_hexstring, self._event_abis.keys()))]})
+
+        with self._lock:
+            for log in logs:
+                self.apply(log)
+
+            self.last_block = to_block
+
+    def apply(self, log: dict):
+        """Applies a single raw `Trade`, `Deposit`, `Withdraw` or `Cancel` event.
+
+        Events with other topics are ignored.
+
+        Args:
+            log: Raw event, as returned by `eth_getLogs`.
+        """
+        topics = log.get('topics')
+        if not topics or bytes(topics[0]) not in self._event_abis:
+            return
+
+        event_abi = self._event_abis[bytes(topics[0])]
+        event_data = get_event_data(event_abi, log)
+        args = event_data['args']
+
+        with self._lock:
+            if event_abi['name'] in ['Deposit', 'Withdraw']:
+                self._balances[(Address(args['token']), Address(args['user']))] = Wad(args['balance'])
+
+            elif event_abi['name'] == 'Cancel':
+                key = (Address(args['user']), self.ether_delta._order_hash(Address(args['tokenGet']),
+                                                                           Wad(args['amountGet']),
+                                                                           Address(args['tokenGive']),
+                                                                           Wad(args['amountGive']),
+                                                                           args['expires'],
+                                                                           args['nonce']))
+                self._fills[key] = Wad(args['amountGet'])
+                self._fill_pairs[key] = (Address(args['tokenGet']), Address(args['tokenGive']))
+
+            elif event_abi['name'] == 'Trade':
+                self._apply_trade(LogTrade(event_data))
+
+    def _apply_trade(self, log_trade: LogTrade):
+        # in the `Trade` event `amountGet` is the traded amount, `amountGive` is the corresponding `tokenGive` amount
+        amount = log_trade.give_amount
+        give_amount = log_trade.take_amount
+        fee_make = Wad(amount.value * self._fee_make.value // 10**18)
+        fee_take = Wad(amount.value * self._fee_take.value // 10**18)
+
+        self._adjust_balance(log_trade.pay_token, log_trade.maker, Wad(0) - give_amount)
+        self._adjust_balance(log_trade.pay_token, log_trade.taker, give_amount)
+
+        if self._has_account_levels:
+            # rebates depend on the account level of the maker, so we let these balances be read again
+            for user in [log_trade.maker, log_trade.taker, self._fee_account]:
+                self._balances.pop((log_trade.buy_token, user), None)
+        else:
+            self._adjust_balance(log_trade.buy_token, log_trade.taker, Wad(0) - amount - fee_take)
+            self._adjust_balance(log_trade.buy_token, log_trade.maker, amount - fee_make)
+            self._adjust_balance(log_trade.buy_token, self._fee_account, fee_make + fee_take)
+
+        order_hash = self._traded_order_hash(log_trade)
+        if order_hash is not None:
+            # fills which have not been read yet will be read at a block which already includes this trade
+            key = (log_trade.maker, order_hash)
+            if key in self._fills:
+                self._fills[key] += amount
+
+        else:
+            for key, pair in list(self._fill_pairs.items()):
+                if key[0] == log_trade.maker and pair == (log_trade.buy_token, log_trade.pay_token):
+                    del self._fills[key]
+                    del self._fill_pairs[key]
+
+    def _traded_order_hash(self, log_trade: LogTrade) -> Optional[bytes]:
+        transaction = self.ether_delta.web3.eth.getTransaction(log_trade.raw['transactionHash'])
+        if transaction is None or transaction['to'] is None \
+                or Address(transaction['to']) != self.ether_delta.address:
+            return None
+
+        data = hexstring_to_bytes(transaction['input']) if isinstance(transaction['input'], str) \
+            else bytes(transaction['input'])
+        if data[0:4] != self._trade_function.selector:
+            return None
+
+        (token_get, amount_get, token_give, amount_give, expires, nonce, user, v, r, s, amount) = \
+            decode_abi(self._trade_function.input_types, data[4:])
+
+        return self.ether_delta._order_hash(Address(token_get), Wad(amount_get), Address(token_give), Wad(amount_give),
+                                            expires, nonce)
+
+    def _adjust_balance(self, token: Address, user: Address, amount: Wad):
+        # balances which have not been read yet will be read at a block which already includes this change
+        if (token, user) in self._balances:
+            self._balances[(token, user)] += amount
+
+    def balance_of_token(self, token: Address, user: Address) -> Wad:
+        """Returns the amount of token `token` deposited by the specified user.
+
+        Equivalent of `EtherDelta.balance_of_token()`, as of `last_block`.
+
+        Args:
+            token: Address of the ERC20 token, or `EtherDelta.ETH_TOKEN` for raw ETH.
+            user: Address of the user to check the balance of.
+
+        Returns:
+            The `token` balance kept in the EtherDelta contract by the specified user.
+        """
+        assert(isinstance(token, Address))
+        assert(isinstance(user, Address))
+
+        with self._lock:
+            if (token, user) not in self._balances:
+                self._balances[(token, user)] = Wad(self.ether_delta._contract.functions.balanceOf(
+                    token.address, user.address).call(block_identifier=self._block_identifier()))
+
+            return self._balances[(token, user)]
+
+    def amount_filled(self, order: Order) -> Wad:
+        """Returns the amount that has been already filled for an order.
+
+        Equivalent of `EtherDelta.amount_filled()`, as of `last_block`.
+
+        Args:
+            order: The order object you want to know the filled amount of.
+
+        Returns:
+            The amount already filled for the order, in terms of `buy_token`.
+        """
+        assert(isinstance(order, Order))
+
+        key = (order.maker, self.ether_delta._order_hash(order.buy_token, order.buy_amount,
+                                                         order.pay_token, order.pay_amount,
+                                                         order.expires, order.nonce))
+
+        with self._lock:
+            if key not in self._fills:
+                self._fills[key] = Wad(self.ether_delta._contract.functions.orderFills(
+                    order.maker.address, key[1]).call(block_identifier=self._block_identifier()))
+                self._fill_pairs[key] = (order.buy_token, order.pay_token)
+
+            return self._fills[key]
+
+    def amount_available(self, order: Order) -> Wad:
+        """Returns the amount that is still available (tradeable) for an order.
+
+        Equivalent of `EtherDelta.amount_available()`, as of `last_block`. It is the lower of the
+        unfilled amount of the order and what the balance of the maker can cover.
+
+        Args:
+            order: The order object you want to know the available amount of.
+
+        Returns:
+            The available amount for the order, in terms of `buy_token`.
+        """
+        assert(isinstance(order, Order))
+
+        if self.last_block > order.expires:
+            return Wad(0)
+
+        with self._lock:
+            available_by_fills = order.buy_amount - self.amount_filled(order)
+            available_by_balance = Wad(self.balance_of_token(order.pay_token, order.maker).value *
+                                       order.buy_amount.value // order.pay_amount.value)
+
+            return min(available_by_fills, available_by_balance)
+
+    def _block_identifier(self):
+        return self.last_block if self.last_block >= 0 else 'latest'
+
+    def __repr__(self):
+        return f"EtherDeltaState('{self.ether_delta.address}', from_block={self.from_block})"
+
+
 class EtherDeltaApi:
     """A client for the EtherDelta API backend.
 
+    Orders are published by a single long-lived `etherdelta-client` process, started on first use in
+    its `--persistent` mode. It keeps one socket connection to the API backend open and reads orders
+    from its standard input, one per line, reporting the result of each of them on its standard output.
+    If the process dies or stops responding, it gets restarted.
+
+    The `etherdelta-client` process publishes orders strictly one by one, so orders are not published
+    in parallel anymore. An order which does not get any response holds all the orders queued behind it
+    for up to `(timeout + 15) * number_of_attempts` seconds.
+
     Attributes:
         client_tool_directory: Directory containing the `etherdelta-client` tool.
         client_tool_command: Command for running the `etherdelta-client` tool.
         api_server: Base URL of the EtherDelta API backend server.
-        number_of_attempts: Number of attempts to run the `etherdelta-client` tool.
+        number_of_attempts: Number of attempts to publish each order.
         retry_interval: Interval between subsequent retries if order placement failed,
-            within one `etherdelta-client` run.
-        timeout: Timeout after which publish order is considered as failed by the
-            `etherdelta-client` tool. If number_of_attempts > 1, this tool will be
-            run several times though.
+            within one attempt.
+        timeout: Timeout after which publishing an order is considered as failed by the
+            `etherdelta-client` tool. If number_of_attempts > 1, it will be retried though.
     """
     logger = logging.getLogger()
+    queue_size = 100
 
     def __init__(self,
                  client_tool_directory: str,
@@ -614,41 +879,151 @@ class EtherDeltaApi:
         self.retry_interval = retry_interval
         self.timeout = timeout
 
-    def publish_order(self, order: Order):
-        assert(isinstance(order, Order))
-
-        def _publish_order_via_client() -> bool:
-            process = Popen(self.client_tool_command.split() + ['--url', self.api_server,
-                                                                '--timeout', str(self.timeout),
-                                                                '--retry-interval', str(self.retry_interval),
-                                                                json.dumps(order.to_json())],
-                            cwd=self.client_tool_directory, stdin=PIPE, stdout=PIPE, stderr=PIPE, shell=False)
-
-            result = process.communicate(None, timeout=self.timeout+15)
-            stdout = result[0].decode("utf-8").rstrip().replace('\n', ' -> ')
-            stderr = result[1].decode("utf-8").rstrip().replace('\n', ' -> ')
-
-            if len(stdout) > 0:
-                if process.returncode == 0:
-                    self.logger.info(f"Output from 'etherdelta-client': {stdout}")
-                else:
-                    self.logger.warning(f"Non-zero exit code output from 'etherdelta-client': {stdout}")
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._process = None
+        self._responses = None
+        self._last_request_id = 0
 
-            if len(stderr) > 0:
-                self.logger.fatal(f"Error from 'etherdelta-client': {stderr}")
+    def publish_order(self, order: Order) -> Future:
+        """Queues an order to be published to the EtherDelta API backend.
 
-            return process.returncode == 0
+        Orders get published one by one, in the order they were queued. If there are already
+        `queue_size` orders waiting to be published, this method blocks until one of them is done.
 
-        def _run():
-            for attempt in range(self.number_of_attempts):
-                self.logger.info(f"Sending order (attempt #{attempt+1}): {order}")
-                if _publish_order_via_client():
-                    self.logger.info(f"Order {order} sent successfully")
-                    return
+        Args:
+            order: The order to be published.
 
-            self.logger.warning(f"Failed to send order {order}")
+        Returns:
+            A `Future` which resolves to `True` if the order has been published successfully,
+            or to `False` if all attempts to publish it have failed.
+        """
+        assert(isinstance(order, Order))
 
-        threading.Thread(target=_run, daemon=True).start()
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+
+        future = Future()
+        self._queue.put((order, future))
+        return future
+
+    def close(self):
+        """Waits until all queued orders have been published and terminates the `etherdelta-client` process."""
+        with self._worker_lock:
+            if self._worker is not None:
+                self._queue.put((None, None))
+                self._worker.join()
+                self._worker = None
+
+    def _run(self):
+        while True:
+            order, future = self._queue.get()
+            if order is None:
+                break
+
+            try:
+                future.set_result(self._publish_order(order))
+            except Exception as e:
+                self.logger.exception(f"Failed to send order {order}")
+                future.set_exception(e)
+
+        self._stop_client()
+
+    def _publish_order(self, order: Order) -> bool:
+        for attempt in range(self.number_of_attempts):
+            self.logger.info(f"Sending order (attempt #{attempt+1}): {order}")
+            if self._publish_order_via_client(order):
+                self.logger.info(f"Order {order} sent successfully")
+                return True
+
+        self.logger.warning(f"Failed to send order {order}")
+        return False
+
+    def _publish_order_via_client(self, order: Order) -> bool:
+        self._last_request_id += 1
+        request = {'id': self._last_request_id, 'order': order.to_json()}
+
+        try:
+            if self._process is None or self._process.poll() is not None:
+                self._start_client()
+
+            self._process.stdin.write((json.dumps(request) + '\n').encode('utf-8'))
+            self._process.stdin.flush()
+        except OSError as e:
+            self.logger.fatal(f"Failed to send order to 'etherdelta-client': {e}")
+            self._stop_client()
+            return False
+
+        deadline = time.time() + self.timeout + 15
+        while True:
+            try:
+                response = self._responses.get(timeout=max(deadline - time.time(), 0))
+            except queue.Empty:
+                self.logger.fatal(f"No response from 'etherdelta-client' within {self.timeout + 15} seconds")
+                self._stop_client()
+                return False
+
+            if response is None:
+                self.logger.fatal("'etherdelta-client' exited unexpectedly")
+                self._stop_client()
+                return False
+
+            if response.get('id') == request['id']:
+                if response.get('success'):
+                    self.logger.info(f"Result from 'etherdelta-client': {response.get('message')}")
+                else:
+                    self.logger.warning(f"Failure result from 'etherdelta-client': {response.get('message')}")
+
+                return bool(response.get('success'))
+
+    def _start_client(self):
+        self._process = Popen(self.client_tool_command.split() + ['--url', self.api_server,
+                                                                  '--timeout', str(self.timeout),
+                                                                  '--retry-interval', str(self.retry_interval),
+                                                                  '--persistent'],
+                              cwd=self.client_tool_directory, stdin=PIPE, stdout=PIPE, stderr=PIPE, shell=False)
+        self._responses = queue.Queue()
+
+        threading.Thread(target=self._read_stdout, args=(self._process, self._responses), daemon=True).start()
+        threading.Thread(target=self._read_stderr, args=(self._process,), daemon=True).start()
+
+    def _stop_client(self):
+        if self._process is not None:
+            try:
+                self._process.stdin.close()
+                self._process.wait(timeout=5)
+            except Exception:
+                self._process.kill()
+                self._process.wait()
+
+            self._process = None
+
+    def _read_stdout(self, process: Popen, responses: queue.Queue):
+        for line in process.stdout:
+            line = line.decode('utf-8').rstrip()
+
+            try:
+                response = json.loads(line)
+                if isinstance(response, dict) and 'id' in response:
+                    responses.put(response)
+                    continue
+            except ValueError:
+                pass
+
+            if len(line) > 0:
+                self.logger.info(f"Output from 'etherdelta-client': {line}")
+
+        # signals the process has exited
+        responses.put(None)
+
+    def _read_stderr(self, process: Popen):
+        for line in process.stderr:
+            line = line.decode('utf-8').rstrip()
+            if len(line) > 0:
+                self.logger.fatal(f"Error from 'etherdelta-client': {line}")
 
     def __repr__(self):
         return f"EtherDeltaApi()"
@@ -19,11 +19,13 @@ import getpass
 from typing import Optional
 
 from eth_account import Account
+from eth_keys import keys
 from web3 import Web3
 from web3.middleware import construct_sign_and_send_raw_middleware
 
 from pymaker import Address
 
+# Registered accounts, each one along with its parsed private key, so signing does not have to parse it again
 _registered_accounts = {}
 
 
@@ -65,5 +67,5 @@ def register_private_key(web3: Web3, private_key):
 
     account = Account.privateKeyToAccount(private_key)
 
-    _registered_accounts[(web3, Address(account.address))] = account
+    _registered_accounts[(web3, Address(account.address))] = (account, keys.PrivateKey(account.privateKey))
     web3.middleware_stack.add(construct_sign_and_send_raw_middleware(account))
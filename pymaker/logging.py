@@ -16,10 +16,16 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import logging
+import threading
 from pprint import pformat
+from typing import List, Optional
+
 from web3 import Web3
 from web3.utils.events import get_event_data
 
+from pymaker import Address
+from pymaker.util import bytes_to_hexstring
+
 
 # Shared between DSNote and many MCD contracts
 class LogNote:
@@ -61,3 +67,74 @@ class LogNote:
 
     def __repr__(self):
         return f"LogNote({pformat(vars(self))})"
+
+
+class EventIndex:
+    """Base class of indexes kept up to date with raw events of a single contract.
+
+    Each time `update()` is called, all events with one of the `_topics()` emitted since the last update
+    are fetched in a single `eth_getLogs` call and applied one by one with `apply()`, which only marks
+    the affected entries as stale in `_stale`. Stale entries are then read again with `_refresh()`,
+    at the block the index is being updated to.
+
+    Entries last changed before `from_block` are not known to the index, so `from_block` should be the block
+    the contract has been deployed at (or any block before). Chain reorganizations are not handled.
+
+    Attributes:
+        web3: An instance of `Web` from `web3.py`.
+        address: Ethereum address of the contract the events are consumed from.
+        from_block: The first block events are consumed from.
+        last_block: The last block the index has been updated to.
+    """
+
+    max_workers = 8
+
+    def __init__(self, web3: Web3, address: Address, from_block: int = 0):
+        assert(isinstance(web3, Web3))
+        assert(isinstance(address, Address))
+        assert(isinstance(from_block, int))
+
+        self.web3 = web3
+        self.address = address
+        self.from_block = from_block
+        self.last_block = from_block - 1
+
+        self._lock = threading.RLock()
+        self._stale = set()
+
+    def update(self, to_block: Optional[int] = None):
+        """Applies all events emitted since the last update and reads the entries affected by them again.
+
+        Args:
+            to_block: The block to update the index to. The latest block if not specified.
+        """
+        assert(isinstance(to_block, int) or (to_block is None))
+
+        if to_block is None:
+            to_block = self.web3.eth.blockNumber
+
+        if to_block <= self.last_block:
+            return
+
+        logs = self.web3.eth.getLogs({'address': self.address.address,
+                                      'fromBlock': self.last_block + 1,
+                                      'toBlock': to_block,
+                                      'topics': [list(map(bytes_to_hexstring, self._topics()))]})
+
+        with self._lock:
+            for log in logs:
+                self.apply(log)
+
+            self._refresh(sorted(self._stale), to_block)
+            self._stale.clear()
+            self.last_block = to_block
+
+    def apply(self, log: dict):
+        """Applies a single raw event, as returned by `eth_getLogs`."""
+        raise NotImplementedError()
+
+    def _topics(self) -> List[bytes]:
+        raise NotImplementedError()
+
+    def _refresh(self, stale: list, block_number: int):
+        raise NotImplementedError()
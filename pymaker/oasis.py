@@ -15,9 +15,17 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import bisect
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pprint import pformat
-from typing import Optional, List, Iterable, Iterator
+from typing import Optional, List, Iterable, Iterator, Tuple
 
+from eth_utils import event_abi_to_log_topic
 from hexbytes import HexBytes
 from web3 import Web3
 from web3.utils.events import get_event_data
@@ -25,7 +33,8 @@ from web3.utils.events import get_event_data
 from pymaker import Contract, Address, Transact, Receipt
 from pymaker.numeric import Wad
 from pymaker.token import ERC20Token
-from pymaker.util import int_to_bytes32, bytes_to_int
+from pymaker.transactional import TxManager
+from pymaker.util import int_to_bytes32, bytes_to_int, bytes_to_hexstring
 from pymaker.model import Token
 
 class Order:
@@ -175,10 +184,50 @@ class LogKill:
         self.timestamp = log['args']['timestamp']
         self.raw = log
 
+    @classmethod
+    def from_receipt(cls, receipt: Receipt):
+        assert(isinstance(receipt, Receipt))
+
+        if receipt.logs is not None:
+            for log in receipt.logs:
+                if len(log['topics']) > 0 and log['topics'][0] == HexBytes('0x9577941d28fff863bfbee4694a6a4a56fb09e169619189d2eaa750b5b4819995'):
+                    log_kill_abi = [abi for abi in SimpleMarket.abi if abi.get('name') == 'LogKill'][0]
+                    event_data = get_event_data(log_kill_abi, log)
+
+                    yield LogKill(event_data)
+
     def __repr__(self):
         return pformat(vars(self))
 
 
+class BookPage:
+    """A page of orders of a single side of a token pair, as returned by `MatchingMarket.get_books()`.
+
+    Attributes:
+        pay_token: Token object (see `model.py`) of the `pay_token` of the orders.
+        buy_token: Token object (see `model.py`) of the `buy_token` of the orders.
+        orders: List of `Order` objects, sorted from the best to the worst one.
+        is_last: `True` if this is the last page of this side of the pair.
+        elapsed: Time (in seconds) elapsed since fetching of this side of the pair started.
+    """
+    def __init__(self, pay_token: Token, buy_token: Token, orders: List[Order], is_last: bool, elapsed: float):
+        assert(isinstance(pay_token, Token))
+        assert(isinstance(buy_token, Token))
+        assert(isinstance(orders, list))
+        assert(isinstance(is_last, bool))
+        assert(isinstance(elapsed, float))
+
+        self.pay_token = pay_token
+        self.buy_token = buy_token
+        self.orders = orders
+        self.is_last = is_last
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return f"BookPage({self.pay_token.name}/{self.buy_token.name}, {len(self.orders)} orders," \
+               f" is_last={self.is_last}, elapsed={self.elapsed:.3f}s)"
+
+
 class SimpleMarket(Contract):
     """A client for a `SimpleMarket` contract.
 
@@ -196,6 +245,10 @@ class SimpleMarket(Contract):
     abi = Contract._load_abi(__name__, 'abi/SimpleMarket.abi')
     bin = Contract._load_bin(__name__, 'abi/SimpleMarket.bin')
 
+    # Gas used by a single `make`, used to split `make_many` orders into transactions. Can not be estimated
+    # by the node upfront, as the `TxManager` only gets hold of the tokens during the transaction.
+    make_gas = 200000
+
     def __init__(self, web3: Web3, address: Address):
         assert(isinstance(web3, Web3))
         assert(isinstance(address, Address))
@@ -203,6 +256,7 @@ class SimpleMarket(Contract):
         self.web3 = web3
         self.address = address
         self._contract = self._get_contract(web3, self.abi, address)
+        self._stub = self._get_stub(web3, self.abi, address)
 
     @staticmethod
     def deploy(web3: Web3):
@@ -306,7 +360,7 @@ class SimpleMarket(Contract):
         Returns:
             The id of the last order. Returns `0` if no orders have been created at all.
         """
-        return self._contract.call().last_offer_id()
+        return self._stub.last_offer_id()
 
     def get_order(self, order_id: int) -> Optional[Order]:
         """Get order details.
@@ -320,7 +374,10 @@ class SimpleMarket(Contract):
         """
         assert(isinstance(order_id, int))
 
-        array = self._contract.call().offers(order_id)
+        return self._get_order_at(order_id, 'latest')
+
+    def _get_order_at(self, order_id: int, block_identifier) -> Optional[Order]:
+        array = self._stub.call('offers', [order_id], block_identifier)
         if array[5] == 0:
             return None
         else:
@@ -461,10 +518,96 @@ class SimpleMarket(Contract):
 
         return Transact(self, self.web3, self.abi, self.address, self._contract, 'kill(bytes32)', [int_to_bytes32(order_id)])
 
+    def make_many(self, tx_manager: TxManager, orders: List[tuple], gas_limit: int = 3000000) -> List[Transact]:
+        """Creates many new orders in as few transactions as the gas limit allows.
+
+        Orders get created via `tx_manager`, so they are owned by the `TxManager` contract and can be
+        cancelled with `kill_many`. Tokens the orders pay with are moved from the caller to the `TxManager`
+        for the duration of each transaction, so allowances need to be granted to the `TxManager` first
+        (see `TxManager.approve()`) and the `TxManager` has to approve this market (see `via_tx_manager`).
+
+        `receipt.result` of each transaction contains a list with the `LogMake` events of the orders
+        executed in it which made it to the order book, in the order they have been created in. Orders
+        which have been completely matched on creation emit no `LogMake` event, so the list can be shorter
+        than the chunk of `orders` executed in the transaction, and its entries can not be told apart
+        by position. Use `pay_amount` and `buy_amount` of each event to identify the orders instead.
+
+        Args:
+            tx_manager: The `TxManager` owned by the caller, to execute the orders with.
+            orders: List of tuples with the arguments of `make`, one for each order.
+            gas_limit: Maximum amount of gas each of the transactions is expected to use.
+
+        Returns:
+            A list of :py:class:`pymaker.Transact` instances, to be transacted one after another.
+        """
+        assert(isinstance(tx_manager, TxManager))
+        assert(isinstance(orders, list))
+        assert(isinstance(gas_limit, int))
+
+        invocations = [self.make(*order).invocation() for order in orders]
+        pairs = [tuple(token.address if isinstance(token, Token) else token for token in order[:4]) for order in orders]
+        tokens = list(dict.fromkeys([pair[0] for pair in pairs] + [pair[2] for pair in pairs]))
+
+        chunks = tx_manager.chunk_invocations(tokens, invocations, gas_limit, [self.make_gas] * len(orders))
+
+        return [tx_manager.execute(tokens, [invocations[index] for index in chunk],
+                                   self._make_many_result_function(tx_manager.address))
+                for chunk in chunks]
+
+    def kill_many(self, tx_manager: TxManager, order_ids: List[int], gas_limit: int = 3000000) -> List[Transact]:
+        """Cancels many existing orders in as few transactions as the gas limit allows.
+
+        Orders get cancelled via `tx_manager`, so only orders owned by the `TxManager` contract
+        (i.e. created with `make_many`) can be cancelled, unless the market has expired. Orders which
+        can not be cancelled, or do not exist anymore, are skipped. Tokens of the cancelled orders
+        are returned from the `TxManager` to the caller at the end of each transaction.
+
+        `receipt.result` of each transaction contains a list with the `LogKill` event of each order
+        cancelled in it, in the same order as `order_ids`.
+
+        Args:
+            tx_manager: The `TxManager` owned by the caller, to execute the cancellations with.
+            order_ids: Ids of the orders you want to cancel.
+            gas_limit: Maximum amount of gas each of the transactions is expected to use.
+
+        Returns:
+            A list of :py:class:`pymaker.Transact` instances, to be transacted one after another.
+        """
+        assert(isinstance(tx_manager, TxManager))
+        assert(isinstance(order_ids, list))
+        assert(isinstance(gas_limit, int))
+
+        block_number = self.web3.eth.blockNumber
+        with ThreadPoolExecutor(max_workers=TxManager.max_workers) as executor:
+            orders = list(filter(None, executor.map(lambda order_id: self._get_order_at(order_id, block_number),
+                                                    order_ids)))
+
+        invocations = [self.kill(order.order_id).invocation() for order in orders]
+        tokens = list(dict.fromkeys(order.pay_token for order in orders))
+
+        return [tx_manager.execute(tokens, [invocations[index] for index in chunk],
+                                   self._kill_many_result_function([orders[index].order_id for index in chunk]))
+                for chunk in tx_manager.chunk_invocations(tokens, invocations, gas_limit)]
+
     @staticmethod
     def _make_order_id_result_function(receipt):
         return next(map(lambda log_make: log_make.order_id, LogMake.from_receipt(receipt)), None)
 
+    @staticmethod
+    def _make_many_result_function(maker: Address):
+        def result_function(receipt) -> List[LogMake]:
+            return [log_make for log_make in LogMake.from_receipt(receipt) if log_make.maker == maker]
+
+        return result_function
+
+    @staticmethod
+    def _kill_many_result_function(order_ids: List[int]):
+        def result_function(receipt) -> List[Optional[LogKill]]:
+            log_kills = {log_kill.order_id: log_kill for log_kill in LogKill.from_receipt(receipt)}
+            return [log_kills.get(order_id) for order_id in order_ids]
+
+        return result_function
+
     def __repr__(self):
         return f"SimpleMarket('{self.address}')"
 
@@ -503,7 +646,7 @@ class ExpiringMarket(SimpleMarket):
         Returns:
             `True` if the market is closed. `False` otherwise.
         """
-        return self._contract.call().isClosed()
+        return self._stub.isClosed()
 
     def __repr__(self):
         return f"ExpiringMarket('{self.address}')"
@@ -526,6 +669,8 @@ class MatchingMarket(ExpiringMarket):
 
     abi_support = Contract._load_abi(__name__, 'abi/MakerOtcSupportMethods.abi')
 
+    make_gas = 300000
+
     def __init__(self, web3: Web3, address: Address, support_address: Optional[Address] = None):
         assert(isinstance(support_address, Address) or (support_address is None))
 
@@ -534,6 +679,11 @@ class MatchingMarket(ExpiringMarket):
         self.support_address = support_address
         self._support_contract = self._get_contract(web3, self.abi_support, self.support_address) \
             if self.support_address else None
+        self._support_stub = self._get_stub(web3, self.abi_support, self.support_address) \
+            if self.support_address else None
+
+        self._order_book = None
+        self._order_book_max_lag = 0
 
     @staticmethod
     def deploy(web3: Web3, close_time: int, support_address: Optional[Address] = None):
@@ -556,7 +706,7 @@ class MatchingMarket(ExpiringMarket):
         Returns:
             `True` if direct buy is enabled, `False` otherwise.
         """
-        return self._contract.call().buyEnabled()
+        return self._stub.buyEnabled()
 
     def set_buy_enabled(self, buy_enabled: bool) -> Transact:
         """Enables or disables direct buy.
@@ -577,7 +727,7 @@ class MatchingMarket(ExpiringMarket):
         Returns:
             `True` if order matching is enabled, `False` otherwise.
         """
-        return self._contract.call().matchingEnabled()
+        return self._stub.matchingEnabled()
 
     def set_matching_enabled(self, matching_enabled: bool) -> Transact:
         """Enables or disables order matching.
@@ -610,6 +760,28 @@ class MatchingMarket(ExpiringMarket):
         return Transact(self, self.web3, self.abi, self.address, self._contract,
                         'addTokenPairWhitelist', [base_token.address, quote_token.address])
 
+    def use_order_book(self, order_book: Optional['OasisOrderBook'], max_lag: int = 0):
+        """Makes `position()` use a local order book instead of enumerating the orders every time.
+
+        The order book has to be kept up to date by the caller (i.e. by calling `update()` on every
+        new block). If it falls more than `max_lag` blocks behind the latest block, `position()` falls
+        back to enumerating the orders on the market.
+
+        Args:
+            order_book: The :py:class:`pymaker.oasis.OasisOrderBook` tracking this market,
+                or `None` to stop using it.
+            max_lag: How many blocks the order book is allowed to fall behind the latest block.
+        """
+        assert(isinstance(order_book, OasisOrderBook) or (order_book is None))
+        assert(isinstance(max_lag, int))
+        assert(max_lag >= 0)
+
+        if order_book is not None:
+            assert(order_book.market.address == self.address)
+
+        self._order_book = order_book
+        self._order_book_max_lag = max_lag
+
     def get_orders(self, p_token: Token = None,  b_token: Token = None) -> List[Order]:
         """Get all active orders.
 
@@ -641,45 +813,124 @@ class MatchingMarket(ExpiringMarket):
             buy_token = b_token.address
 
         if pay_token is not None and buy_token is not None:
-            orders = []
+            orders = [order for page in self._get_order_pages(p_token, b_token) for order in page]
 
-            if self._support_contract:
-                result = self._support_contract.call().getOffers(self.address.address, pay_token.address, buy_token.address)
+            return sorted(orders, key=lambda order: order.order_id)
+        else:
+            return super(ExpiringMarket, self).get_orders(pay_token, buy_token)
 
-                while True:
-                    count = 0
-                    for i in range(0, 100):
-                        if result[3][i] != '0x0000000000000000000000000000000000000000':
-                            count += 1
+    def get_books(self, pairs: List[Tuple[Token, Token]], both_sides: bool = True,
+                  max_workers: int = 8) -> Iterator[BookPage]:
+        """Get active orders of many token pairs at once.
 
-                            orders.append(Order(market=self,
-                                                order_id=result[0][i],
-                                                maker=Address(result[3][i]),
-                                                pay_token=pay_token,
-                                                pay_amount=p_token.normalize_amount(Wad(result[1][i])),
-                                                buy_token=buy_token,
-                                                buy_amount=b_token.normalize_amount(Wad(result[2][i])),
-                                                timestamp=result[4][i]))
+        Order books of all pairs are fetched concurrently, each of them walking the sorted order list
+        of the market the same way `get_orders` does. Pages of orders are returned as soon as they arrive,
+        so the caller can start processing them before all order books have been fetched.
 
-                    if count == 100:
-                        next_order_id = self._contract.call().getWorseOffer(orders[-1].order_id)
-                        result = self._support_contract.call().getOffers(self.address.address, next_order_id)
+        Pages of a single side of a pair always arrive in order, pages of different pairs and sides
+        interleave. The last page of each side has `is_last` set and its `elapsed` attribute tells
+        how long it took to fetch the whole side.
 
-                    else:
-                        break
+        Args:
+            pairs: List of `(p_token, b_token)` tuples of Token objects (see `model.py`).
+            both_sides: If `True`, orders of the reverse `(b_token, p_token)` pairs will be fetched as well.
+            max_workers: Maximum number of sides fetched concurrently.
 
-            else:
-                order_id = self._contract.call().getBestOffer(pay_token.address, buy_token.address)
-                while order_id != 0:
-                    order = self.get_order(order_id)
-                    if order is not None:
-                        orders.append(order)
+        Returns:
+            An iterator of :py:class:`pymaker.oasis.BookPage` objects.
+        """
+        assert(isinstance(pairs, list))
+        assert(all(isinstance(p_token, Token) and isinstance(b_token, Token) for p_token, b_token in pairs))
+        assert(isinstance(both_sides, bool))
+        assert(isinstance(max_workers, int))
+        assert(max_workers > 0)
+
+        sides = list(pairs)
+        if both_sides:
+            sides += [(b_token, p_token) for p_token, b_token in pairs]
+
+        if len(sides) == 0:
+            return
+
+        pages = queue.Queue()
+
+        def fetch_side(p_token: Token, b_token: Token):
+            start = time.time()
+            try:
+                orders = []
+                for page in self._get_order_pages(p_token, b_token):
+                    if orders:
+                        pages.put(BookPage(p_token, b_token, orders, False, time.time() - start))
+                    orders = page
+
+                pages.put(BookPage(p_token, b_token, orders, True, time.time() - start))
+            except Exception as e:
+                pages.put(e)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for p_token, b_token in sides:
+                executor.submit(fetch_side, p_token, b_token)
+
+            remaining = len(sides)
+            while remaining > 0:
+                page = pages.get()
+                if isinstance(page, Exception):
+                    raise page
+
+                if page.is_last:
+                    remaining -= 1
+                    self.logger.debug(f"Fetched {page.pay_token.name}/{page.buy_token.name} orders"
+                                      f" in {page.elapsed:.3f}s")
+
+                yield page
+
+    def _get_order_pages(self, p_token: Token, b_token: Token) -> Iterator[List[Order]]:
+        """Walks the sorted order list of a pair, from the best order to the worst, in pages of (up to) 100."""
+        pay_token = p_token.address
+        buy_token = b_token.address
 
-                    order_id = self._contract.call().getWorseOffer(order_id)
+        if self._support_contract:
+            result = self._support_stub.call('getOffers(address,address,address)',
+                                             [self.address.address, pay_token.address, buy_token.address])
+
+            while True:
+                orders = []
+                for i in range(0, 100):
+                    if result[3][i] != '0x0000000000000000000000000000000000000000':
+                        orders.append(Order(market=self,
+                                            order_id=result[0][i],
+                                            maker=Address(result[3][i]),
+                                            pay_token=pay_token,
+                                            pay_amount=p_token.normalize_amount(Wad(result[1][i])),
+                                            buy_token=buy_token,
+                                            buy_amount=b_token.normalize_amount(Wad(result[2][i])),
+                                            timestamp=result[4][i]))
+
+                yield orders
+
+                if len(orders) == 100:
+                    next_order_id = self._stub.getWorseOffer(orders[-1].order_id)
+                    result = self._support_stub.call('getOffers(address,uint256)',
+                                                     [self.address.address, next_order_id])
+
+                else:
+                    break
 
-            return sorted(orders, key=lambda order: order.order_id)
         else:
-            return super(ExpiringMarket, self).get_orders(pay_token, buy_token)
+            orders = []
+            order_id = self._stub.getBestOffer(pay_token.address, buy_token.address)
+            while order_id != 0:
+                order = self.get_order(order_id)
+                if order is not None:
+                    orders.append(order)
+
+                    if len(orders) == 100:
+                        yield orders
+                        orders = []
+
+                order_id = self._stub.getWorseOffer(order_id)
+
+            yield orders
 
     def make(self, p_token: Token, pay_amount: Wad, b_token: Token, buy_amount: Wad, pos: int = None) -> Transact:
         """Create a new order.
@@ -735,6 +986,36 @@ class MatchingMarket(ExpiringMarket):
                         [pay_amount.value, pay_token.address, buy_amount.value, buy_token.address, pos], None,
                         self._make_order_id_result_function)
 
+    def make_many(self, tx_manager: TxManager, orders: List[tuple], gas_limit: int = 3000000) -> List[Transact]:
+        """Creates many new orders in as few transactions as the gas limit allows.
+
+        Positions of orders without `pos` are calculated upfront and concurrently, see `position()`.
+        They are calculated against the current order book, so they do not take into account
+        orders created earlier in the same batch, but `pos` is only a hint for the contract anyway.
+        See `SimpleMarket.make_many` for details.
+
+        Args:
+            tx_manager: The `TxManager` owned by the caller, to execute the orders with.
+            orders: List of `(p_token, pay_amount, b_token, buy_amount)` or
+                `(p_token, pay_amount, b_token, buy_amount, pos)` tuples, one for each order.
+            gas_limit: Maximum amount of gas each of the transactions is expected to use.
+
+        Returns:
+            A list of :py:class:`pymaker.Transact` instances, to be transacted one after another.
+        """
+        assert(isinstance(orders, list))
+
+        def with_position(order: tuple) -> tuple:
+            if len(order) > 4 and order[4] is not None:
+                return order
+
+            return tuple(order[:4]) + (self.position(*order[:4]),)
+
+        with ThreadPoolExecutor(max_workers=TxManager.max_workers) as executor:
+            orders = list(executor.map(with_position, orders))
+
+        return super().make_many(tx_manager, orders, gas_limit)
+
     def position(self, p_token: Token, pay_amount: Wad, b_token: Token, buy_amount: Wad) -> int:
         """Calculate the position (`pos`) new order should be inserted at to minimize gas costs.
 
@@ -748,7 +1029,9 @@ class MatchingMarket(ExpiringMarket):
         due to high gas usage.
 
         This method is responsible for calculating the correct insertion position. It is used internally
-        by `make` when `pos` argument is omitted (or is `None`).
+        by `make` when `pos` argument is omitted (or is `None`). If a local order book has been configured
+        with `use_order_book()` and it is up to date, the position will be looked up in it. Otherwise
+        all orders of the pair will be enumerated.
 
         Args:
             p_token: Token object (see `model.py`) of the token you want to put on sale.
@@ -767,6 +1050,14 @@ class MatchingMarket(ExpiringMarket):
         pay_token = p_token.address
         buy_token = b_token.address
 
+        if self._order_book is not None:
+            position = self._order_book.position(pay_token, pay_amount, buy_token, buy_amount,
+                                                 self.web3.eth.blockNumber - self._order_book_max_lag)
+            if position is not None:
+                return position
+
+            self.logger.debug("Local order book is stale, falling back to order enumeration")
+
         self.logger.debug("Enumerating orders for position calculation...")
 
         orders = filter(lambda order: order.pay_amount / order.buy_amount >= p_token.normalize_amount(pay_amount) / b_token.normalize_amount(buy_amount),
@@ -779,3 +1070,276 @@ class MatchingMarket(ExpiringMarket):
 
     def __repr__(self):
         return f"MatchingMarket('{self.address}')"
+
+
+class OasisOrderBook:
+    """Local, event-sourced view of all active orders on an `OasisDEX` market.
+
+    The order book gets bootstrapped once, by enumerating all orders on the market at a known block.
+    From then on it is kept up to date by applying `LogMake`, `LogTake`, `LogKill` and `LogBump` events,
+    which are fetched in a single `eth_getLogs` call each time `update()` is called (usually once per block).
+    All queries are answered from memory, without any calls to the Ethereum node.
+
+    Chain reorganizations are not handled. Call `bootstrap()` again to rebuild the order book from scratch.
+
+    Attributes:
+        market: The market this order book tracks, either :py:class:`pymaker.oasis.SimpleMarket`
+            or one of its subclasses.
+        last_block: The last block the order book has been updated to, or `None` if it hasn't
+            been bootstrapped yet.
+    """
+
+    logger = logging.getLogger()
+
+    def __init__(self, market: SimpleMarket):
+        assert(isinstance(market, SimpleMarket))
+
+        self.market = market
+        self.last_block = None
+
+        self._lock = threading.RLock()
+        self._orders = {}
+        self._orders_by_pair = defaultdict(set)
+        self._orders_by_maker = defaultdict(set)
+        self._price_levels = defaultdict(list)
+
+        self._event_abis = {}
+        for member in market.abi:
+            if member.get('type') == 'event' and member.get('name') in ['LogMake', 'LogTake', 'LogKill', 'LogBump']:
+                self._event_abis[event_abi_to_log_topic(member)] = member
+
+    def bootstrap(self, block_number: Optional[int] = None):
+        """Builds the order book from scratch by enumerating all orders on the market.
+
+        This is the expensive part, as one call per order ever created is needed. All calls are made
+        at the same block, so subsequent events can be applied on top of it.
+
+        Args:
+            block_number: The block to bootstrap the order book at. The latest block if not specified.
+        """
+        assert(isinstance(block_number, int) or (block_number is None))
+
+        if block_number is None:
+            block_number = self.market.web3.eth.blockNumber
+
+        last_order_id = self.market._stub.call('last_offer_id', [], block_number)
+        orders = [self.market._get_order_at(order_id + 1, block_number) for order_id in range(last_order_id)]
+
+        with self._lock:
+            self._orders.clear()
+            self._orders_by_pair.clear()
+            self._orders_by_maker.clear()
+            self._price_levels.clear()
+
+            for order in orders:
+                if order is not None:
+                    self._add(order)
+
+            self.last_block = block_number
+
+        self.logger.info(f"Bootstrapped order book of {self.market} at block #{block_number},"
+                         f" {len(self._orders)} active orders")
+
+    def update(self, to_block: Optional[int] = None):
+        """Applies all order events emitted since the last update.
+
+        Bootstraps the order book first if it hasn't been done yet.
+
+        Args:
+            to_block: The block to update the order book to. The latest block if not specified.
+        """
+        assert(isinstance(to_block, int) or (to_block is None))
+
+        if self.last_block is None:
+            self.bootstrap(to_block)
+            return
+
+        if to_block is None:
+            to_block = self.market.web3.eth.blockNumber
+
+        if to_block <= self.last_block:
+            return
+
+        logs = self.market.web3.eth.getLogs({'address': self.market.address.address,
+                                             'fromBlock': self.last_block + 1,
+                                             'toBlock': to_block,
+                                             'topics': [list(map(bytes_to_hexstring, self._event_abis.keys()))]})
+
+        with self._lock:
+            for log in sorted(logs, key=lambda log: (log['blockNumber'], log['logIndex'])):
+                self.apply(log)
+
+            self.last_block = to_block
+
+    def apply(self, log: dict):
+        """Applies a single raw `LogMake`, `LogTake`, `LogKill` or `LogBump` event to the order book.
+
+        Events are usually applied by `update()`, but can also be fed directly, for example from
+        a transaction receipt. Events with other topics are ignored.
+
+        Args:
+            log: Raw event, as returned by `eth_getLogs`.
+        """
+        topics = log.get('topics')
+        if not topics or bytes(topics[0]) not in self._event_abis:
+            return
+
+        event_abi = self._event_abis[bytes(topics[0])]
+        event_data = get_event_data(event_abi, log)
+
+        with self._lock:
+            if event_abi['name'] == 'LogMake':
+                log_make = LogMake(event_data)
+                self._add(Order(market=self.market, order_id=log_make.order_id, maker=log_make.maker,
+                                pay_token=log_make.pay_token, pay_amount=log_make.pay_amount,
+                                buy_token=log_make.buy_token, buy_amount=log_make.buy_amount,
+                                timestamp=log_make.timestamp))
+
+            elif event_abi['name'] == 'LogTake':
+                log_take = LogTake(event_data)
+                order = self._orders.get(log_take.order_id)
+                if order is not None:
+                    pay_amount = order.pay_amount - log_take.take_amount
+                    buy_amount = order.buy_amount - log_take.give_amount
+
+                    self._remove(order.order_id)
+                    if pay_amount > Wad(0):
+                        self._add(Order(market=self.market, order_id=order.order_id, maker=order.maker,
+                                        pay_token=order.pay_token, pay_amount=pay_amount,
+                                        buy_token=order.buy_token, buy_amount=buy_amount,
+                                        timestamp=order.timestamp))
+
+            elif event_abi['name'] == 'LogKill':
+                self._remove(LogKill(event_data).order_id)
+
+            # `LogBump` does not change the state of the order, so there is nothing to do
+
+    def get_order(self, order_id: int) -> Optional[Order]:
+        """Get order details.
+
+        Args:
+            order_id: The id of the order to get the details of.
+
+        Returns:
+            An instance of `Order` if the order is active, or `None` otherwise.
+        """
+        assert(isinstance(order_id, int))
+
+        with self._lock:
+            return self._orders.get(order_id)
+
+    def get_orders(self, pay_token: Address = None, buy_token: Address = None) -> List[Order]:
+        """Get all active orders.
+
+        If both `pay_token` and `buy_token` are specified, orders will be filtered by these.
+        Either none or both of these parameters have to be specified.
+
+        Args:
+            `pay_token`: Address of the `pay_token` to filter the orders by.
+            `buy_token`: Address of the `buy_token` to filter the orders by.
+
+        Returns:
+            A list of `Order` objects representing all active orders, sorted by order id.
+        """
+        assert((isinstance(pay_token, Address) and isinstance(buy_token, Address))
+               or (pay_token is None and buy_token is None))
+
+        with self._lock:
+            if pay_token is not None and buy_token is not None:
+                order_ids = self._orders_by_pair.get((pay_token, buy_token), set())
+            else:
+                order_ids = self._orders.keys()
+
+            return [self._orders[order_id] for order_id in sorted(order_ids)]
+
+    def get_orders_by_maker(self, maker: Address) -> List[Order]:
+        """Get all active orders created by `maker`.
+
+        Args:
+            maker: Address of the `maker` to filter the orders by.
+
+        Returns:
+            A list of `Order` objects representing all active orders belonging to this `maker`,
+            sorted by order id.
+        """
+        assert(isinstance(maker, Address))
+
+        with self._lock:
+            return [self._orders[order_id] for order_id in sorted(self._orders_by_maker.get(maker, set()))]
+
+    def position(self, pay_token: Address, pay_amount: Wad, buy_token: Address, buy_amount: Wad,
+                 min_block: Optional[int] = None) -> Optional[int]:
+        """Looks up the position (`pos`) a new order should be inserted at on a `MatchingMarket`.
+
+        Returns the id of the order with the lowest price which is still not lower than the price
+        of the new order, exactly as `MatchingMarket.position()` does, but using a binary search
+        over the price levels kept for each pair instead of enumerating the orders.
+
+        Args:
+            pay_token: Address of the token you want to put on sale.
+            pay_amount: Amount of the `pay_token` token you want to put on sale.
+            buy_token: Address of the token you want to be paid with.
+            buy_amount: Amount of the `buy_token` you want to receive.
+            min_block: If specified and the order book hasn't been updated to at least this block,
+                the order book is considered stale and `None` gets returned.
+
+        Returns:
+            The position (`pos`) new order should be inserted at, or `None` if the order book is stale.
+        """
+        assert(isinstance(pay_token, Address))
+        assert(isinstance(pay_amount, Wad))
+        assert(isinstance(buy_token, Address))
+        assert(isinstance(buy_amount, Wad))
+        assert(isinstance(min_block, int) or (min_block is None))
+        assert(buy_amount > Wad(0))
+
+        with self._lock:
+            if self.last_block is None or (min_block is not None and self.last_block < min_block):
+                return None
+
+            # price levels are sorted by `(price, order_id)`, so the first level with price not lower
+            # than ours is the cheapest such order, with ties resolved in favour of the oldest order
+            price_levels = self._price_levels.get((pay_token, buy_token), [])
+            index = bisect.bisect_left(price_levels, (self._price(pay_amount, buy_amount), 0))
+            return price_levels[index][1] if index < len(price_levels) else 0
+
+    @staticmethod
+    def _price(pay_amount: Wad, buy_amount: Wad) -> int:
+        # same as `(pay_amount / buy_amount).value`, without going through `Decimal`
+        return pay_amount.value * 10**18 // buy_amount.value
+
+    def _add(self, order: Order):
+        self._remove(order.order_id)
+
+        self._orders[order.order_id] = order
+        self._orders_by_pair[(order.pay_token, order.buy_token)].add(order.order_id)
+        self._orders_by_maker[order.maker].add(order.order_id)
+
+        if order.buy_amount > Wad(0):
+            bisect.insort(self._price_levels[(order.pay_token, order.buy_token)],
+                          (self._price(order.pay_amount, order.buy_amount), order.order_id))
+
+    def _remove(self, order_id: int):
+        order = self._orders.pop(order_id, None)
+        if order is not None:
+            self._discard(self._orders_by_pair, (order.pay_token, order.buy_token), order_id)
+            self._discard(self._orders_by_maker, order.maker, order_id)
+
+            if order.buy_amount > Wad(0):
+                price_levels = self._price_levels[(order.pay_token, order.buy_token)]
+                price_level = (self._price(order.pay_amount, order.buy_amount), order_id)
+                index = bisect.bisect_left(price_levels, price_level)
+                if index < len(price_levels) and price_levels[index] == price_level:
+                    del price_levels[index]
+
+                if len(price_levels) == 0:
+                    del self._price_levels[(order.pay_token, order.buy_token)]
+
+    @staticmethod
+    def _discard(index: dict, key, order_id: int):
+        index[key].discard(order_id)
+        if len(index[key]) == 0:
+            del index[key]
+
+    def __repr__(self):
+        return f"OasisOrderBook('{self.market.address}')"
@@ -15,11 +15,14 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from typing import Optional
+from typing import List, Optional
 
+from eth_utils import event_abi_to_log_topic
 from web3 import Web3
+from web3.utils.events import get_event_data
 
 from pymaker import Address, Contract, Transact
+from pymaker.logging import EventIndex
 from pymaker.numeric import Wad, Ray
 from pymaker.token import ERC20Token
 from pymaker.util import int_to_bytes32
@@ -80,6 +83,8 @@ class Tub(Contract):
         self.web3 = web3
         self.address = address
         self._contract = self._get_contract(web3, self.abi, address)
+        self._stub = self._get_stub(web3, self.abi, address)
+        self._vox_stub = None
 
     @staticmethod
     def deploy(web3: Web3, sai: Address, sin: Address, skr: Address, gem: Address, gov: Address, pip: Address, pep: Address, vox: Address, pit: Address):
@@ -123,7 +128,7 @@ class Tub(Contract):
         Returns:
             Timestamp as a unix timestamp.
         """
-        return self._contract.call().era()
+        return self._stub.era()
 
     def tap(self) -> Address:
         """Get the address of the `Tap` contract.
@@ -131,7 +136,7 @@ class Tub(Contract):
         Returns:
             The address of the `Tap` contract.
         """
-        return Address(self._contract.call().tap())
+        return Address(self._stub.tap())
 
     def sai(self) -> Address:
         """Get the SAI token.
@@ -139,7 +144,7 @@ class Tub(Contract):
         Returns:
             The address of the SAI token.
         """
-        return Address(self._contract.call().sai())
+        return Address(self._stub.sai())
 
     def sin(self) -> Address:
         """Get the SIN token.
@@ -147,7 +152,7 @@ class Tub(Contract):
         Returns:
             The address of the SIN token.
         """
-        return Address(self._contract.call().sin())
+        return Address(self._stub.sin())
 
     def gov(self) -> Address:
         """Get the MKR token.
@@ -155,7 +160,7 @@ class Tub(Contract):
         Returns:
             The address of the MKR token.
         """
-        return Address(self._contract.call().gov())
+        return Address(self._stub.gov())
 
     def vox(self) -> Address:
         """Get the address of the `Vox` contract.
@@ -163,7 +168,7 @@ class Tub(Contract):
         Returns:
             The address of the `Vox` contract.
         """
-        return Address(self._contract.call().vox())
+        return Address(self._stub.vox())
 
     def pit(self) -> Address:
         """Get the governance vault.
@@ -171,7 +176,7 @@ class Tub(Contract):
         Returns:
             The address of the `DSVault` holding the governance tokens awaiting burn.
         """
-        return Address(self._contract.call().pit())
+        return Address(self._stub.pit())
 
     def skr(self) -> Address:
         """Get the SKR token.
@@ -179,7 +184,7 @@ class Tub(Contract):
         Returns:
             The address of the SKR token.
         """
-        return Address(self._contract.call().skr())
+        return Address(self._stub.skr())
 
     def gem(self) -> Address:
         """Get the collateral token (eg. W-ETH).
@@ -187,7 +192,7 @@ class Tub(Contract):
         Returns:
             The address of the collateral token.
         """
-        return Address(self._contract.call().gem())
+        return Address(self._stub.gem())
 
     def pip(self) -> Address:
         """Get the reference (GEM) price feed.
@@ -195,7 +200,7 @@ class Tub(Contract):
         Returns:
             The address of the reference (GEM) price feed, which could be a `DSValue`, a `DSCache`, `Mednianizer` etc.
         """
-        return Address(self._contract.call().pip())
+        return Address(self._stub.pip())
 
     def pep(self) -> Address:
         """Get the governance (MKR) price feed.
@@ -203,7 +208,7 @@ class Tub(Contract):
         Returns:
             The address of the governance (MKR) price feed, which could be a `DSValue`, a `DSCache`, `Mednianizer` etc.
         """
-        return Address(self._contract.call().pep())
+        return Address(self._stub.pep())
 
     def axe(self) -> Ray:
         """Get the liquidation penalty.
@@ -211,7 +216,7 @@ class Tub(Contract):
         Returns:
             The liquidation penalty. `1.0` means no penalty. `1.2` means 20% penalty.
         """
-        return Ray(self._contract.call().axe())
+        return Ray(self._stub.axe())
 
     def cap(self) -> Wad:
         """Get the debt ceiling.
@@ -219,7 +224,7 @@ class Tub(Contract):
         Returns:
             The debt ceiling in SAI.
         """
-        return Wad(self._contract.call().cap())
+        return Wad(self._stub.cap())
 
     def mat(self) -> Ray:
         """Get the liquidation ratio.
@@ -227,7 +232,7 @@ class Tub(Contract):
         Returns:
             The liquidation ratio. `1.5` means the liquidation ratio is 150%.
         """
-        return Ray(self._contract.call().mat())
+        return Ray(self._stub.mat())
 
     def tax(self) -> Ray:
         """Get the stability fee.
@@ -235,7 +240,7 @@ class Tub(Contract):
         Returns:
             Per-second value of the stability fee. `1.0` means no stability fee.
         """
-        return Ray(self._contract.call().tax())
+        return Ray(self._stub.tax())
 
     def reg(self) -> int:
         """Get the Tub stage ('register').
@@ -243,7 +248,7 @@ class Tub(Contract):
         Returns:
             The current Tub stage (0=Usual, 1=Caged).
         """
-        return self._contract.call().reg()
+        return self._stub.reg()
 
     def fit(self) -> Ray:
         """Get the GEM per SKR settlement price.
@@ -251,7 +256,7 @@ class Tub(Contract):
         Returns:
             The GEM per SKR settlement (kill) price.
         """
-        return Ray(self._contract.call().fit())
+        return Ray(self._stub.fit())
 
     def rho(self) -> int:
         """Get the time of the last drip.
@@ -259,7 +264,7 @@ class Tub(Contract):
         Returns:
             The time of the last drip as a unix timestamp.
         """
-        return self._contract.call().rho()
+        return self._stub.rho()
 
     def tau(self) -> int:
         """Get the time of the last prod.
@@ -279,7 +284,7 @@ class Tub(Contract):
         Returns:
             The internal debt price in SAI.
         """
-        return Ray(self._contract.call().chi())
+        return Ray(self._stub.chi())
 
     def mold_axe(self, new_axe: Ray) -> Transact:
         """Update the liquidation penalty.
@@ -363,7 +368,7 @@ class Tub(Contract):
         Returns:
             The amount of total debt in SAI.
         """
-        return Wad(self._contract.call().din())
+        return Wad(self._stub.din())
 
     def pie(self) -> Wad:
         """Get the amount of raw collateral.
@@ -371,7 +376,7 @@ class Tub(Contract):
         Returns:
             The amount of raw collateral in GEM.
         """
-        return Wad(self._contract.call().pie())
+        return Wad(self._stub.pie())
 
     def air(self) -> Wad:
         """Get the amount of backing collateral.
@@ -379,7 +384,7 @@ class Tub(Contract):
         Returns:
             The amount of backing collateral in SKR.
         """
-        return Wad(self._contract.call().air())
+        return Wad(self._stub.air())
 
     def tag(self) -> Ray:
         """Get the reference price (REF per SKR).
@@ -390,7 +395,7 @@ class Tub(Contract):
         Returns:
             The reference price (REF per SKR).
         """
-        return Ray(self._contract.call().tag())
+        return Ray(self._stub.tag())
 
     def per(self) -> Ray:
         """Get the current average entry/exit price (GEM per SKR).
@@ -401,7 +406,7 @@ class Tub(Contract):
         Returns:
             The current GEM per SKR price.
         """
-        return Ray(self._contract.call().per())
+        return Ray(self._stub.per())
 
     def gap(self) -> Wad:
         """Get the current spread for `join` and `exit`.
@@ -409,7 +414,7 @@ class Tub(Contract):
         Returns:
             The current spread for `join` and `exit`. `1.0` means no spread, `1.01` means 1% spread.
         """
-        return Wad(self._contract.call().gap())
+        return Wad(self._stub.gap())
 
     def bid(self, amount: Wad) -> Wad:
         """Get the current `exit()`.
@@ -419,7 +424,7 @@ class Tub(Contract):
         """
         assert(isinstance(amount, Wad))
 
-        return Wad(self._contract.call().bid(amount.value))
+        return Wad(self._stub.bid(amount.value))
 
     def ask(self, amount: Wad) -> Wad:
         """Get the current `join()` price.
@@ -429,7 +434,7 @@ class Tub(Contract):
         """
         assert(isinstance(amount, Wad))
 
-        return Wad(self._contract.call().ask(amount.value))
+        return Wad(self._stub.ask(amount.value))
 
     def cupi(self) -> int:
         """Get the last cup id
@@ -437,7 +442,7 @@ class Tub(Contract):
         Returns:
             The id of the last cup created. Zero if no cups have been created so far.
         """
-        return self._contract.call().cupi()
+        return self._stub.cupi()
 
     def cups(self, cup_id: int) -> Cup:
         """Get the cup details.
@@ -449,7 +454,7 @@ class Tub(Contract):
             Class encapsulating cup details.
         """
         assert isinstance(cup_id, int)
-        array = self._contract.call().cups(int_to_bytes32(cup_id))
+        array = self._stub.cups(int_to_bytes32(cup_id))
         return Cup(cup_id, Address(array[0]), Wad(array[1]), Wad(array[2]))
 
     def tab(self, cup_id: int) -> Wad:
@@ -462,7 +467,7 @@ class Tub(Contract):
             Amount of debt in the cup, in SAI.
         """
         assert isinstance(cup_id, int)
-        return Wad(self._contract.call().tab(int_to_bytes32(cup_id)))
+        return Wad(self._stub.tab(int_to_bytes32(cup_id)))
 
     def ink(self, cup_id: int) -> Wad:
         """Get the amount of SKR collateral locked in a cup.
@@ -474,7 +479,7 @@ class Tub(Contract):
             Amount of SKR collateral locked in the cup, in SKR.
         """
         assert isinstance(cup_id, int)
-        return Wad(self._contract.call().ink(int_to_bytes32(cup_id)))
+        return Wad(self._stub.ink(int_to_bytes32(cup_id)))
 
     def lad(self, cup_id: int) -> Address:
         """Get the owner of a cup.
@@ -486,7 +491,7 @@ class Tub(Contract):
             Address of the owner of the cup.
         """
         assert isinstance(cup_id, int)
-        return Address(self._contract.call().lad(int_to_bytes32(cup_id)))
+        return Address(self._stub.lad(int_to_bytes32(cup_id)))
 
     def safe(self, cup_id: int) -> bool:
         """Determine if a cup is safe.
@@ -498,7 +503,46 @@ class Tub(Contract):
             `True` if the cup is safe. `False` otherwise.
         """
         assert isinstance(cup_id, int)
-        return self._contract.call().safe(int_to_bytes32(cup_id))
+        return self._stub.safe(int_to_bytes32(cup_id))
+
+    def cups_many(self, cup_ids: List[int], block_identifier='latest') -> List[Cup]:
+        """Get details of many cups, all of them read at the same block with concurrent requests.
+
+        Args:
+            cup_ids: Ids of the cups to get the details of.
+            block_identifier: Block to read the cups at, the latest block by default.
+
+        Returns:
+            List of classes encapsulating cup details, in the same order as `cup_ids`.
+        """
+        assert isinstance(cup_ids, list)
+        assert all(isinstance(cup_id, int) for cup_id in cup_ids)
+
+        arrays = self._stub.call_many([('cups', [int_to_bytes32(cup_id)]) for cup_id in cup_ids], block_identifier)
+        return [Cup(cup_id, Address(array[0]), Wad(array[1]), Wad(array[2])) for cup_id, array in zip(cup_ids, arrays)]
+
+    def cup_safety(self, block_identifier='latest') -> 'CupSafety':
+        """Get the values the safety of cups depends on, all of them read at the same block.
+
+        Allows to determine if many cups are safe without calling `safe()` for each of them,
+        see :py:class:`pymaker.sai.CupSafety`.
+
+        Args:
+            block_identifier: Block to read the values at, the latest block by default.
+
+        Returns:
+            A :py:class:`pymaker.sai.CupSafety` instance.
+        """
+        if block_identifier == 'latest':
+            block_identifier = self.web3.eth.blockNumber
+
+        if self._vox_stub is None:
+            self._vox_stub = self._get_stub(self.web3, Vox.abi, self.vox())
+
+        (tag, mat, chi) = self._stub.call_many([('tag', []), ('mat', []), ('chi', [])], block_identifier)
+        par = self._vox_stub.call('par', [], block_identifier)
+
+        return CupSafety(tag=Ray(tag), mat=Ray(mat), chi=Ray(chi), par=Ray(par))
 
     def join(self, amount_in_skr: Wad) -> Transact:
         """Buy SKR for GEMs.
@@ -643,6 +687,151 @@ class Tub(Contract):
         return f"Tub('{self.address}')"
 
 
+class CupSafety:
+    """Values the safety of cups depends on, read from a `Tub` at a single block.
+
+    Allows to check any number of cups without calling `Tub.safe()` for each of them.
+    The check uses the same fixed point math as the `Tub` contract, so results are identical.
+
+    Attributes:
+        tag: The reference price (REF per SKR).
+        mat: The liquidation ratio.
+        chi: The internal debt price.
+        par: The target price (REF per SAI), read from the `Vox`.
+    """
+
+    RAY = 10 ** 27
+
+    def __init__(self, tag: Ray, mat: Ray, chi: Ray, par: Ray):
+        assert(isinstance(tag, Ray))
+        assert(isinstance(mat, Ray))
+        assert(isinstance(chi, Ray))
+        assert(isinstance(par, Ray))
+
+        self.tag = tag
+        self.mat = mat
+        self.chi = chi
+        self.par = par
+
+    @staticmethod
+    def _rmul(x: int, y: int) -> int:
+        return (x * y + CupSafety.RAY // 2) // CupSafety.RAY
+
+    def tab(self, cup: Cup) -> Wad:
+        """Calculates the amount of debt in a cup, like `Tub.tab()` does.
+
+        Args:
+            cup: Cup details, as returned by `Tub.cups()`.
+
+        Returns:
+            Amount of debt in the cup, in SAI.
+        """
+        assert(isinstance(cup, Cup))
+        return Wad(self._rmul(cup.art.value, self.chi.value))
+
+    def safe(self, cup: Cup) -> bool:
+        """Determines if a cup is safe, like `Tub.safe()` does.
+
+        Args:
+            cup: Cup details, as returned by `Tub.cups()`.
+
+        Returns:
+            `True` if the cup is safe. `False` otherwise.
+        """
+        assert(isinstance(cup, Cup))
+
+        pro = self._rmul(self.tag.value, cup.ink.value)
+        con = self._rmul(self.par.value, self._rmul(cup.art.value, self.chi.value))
+        return pro >= self._rmul(con, self.mat.value)
+
+    def __repr__(self):
+        return f"CupSafety(tag={self.tag}, mat={self.mat}, chi={self.chi}, par={self.par})"
+
+
+class CupIndex(EventIndex):
+    """Event-driven index of all open cups of a `Tub`, evaluating their safety locally.
+
+    Consumes `LogNewCup` events as well as `lock`, `free`, `draw`, `wipe`, `give`, `shut` and `bite` log notes
+    (see :py:class:`pymaker.logging.EventIndex`). Only the cups touched by one of these events get read again.
+    The values cup safety depends on (see :py:class:`pymaker.sai.CupSafety`) change continuously, so they are
+    read on every update, also at the block the index is being updated to.
+
+    Attributes:
+        tub: The `Tub` contract.
+        from_block: The first block events are consumed from, should be the block the `Tub` has been
+            deployed at (or any block before).
+        last_block: The last block the index has been updated to.
+        safety: Values cup safety depends on, as of `last_block`.
+    """
+
+    def __init__(self, tub: Tub, from_block: int = 0):
+        assert(isinstance(tub, Tub))
+        super().__init__(tub.web3, tub.address, from_block)
+
+        self.tub = tub
+        self.safety = None
+        self._cups = {}
+
+        self._new_cup_abi = [member for member in tub.abi if member.get('name') == 'LogNewCup'][0]
+        self._new_cup_topic = event_abi_to_log_topic(self._new_cup_abi)
+        self._note_topics = {tub._stub.stub.function(name).selector.ljust(32, bytes(1)): name
+                             for name in ['lock', 'free', 'draw', 'wipe', 'give', 'shut', 'bite']}
+
+    def apply(self, log: dict):
+        """Applies a single raw `LogNewCup` event or `lock`, `free`, `draw`, `wipe`, `give`, `shut`
+        or `bite` log note.
+
+        Cups touched by the event are only marked as stale, their details get read at the end
+        of `update()`. Events with other topics are ignored.
+
+        Args:
+            log: Raw event, as returned by `eth_getLogs`.
+        """
+        topics = log.get('topics')
+        if not topics:
+            return
+
+        with self._lock:
+            if bytes(topics[0]) == self._new_cup_topic:
+                self._stale.add(Web3.toInt(get_event_data(self._new_cup_abi, log)['args']['cup']))
+
+            elif bytes(topics[0]) in self._note_topics and len(topics) > 2:
+                self._stale.add(Web3.toInt(bytes(topics[2])))
+
+    def _topics(self) -> List[bytes]:
+        return [self._new_cup_topic] + list(self._note_topics.keys())
+
+    def _refresh(self, stale: list, block_number: int):
+        for cup in self.tub.cups_many(stale, block_number) if stale else []:
+            if cup.lad != Address('0x0000000000000000000000000000000000000000'):
+                self._cups[cup.cup_id] = cup
+            else:
+                self._cups.pop(cup.cup_id, None)
+
+        self.safety = self.tub.cup_safety(block_number)
+
+    def cups(self) -> List[Cup]:
+        """Returns all open cups, as of `last_block`.
+
+        Returns:
+            List of :py:class:`pymaker.sai.Cup`, ordered by cup id.
+        """
+        with self._lock:
+            return [self._cups[cup_id] for cup_id in sorted(self._cups.keys())]
+
+    def unsafe_cups(self) -> List[Cup]:
+        """Returns cups which can be bitten, as of `last_block`.
+
+        Returns:
+            List of :py:class:`pymaker.sai.Cup`, ordered by cup id.
+        """
+        with self._lock:
+            if self.safety is None:
+                return []
+
+            return [cup for cup in self.cups() if not self.safety.safe(cup)]
+
+
 class Tap(Contract):
     """A client for the `Tap` contract.
 
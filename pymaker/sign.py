@@ -32,12 +32,12 @@ def eth_sign(message: bytes, web3: Web3, key=None, in_hexbytes=False, account=No
     assert(isinstance(message, bytes))
     assert(isinstance(web3, Web3))
 
-    local_account = _registered_accounts.get((web3, Address(web3.eth.defaultAccount)))
+    local_account, local_key = _registered_accounts.get((web3, Address(web3.eth.defaultAccount)), (None, None))
 
     if local_account or (account is not None):
 
         if key is None:
-            pkey = local_account.privateKey
+            pkey = local_key
         else:
             pkey = key
 
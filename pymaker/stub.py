@@ -0,0 +1,296 @@
+# This file is part of Maker Keeper Framework.
+#
+# Copyright (C) 2019 reverendus
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from eth_abi.encoding import TupleEncoder
+from eth_abi.decoding import ContextFramesBytesIO, TupleDecoder
+from eth_abi.exceptions import DecodingError
+from eth_abi.registry import registry
+from eth_utils import function_abi_to_4byte_selector
+from web3 import Web3
+from web3.exceptions import BadFunctionCallOutput
+from web3.utils.abi import map_abi_data, abi_to_signature
+from web3.utils.empty import empty
+from web3.utils.normalizers import BASE_RETURN_NORMALIZERS, abi_address_to_hex, abi_bytes_to_bytes, \
+    abi_string_to_text
+
+
+class FunctionStub:
+    """Precompiled selector, argument encoder and result decoder of a single contract function.
+
+    Allows to build calldata and to decode call results without going through the `web3.py`
+    contract machinery, which resolves the ABI entry and builds encoders on every call.
+
+    Attributes:
+        name: Name of the function.
+        signature: Canonical signature of the function, i.e. `urns(bytes32,address)`.
+        selector: 4-byte selector of the function.
+        input_types: List of argument types.
+        output_types: List of result types.
+    """
+    def __init__(self, abi: dict):
+        assert(isinstance(abi, dict))
+
+        self.name = abi['name']
+        self.signature = abi_to_signature(abi)
+        self.selector = function_abi_to_4byte_selector(abi)
+        self.input_types = [input['type'] for input in abi.get('inputs', [])]
+        self.output_types = [output['type'] for output in abi.get('outputs', [])]
+
+        self._encoder = TupleEncoder(encoders=[registry.get_encoder(type) for type in self.input_types])
+        self._decoder = TupleDecoder(decoders=[registry.get_decoder(type) for type in self.output_types])
+
+        # `web3.py` normalizes arguments (validates addresses, hex strings to bytes etc.) and results
+        # (checksummed addresses, decoded strings). We only do it for types which can actually be affected,
+        # and call the `web3.py` normalizers directly unless it's an array.
+        self._input_normalizers = [self._input_normalizer(type) for type in self.input_types]
+        self._normalize_inputs = any(normalizer is not None for normalizer in self._input_normalizers)
+        self._normalize_outputs = any('address' in type or 'string' in type for type in self.output_types)
+
+    @staticmethod
+    def _input_normalizer(type: str):
+        if 'address' not in type and 'bytes' not in type and 'string' not in type:
+            return None
+        elif '[' in type:
+            return lambda arg: map_abi_data([abi_address_to_hex, abi_bytes_to_bytes, abi_string_to_text],
+                                            [type], [arg])[0]
+        elif type == 'address':
+            return lambda arg: abi_address_to_hex(type, arg)[1]
+        elif type == 'string':
+            return lambda arg: abi_string_to_text(type, arg)[1]
+        else:
+            return lambda arg: abi_bytes_to_bytes(type, arg)[1]
+
+    def encode(self, args: list) -> bytes:
+        """Encodes the calldata (selector followed by the arguments) of this function.
+
+        Args:
+            args: Arguments of the function.
+
+        Returns:
+            Calldata as a byte array.
+        """
+        if len(args) != len(self.input_types):
+            raise TypeError(f"Function {self.signature} expects {len(self.input_types)} arguments, got {len(args)}")
+
+        if self._normalize_inputs:
+            args = [normalizer(arg) if normalizer else arg for normalizer, arg in zip(self._input_normalizers, args)]
+
+        return self.selector + self._encoder(args)
+
+    def decode(self, data: bytes):
+        """Decodes the data returned by a call of this function.
+
+        Mimics `web3.py`: if the function has only one result, it gets returned directly.
+        Otherwise a list of results is returned.
+
+        Args:
+            data: Raw data returned by `eth_call`.
+
+        Returns:
+            Decoded result(s) of the function.
+        """
+        result = self._decoder(ContextFramesBytesIO(data))
+
+        if self._normalize_outputs:
+            result = map_abi_data(BASE_RETURN_NORMALIZERS, self.output_types, result)
+
+        if len(result) == 1:
+            return result[0]
+        else:
+            return list(result)
+
+    def __repr__(self):
+        return f"FunctionStub('{self.signature}')"
+
+
+class ContractStub:
+    """Precompiled function stubs for every function of a contract ABI.
+
+    Function stubs are compiled lazily, on first use, and then reused. A single `ContractStub`
+    is shared by all contracts with the same ABI, see `ContractStub.for_abi()`.
+
+    Functions can be referenced either by name or, if overloaded, by their full signature.
+    """
+
+    _stubs = {}
+    _stubs_lock = Lock()
+
+    def __init__(self, abi: list):
+        assert(isinstance(abi, list))
+
+        self.abi = abi
+        self._functions = {}
+        self._by_name = {}
+        self._by_signature = {}
+
+        for member in abi:
+            if member.get('type') == 'function':
+                self._by_name.setdefault(member['name'], []).append(member)
+                self._by_signature[abi_to_signature(member)] = member
+
+    @staticmethod
+    def for_abi(abi: list):
+        """Returns the (cached) `ContractStub` for the given ABI.
+
+        Args:
+            abi: Contract ABI, usually the `abi` attribute of a contract class.
+
+        Returns:
+            The `ContractStub` instance for this ABI.
+        """
+        assert(isinstance(abi, list))
+
+        with ContractStub._stubs_lock:
+            # ABIs are loaded once per contract class, so their identity is a good enough key.
+            # The ABI itself is kept in the value to make sure its `id` does not get reused.
+            entry = ContractStub._stubs.get(id(abi))
+            if entry is None:
+                entry = (abi, ContractStub(abi))
+                ContractStub._stubs[id(abi)] = entry
+
+            return entry[1]
+
+    def function(self, name: str) -> FunctionStub:
+        """Returns the stub of a function.
+
+        Args:
+            name: Function name (i.e. `urns`) or signature (i.e. `urns(bytes32,address)`).
+
+        Returns:
+            The `FunctionStub` of the function.
+        """
+        assert(isinstance(name, str))
+
+        stub = self._functions.get(name)
+        if stub is None:
+            if '(' in name:
+                if name not in self._by_signature:
+                    raise ValueError(f"Function {name} not found in the ABI")
+
+                abi = self._by_signature[name]
+
+            else:
+                candidates = self._by_name.get(name, [])
+                if len(candidates) == 0:
+                    raise ValueError(f"Function {name} not found in the ABI")
+                if len(candidates) > 1:
+                    raise ValueError(f"Function {name} is overloaded, please use its signature")
+
+                abi = candidates[0]
+
+            stub = FunctionStub(abi)
+            self._functions[name] = stub
+
+        return stub
+
+    def functions(self) -> list:
+        """Returns stubs of all functions of the ABI, compiling them if necessary.
+
+        Returns:
+            List of `FunctionStub`, one for each function in the ABI.
+        """
+        return [self.function(signature) for signature in self._by_signature.keys()]
+
+    def bind(self, web3: Web3, address):
+        """Binds this stub to a deployed contract, so its functions can be called.
+
+        Args:
+            web3: An instance of `Web` from `web3.py`.
+            address: Address of the deployed contract, as :py:class:`pymaker.Address`.
+
+        Returns:
+            A `BoundContractStub` instance.
+        """
+        return BoundContractStub(self, web3, address)
+
+
+class BoundContractStub:
+    """`ContractStub` bound to a deployed contract.
+
+    Functions are exposed as attributes, so `stub.urns(ilk, urn)` is the equivalent
+    of `contract.call().urns(ilk, urn)` in `web3.py`.
+    """
+
+    max_workers = 8
+
+    def __init__(self, stub: ContractStub, web3: Web3, address):
+        assert(isinstance(stub, ContractStub))
+        assert(isinstance(web3, Web3))
+
+        self.stub = stub
+        self.web3 = web3
+        self.address = address
+
+    def call(self, name: str, args: list, block_identifier='latest'):
+        """Calls a contract function using `eth_call` and decodes the result.
+
+        Args:
+            name: Function name or signature.
+            args: Arguments of the function.
+            block_identifier: Block to execute the call at, `latest` by default.
+
+        Returns:
+            Decoded result(s) of the function.
+        """
+        function = self.stub.function(name)
+        transaction = {'to': self.address.address, 'data': function.encode(args)}
+        if self.web3.eth.defaultAccount is not empty:
+            transaction['from'] = self.web3.eth.defaultAccount
+
+        return_data = self.web3.eth.call(transaction, block_identifier)
+
+        try:
+            return function.decode(return_data)
+        except DecodingError as e:
+            raise BadFunctionCallOutput(f"Could not decode contract function call {function.signature}"
+                                        f" return data {return_data}") from e
+
+    def call_many(self, calls: list, block_identifier='latest') -> list:
+        """Calls several contract functions concurrently, all of them at the same block.
+
+        If `block_identifier` is `latest`, the current block number is fetched first,
+        so all the results come from a single, consistent state of the contract.
+
+        Args:
+            calls: List of `(name, args)` tuples, function names or signatures with their arguments.
+            block_identifier: Block to execute the calls at, `latest` by default.
+
+        Returns:
+            List of decoded result(s) of the functions, in the same order as `calls`.
+        """
+        assert(isinstance(calls, list))
+
+        if block_identifier == 'latest':
+            block_identifier = self.web3.eth.blockNumber
+
+        with ThreadPoolExecutor(max_workers=max(min(len(calls), self.max_workers), 1)) as executor:
+            return list(executor.map(lambda call: self.call(call[0], call[1], block_identifier), calls))
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def call(*args):
+            return self.call(name, list(args))
+
+        return call
+
+    def __repr__(self):
+        return f"BoundContractStub('{self.address}')"
@@ -41,6 +41,7 @@ class ERC20Token(Contract):
         self.web3 = web3
         self.address = address
         self._contract = self._get_contract(web3, self.abi, address)
+        self._stub = self._get_stub(web3, self.abi, address)
 
     def name(self) -> str:
         abi_with_string = json.loads("""[{"constant":true,"inputs":[],"name":"name","outputs":[{"name":"","type":"string"}],"payable":false,"stateMutability":"view","type":"function"}]""")
@@ -72,7 +73,7 @@ class ERC20Token(Contract):
         Returns:
             The total supply of the token.
         """
-        return Wad(self._contract.call().totalSupply())
+        return Wad(self._stub.totalSupply())
 
     def balance_of(self, address: Address) -> Wad:
         """Returns the token balance of a given address.
@@ -85,7 +86,7 @@ class ERC20Token(Contract):
         """
         assert(isinstance(address, Address))
 
-        return Wad(self._contract.call().balanceOf(address.address))
+        return Wad(self._stub.balanceOf(address.address))
 
     def allowance_of(self, address: Address, payee: Address) -> Wad:
         """Returns the current allowance of a specified `payee` (delegate account).
@@ -103,7 +104,7 @@ class ERC20Token(Contract):
         assert(isinstance(address, Address))
         assert(isinstance(payee, Address))
 
-        return Wad(self._contract.call().allowance(address.address, payee.address))
+        return Wad(self._stub.allowance(address.address, payee.address))
 
     def transfer(self, address: Address, value: Wad) -> Transact:
         """Transfers tokens to a specified address.
@@ -202,7 +203,7 @@ class DSToken(ERC20Token):
         Returns:
             The address of the current `authority`.
         """
-        return Address(self._contract.call().authority())
+        return Address(self._stub.authority())
 
     def set_authority(self, address: Address) -> Transact:
         """Set the `authority` of a `DSAuth`-ed contract.
@@ -15,9 +15,11 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import logging
 import operator
+from concurrent.futures import ThreadPoolExecutor
 from functools import reduce
-from typing import List
+from typing import List, Optional
 
 from web3 import Web3
 
@@ -49,6 +51,16 @@ class TxManager(Contract):
     abi = Contract._load_abi(__name__, 'abi/TxManager.abi')
     bin = Contract._load_bin(__name__, 'abi/TxManager.bin')
 
+    logger = logging.getLogger()
+
+    # Gas used by an `execute` transaction on top of its invocations: the intrinsic cost, the call itself
+    # and moving the balance of each token in and out. Plus the cost of dispatching each invocation.
+    execute_gas = 50000
+    token_gas = 60000
+    invocation_gas = 5000
+
+    max_workers = 8
+
     def __init__(self, web3: Web3, address: Address):
         assert(isinstance(web3, Web3))
         assert(isinstance(address, Address))
@@ -80,12 +92,13 @@ class TxManager(Contract):
     def owner(self) -> Address:
         return Address(self._contract.call().owner())
 
-    def execute(self, tokens: List[Address], invocations: List[Invocation]) -> Transact:
+    def execute(self, tokens: List[Address], invocations: List[Invocation], result_function=None) -> Transact:
         """Executes multiple contract methods in one Ethereum transaction.
 
         Args:
             tokens: List of addresses of ERC20 token the invocations should be able to access.
             invocations: A list of invocations (contract methods) to be executed.
+            result_function: Optional function building `receipt.result` from the receipt of the transaction.
 
         Returns:
             A :py:class:`pymaker.Transact` instance, which can be used to trigger the transaction.
@@ -104,8 +117,99 @@ class TxManager(Contract):
 
         assert(isinstance(tokens, list))
         assert(isinstance(invocations, list))
+        assert(callable(result_function) or (result_function is None))
+
+        return Transact(self, self.web3, self.abi, self.address, self._contract, 'execute',
+                        [token_addresses(), script()], None, result_function)
+
+    def estimate_invocations(self, invocations: List[Invocation]) -> List[Optional[int]]:
+        """Estimates gas used by each invocation when called by the `TxManager`, concurrently.
+
+        Args:
+            invocations: A list of invocations (contract methods) to be estimated.
+
+        Returns:
+            List of gas estimates, without the intrinsic transaction cost, in the same order as `invocations`.
+            `None` for invocations which would fail.
+        """
+        assert(isinstance(invocations, list))
+
+        def estimate(invocation: Invocation) -> Optional[int]:
+            try:
+                return self.web3.eth.estimateGas({'from': self.address.address,
+                                                  'to': invocation.address.address,
+                                                  'data': invocation.calldata.value}) - 21000
+            except Exception as e:
+                self.logger.warning(f"Invocation of {invocation.address} with {invocation.calldata} would fail ({e})")
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(estimate, invocations))
+
+    def chunk_invocations(self, tokens: List[Address], invocations: List[Invocation], gas_limit: int,
+                          estimates: Optional[List[Optional[int]]] = None) -> List[List[int]]:
+        """Splits invocations into chunks, each of them expected to use at most `gas_limit` when executed.
+
+        As a single failing invocation would make the whole `execute` transaction fail, invocations which
+        would fail are skipped. The remaining ones are packed, in their original order, into as few chunks
+        as possible. An invocation which does not fit into `gas_limit` on its own still gets a chunk for itself.
 
-        return Transact(self, self.web3, self.abi, self.address, self._contract, 'execute', [token_addresses(), script()])
+        Args:
+            tokens: List of addresses of ERC20 token the invocations should be able to access.
+            invocations: A list of invocations (contract methods) to be executed.
+            gas_limit: Maximum amount of gas each of the transactions is expected to use.
+            estimates: Gas estimates of the invocations, `None` for the ones which would fail. Estimated
+                with `estimate_invocations()` if not specified.
+
+        Returns:
+            A list of chunks, each of them being a list of indices of `invocations`.
+        """
+        assert(isinstance(tokens, list))
+        assert(isinstance(invocations, list))
+        assert(isinstance(gas_limit, int))
+        assert(isinstance(estimates, list) or (estimates is None))
+
+        if estimates is None:
+            estimates = self.estimate_invocations(invocations)
+
+        assert(len(estimates) == len(invocations))
+
+        chunks = []
+        chunk = []
+        chunk_gas = self.execute_gas + self.token_gas * len(tokens)
+        for index, estimate in enumerate(estimates):
+            if estimate is None:
+                continue
+
+            if chunk and chunk_gas + estimate + self.invocation_gas > gas_limit:
+                chunks.append(chunk)
+                chunk = []
+                chunk_gas = self.execute_gas + self.token_gas * len(tokens)
+
+            chunk.append(index)
+            chunk_gas += estimate + self.invocation_gas
+
+        if chunk:
+            chunks.append(chunk)
+
+        return chunks
+
+    def execute_chunked(self, tokens: List[Address], invocations: List[Invocation], gas_limit: int) -> List[Transact]:
+        """Executes multiple contract methods in as few Ethereum transactions as the gas limit allows.
+
+        Each invocation gets its gas estimated first (see `estimate_invocations()`), invocations which
+        would fail are skipped. See `chunk_invocations()` for how they are split between transactions.
+
+        Args:
+            tokens: List of addresses of ERC20 token the invocations should be able to access.
+            invocations: A list of invocations (contract methods) to be executed.
+            gas_limit: Maximum amount of gas each of the transactions is expected to use.
+
+        Returns:
+            A list of :py:class:`pymaker.Transact` instances, one for each `execute` transaction.
+        """
+        return [self.execute(tokens, [invocations[index] for index in chunk])
+                for chunk in self.chunk_invocations(tokens, invocations, gas_limit)]
 
     def __repr__(self):
         return f"TxManager('{self.address}')"
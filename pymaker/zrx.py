@@ -16,13 +16,19 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import array
+import asyncio
 import copy
 import logging
 import random
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pprint import pformat
-from typing import List, Optional
+from typing import List, Optional, Iterator
 
 import requests
+from requests.adapters import HTTPAdapter
+from eth_utils import keccak, event_abi_to_log_topic
 from hexbytes import HexBytes
 from web3 import Web3
 from web3.utils.events import get_event_data
@@ -31,7 +37,7 @@ from pymaker import Contract, Address, Transact
 from pymaker.numeric import Wad
 from pymaker.sign import eth_sign, to_vrs
 from pymaker.token import ERC20Token
-from pymaker.util import bytes_to_hexstring, hexstring_to_bytes, http_response_summary
+from pymaker.util import bytes_to_hexstring, hexstring_to_bytes, http_response_summary, synchronize
 
 
 class Order:
@@ -510,6 +516,12 @@ class ZrxExchange(Contract):
                 order.buy_token.address,
                 order.fee_recipient.address]
 
+    def _order_hash(self, order: Order) -> bytes:
+        # same as `getOrderHash` of the exchange contract, i.e. `keccak256` of tightly packed order fields
+        return keccak(hexstring_to_bytes(self.address.address) +
+                      b''.join(hexstring_to_bytes(address) for address in self._order_addresses(order)) +
+                      b''.join(value.to_bytes(32, 'big') for value in self._order_values(order)))
+
     @staticmethod
     def generate_salt() -> int:
         return random.randint(1, 2**256 - 1)
@@ -518,17 +530,167 @@ class ZrxExchange(Contract):
         return f"ZrxExchange('{self.address}')"
 
 
+class ZrxFillTracker:
+    """Local, event-sourced view of filled and cancelled amounts of 0x orders.
+
+    Consumes `LogFill` and `LogCancel` events emitted since `from_block`, fetched in a single
+    `eth_getLogs` call each time `update()` is called, and keeps the filled and cancelled amounts
+    per order hash in memory. Order hashes are calculated locally as well, so once the tracker has been
+    updated `get_unavailable_buy_amount()` does not need to call the Ethereum node at all.
+
+    The amounts are only complete for orders which have been created after `from_block`. Use
+    `ZrxExchange.get_unavailable_buy_amount()` for older orders. Chain reorganizations are not handled.
+
+    Attributes:
+        exchange: The :py:class:`pymaker.zrx.ZrxExchange` the orders are placed on.
+        from_block: The first block events are consumed from.
+        maker: If specified, only events of orders created by this maker are consumed.
+        last_block: The last block the tracker has been updated to.
+    """
+
+    logger = logging.getLogger()
+
+    def __init__(self, exchange: ZrxExchange, from_block: int, maker: Optional[Address] = None):
+        assert(isinstance(exchange, ZrxExchange))
+        assert(isinstance(from_block, int))
+        assert(isinstance(maker, Address) or (maker is None))
+
+        self.exchange = exchange
+        self.from_block = from_block
+        self.maker = maker
+        self.last_block = from_block - 1
+
+        self._lock = threading.RLock()
+        self._filled_buy_amounts = defaultdict(lambda: Wad(0))
+        self._cancelled_buy_amounts = defaultdict(lambda: Wad(0))
+
+        self._event_abis = {}
+        for member in exchange.abi:
+            if member.get('type') == 'event' and member.get('name') in ['LogFill', 'LogCancel']:
+                self._event_abis[event_abi_to_log_topic(member)] = member
+
+    def update(self, to_block: Optional[int] = None):
+        """Applies all `LogFill` and `LogCancel` events emitted since the last update.
+
+        Args:
+            to_block: The block to update the tracker to. The latest block if not specified.
+        """
+        assert(isinstance(to_block, int) or (to_block is None))
+
+        if to_block is None:
+            to_block = self.exchange.web3.eth.blockNumber
+
+        if to_block <= self.last_block:
+            return
+
+        topics = [list(map(bytes_to_hexstring, self._event_abis.keys()))]
+        if self.maker is not None:
+            topics.append('0x' + '00' * 12 + self.maker.address[2:].lower())
+
+        logs = self.exchange.web3.eth.getLogs({'address': self.exchange.address.address,
+                                               'fromBlock': self.last_block + 1,
+                                               'toBlock': to_block,
+                                               'topics': topics})
+
+        with self._lock:
+            for log in logs:
+                self.apply(log)
+
+            self.last_block = to_block
+
+    def apply(self, log: dict):
+        """Applies a single raw `LogFill` or `LogCancel` event.
+
+        Events with other topics are ignored.
+
+        Args:
+            log: Raw event, as returned by `eth_getLogs`.
+        """
+        topics = log.get('topics')
+        if not topics or bytes(topics[0]) not in self._event_abis:
+            return
+
+        event_abi = self._event_abis[bytes(topics[0])]
+        event_data = get_event_data(event_abi, log)
+
+        with self._lock:
+            if event_abi['name'] == 'LogFill':
+                log_fill = LogFill(event_data)
+                self._filled_buy_amounts[log_fill.order_hash] += log_fill.filled_buy_amount
+
+            elif event_abi['name'] == 'LogCancel':
+                log_cancel = LogCancel(event_data)
+                self._cancelled_buy_amounts[log_cancel.order_hash] += log_cancel.cancelled_buy_amount
+
+    def get_filled_buy_amount(self, order: Order) -> Wad:
+        """Return the order amount which was taken.
+
+        Args:
+            order: Order you want to get the filled amount of.
+
+        Returns:
+            The filled amount of the order, expressed in terms of the `buy_token` token.
+        """
+        assert(isinstance(order, Order))
+
+        with self._lock:
+            return self._filled_buy_amounts.get(bytes_to_hexstring(self.exchange._order_hash(order)), Wad(0))
+
+    def get_cancelled_buy_amount(self, order: Order) -> Wad:
+        """Return the order amount which was cancelled.
+
+        Args:
+            order: Order you want to get the cancelled amount of.
+
+        Returns:
+            The cancelled amount of the order, expressed in terms of the `buy_token` token.
+        """
+        assert(isinstance(order, Order))
+
+        with self._lock:
+            return self._cancelled_buy_amounts.get(bytes_to_hexstring(self.exchange._order_hash(order)), Wad(0))
+
+    def get_unavailable_buy_amount(self, order: Order) -> Wad:
+        """Return the order amount which was either taken or cancelled.
+
+        Equivalent of `ZrxExchange.get_unavailable_buy_amount()`, for orders created after `from_block`.
+
+        Args:
+            order: Order you want to get the unavailable amount of.
+
+        Returns:
+            The unavailable amount of the order (i.e. the amount which was either taken or cancelled),
+            expressed in terms of the `buy_token` token.
+        """
+        assert(isinstance(order, Order))
+        assert(order.exchange_contract_address == self.exchange.address)
+
+        order_hash = bytes_to_hexstring(self.exchange._order_hash(order))
+
+        with self._lock:
+            return self._filled_buy_amounts.get(order_hash, Wad(0)) + \
+                   self._cancelled_buy_amounts.get(order_hash, Wad(0))
+
+    def __repr__(self):
+        return f"ZrxFillTracker('{self.exchange.address}', from_block={self.from_block})"
+
+
 class ZrxRelayerApi:
     """A client for the Standard 0x Relayer API V0.
 
     <https://github.com/0xProject/standard-relayer-api>
 
+    All requests go through a single `requests` session, so connections to the relayer are kept alive
+    and reused. Bulk methods (`calculate_orders_fees()`, `submit_orders()` and their async counterparts)
+    send up to `max_workers` requests concurrently. Call `close()` once the client is not needed anymore.
+
     Attributes:
         exchange: The 0x Exchange contract.
         api_server: Base URL of the Standard Relayer API server.
     """
     logger = logging.getLogger()
     timeout = 15.5
+    max_workers = 8
 
     def __init__(self, exchange: ZrxExchange, api_server: str):
         assert(isinstance(exchange, ZrxExchange))
@@ -537,10 +699,23 @@ class ZrxRelayerApi:
         self.exchange = exchange
         self.api_server = api_server
 
+        self._session = requests.Session()
+        self._session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers))
+        self._session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+    def close(self):
+        """Shuts down the worker threads of bulk methods and closes connections to the relayer.
+
+        The client can not be used for bulk requests afterwards.
+        """
+        self._executor.shutdown(wait=True)
+        self._session.close()
+
     def get_orders(self, pay_token: Address, buy_token: Address, per_page: int = 100) -> List[Order]:
         """Returns active orders filtered by token pair (one side).
 
-        In order to get them, issues a `/v0/orders` call to the Standard Relayer API.
+        In order to get them, issues `/v0/orders` calls to the Standard Relayer API, fetching all pages.
 
         Args:
             per_page: Maximum number of orders to be downloaded per page. 0x Standard Relayer API
@@ -550,6 +725,23 @@ class ZrxRelayerApi:
         Returns:
             Orders, as a list of instances of the :py:class:`pymaker.zrx.Order` class.
         """
+        return list(self.iter_orders(pay_token, buy_token, per_page))
+
+    def iter_orders(self, pay_token: Address, buy_token: Address, per_page: int = 100) -> Iterator[Order]:
+        """Returns active orders filtered by token pair (one side), as they get downloaded.
+
+        The V0 API does not tell the total number of orders, so pages are downloaded one by one
+        until a page which isn't full is received. Orders of each page are returned as soon as
+        the page has been downloaded.
+
+        Args:
+            per_page: Maximum number of orders to be downloaded per page. 0x Standard Relayer API
+                limitation is 100, but some relayers can handle more so that's why this parameter
+                is exposed.
+
+        Returns:
+            An iterator of instances of the :py:class:`pymaker.zrx.Order` class.
+        """
         assert(isinstance(pay_token, Address))
         assert(isinstance(buy_token, Address))
 
@@ -559,16 +751,12 @@ class ZrxRelayerApi:
               f"takerTokenAddress={str(buy_token.address).lower()}&" \
               f"per_page={per_page}"
 
-        response = requests.get(url, timeout=self.timeout)
-        if not response.ok:
-            raise Exception(f"Failed to fetch 0x orders from the relayer: {http_response_summary(response)}")
-
-        return list(map(lambda item: Order.from_json(self.exchange, item), response.json()))
+        return self._iter_orders(url, per_page)
 
     def get_orders_by_maker(self, maker: Address, per_page: int = 100) -> List[Order]:
         """Returns all active orders created by `maker`.
 
-        In order to get them, issues a `/v0/orders` call to the Standard Relayer API.
+        In order to get them, issues `/v0/orders` calls to the Standard Relayer API, fetching all pages.
 
         Args:
             maker: Address of the `maker` to filter the orders by.
@@ -579,6 +767,22 @@ class ZrxRelayerApi:
         Returns:
             Active orders created by `maker`, as a list of instances of the :py:class:`pymaker.zrx.Order` class.
         """
+        return list(self.iter_orders_by_maker(maker, per_page))
+
+    def iter_orders_by_maker(self, maker: Address, per_page: int = 100) -> Iterator[Order]:
+        """Returns all active orders created by `maker`, as they get downloaded.
+
+        See `iter_orders()` for details.
+
+        Args:
+            maker: Address of the `maker` to filter the orders by.
+            per_page: Maximum number of orders to be downloaded per page. 0x Standard Relayer API
+                limitation is 100, but some relayers can handle more so that's why this parameter
+                is exposed.
+
+        Returns:
+            An iterator of instances of the :py:class:`pymaker.zrx.Order` class.
+        """
         assert(isinstance(maker, Address))
 
         url = f"{self.api_server}/v0/orders?" \
@@ -586,11 +790,26 @@ class ZrxRelayerApi:
               f"maker={str(maker.address).lower()}&" \
               f"per_page={per_page}"
 
-        response = requests.get(url, timeout=self.timeout)
-        if not response.ok:
-            raise Exception(f"Failed to fetch 0x orders from the relayer: {http_response_summary(response)}")
+        return self._iter_orders(url, per_page)
+
+    def _iter_orders(self, url: str, per_page: int) -> Iterator[Order]:
+        assert(isinstance(url, str))
+        assert(isinstance(per_page, int))
+        assert(per_page > 0)
 
-        return list(map(lambda item: Order.from_json(self.exchange, item), response.json()))
+        page = 1
+        while True:
+            response = self._session.get(f"{url}&page={page}", timeout=self.timeout)
+            if not response.ok:
+                raise Exception(f"Failed to fetch 0x orders from the relayer: {http_response_summary(response)}")
+
+            items = response.json()
+            yield from map(lambda item: Order.from_json(self.exchange, item), items)
+
+            if len(items) < per_page:
+                break
+
+            page += 1
 
     def calculate_fees(self, order: Order) -> Order:
         """Takes and order and returns the same order with proper relayer fees.
@@ -614,7 +833,8 @@ class ZrxRelayerApi:
         """
         assert(isinstance(order, Order))
 
-        response = requests.post(f"{self.api_server}/v0/fees", json=order.to_json_without_fees(), timeout=self.timeout)
+        response = self._session.post(f"{self.api_server}/v0/fees", json=order.to_json_without_fees(),
+                                      timeout=self.timeout)
         if response.status_code == 200:
             data = response.json()
 
@@ -639,7 +859,7 @@ class ZrxRelayerApi:
         """
         assert(isinstance(order, Order))
 
-        response = requests.post(f"{self.api_server}/v0/order", json=order.to_json(), timeout=self.timeout)
+        response = self._session.post(f"{self.api_server}/v0/order", json=order.to_json(), timeout=self.timeout)
         if response.status_code in [200, 201]:
             self.logger.info(f"Placed 0x order: {order}")
             return True
@@ -647,5 +867,64 @@ class ZrxRelayerApi:
             self.logger.warning(f"Failed to place 0x order: {http_response_summary(response)}")
             return False
 
+    def calculate_orders_fees(self, orders: List[Order]) -> List[Order]:
+        """Calculates relayer fees of many orders at once, see `calculate_fees()`.
+
+        Args:
+            orders: Orders which should have fees calculated.
+
+        Returns:
+            Copies of the orders with fees filled in, in the same order as `orders`.
+        """
+        return synchronize([self.calculate_orders_fees_async(orders)])[0]
+
+    async def calculate_orders_fees_async(self, orders: List[Order]) -> List[Order]:
+        """Calculates relayer fees of many orders at once, see `calculate_fees()`.
+
+        Up to `max_workers` orders are being processed concurrently.
+
+        Args:
+            orders: Orders which should have fees calculated.
+
+        Returns:
+            Copies of the orders with fees filled in, in the same order as `orders`.
+        """
+        assert(isinstance(orders, list))
+
+        return await self._run_many(self.calculate_fees, orders)
+
+    def submit_orders(self, orders: List[Order]) -> List[bool]:
+        """Submits many orders to the relayer at once, see `submit_order()`.
+
+        Args:
+            orders: Orders to be submitted.
+
+        Return:
+            List of `True` or `False` values, telling whether the submission of each order was successful,
+            in the same order as `orders`.
+        """
+        return synchronize([self.submit_orders_async(orders)])[0]
+
+    async def submit_orders_async(self, orders: List[Order]) -> List[bool]:
+        """Submits many orders to the relayer at once, see `submit_order()`.
+
+        Up to `max_workers` orders are being submitted concurrently.
+
+        Args:
+            orders: Orders to be submitted.
+
+        Return:
+            List of `True` or `False` values, telling whether the submission of each order was successful,
+            in the same order as `orders`.
+        """
+        assert(isinstance(orders, list))
+
+        return await self._run_many(self.submit_order, orders)
+
+    async def _run_many(self, function, orders: List[Order]) -> list:
+        loop = asyncio.get_event_loop()
+        return list(await asyncio.gather(*[loop.run_in_executor(self._executor, function, order)
+                                           for order in orders]))
+
     def __repr__(self):
         return f"ZrxRelayerApi()"
@@ -16,15 +16,24 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import array
+import asyncio
 import copy
+import json
 import logging
+import math
 import random
+import threading
 import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pprint import pformat
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Iterator
 
 import requests
+import websockets
+from requests.adapters import HTTPAdapter
 from eth_abi import encode_single, encode_abi, decode_single
+from eth_utils import keccak
 from hexbytes import HexBytes
 from web3 import Web3
 from web3.utils.events import get_event_data
@@ -33,7 +42,7 @@ from pymaker import Contract, Address, Transact
 from pymaker.numeric import Wad
 from pymaker.sign import eth_sign, to_vrs
 from pymaker.token import ERC20Token
-from pymaker.util import bytes_to_hexstring, hexstring_to_bytes, http_response_summary
+from pymaker.util import bytes_to_hexstring, hexstring_to_bytes, http_response_summary, synchronize
 
 
 class Asset:
@@ -291,6 +300,63 @@ class LogFill:
         return pformat(vars(self))
 
 
+class OrderInfo:
+    """Status of an order on the 0x V2 exchange, as returned by `getOrderInfo`.
+
+    Attributes:
+        status: Order status, one of the `OrderInfo.*` status constants.
+        order_hash: Order hash as a hex string starting with `0x`.
+        filled_buy_amount: The amount of the order which has already been filled,
+            expressed in terms of the `buy_token` token.
+    """
+
+    INVALID = 0
+    INVALID_MAKER_ASSET_AMOUNT = 1
+    INVALID_TAKER_ASSET_AMOUNT = 2
+    FILLABLE = 3
+    EXPIRED = 4
+    FULLY_FILLED = 5
+    CANCELLED = 6
+
+    def __init__(self, status: int, order_hash: str, filled_buy_amount: Wad):
+        assert(isinstance(status, int))
+        assert(isinstance(order_hash, str))
+        assert(isinstance(filled_buy_amount, Wad))
+
+        self.status = status
+        self.order_hash = order_hash
+        self.filled_buy_amount = filled_buy_amount
+
+    @staticmethod
+    def from_tuple(order_info: tuple):
+        return OrderInfo(status=order_info[0],
+                         order_hash=bytes_to_hexstring(order_info[1]),
+                         filled_buy_amount=Wad(order_info[2]))
+
+    def unavailable_buy_amount(self, order: Order) -> Wad:
+        """Return the order amount which was either taken or cancelled.
+
+        Args:
+            order: The order this status is of.
+
+        Returns:
+            The unavailable amount of the order, expressed in terms of the `buy_token` token.
+        """
+        assert(isinstance(order, Order))
+
+        if self.status == self.FILLABLE:
+            return self.filled_buy_amount
+        else:
+            return order.buy_amount
+
+    def __eq__(self, other):
+        assert(isinstance(other, OrderInfo))
+        return self.__dict__ == other.__dict__
+
+    def __repr__(self):
+        return f"OrderInfo({pformat(vars(self))})"
+
+
 class ZrxExchangeV2(Contract):
     """A client for the 0x V2 exchange contract.
 
@@ -309,6 +375,13 @@ class ZrxExchangeV2(Contract):
 
     ORDER_INFO_TYPE = '(address,address,address,address,uint256,uint256,uint256,uint256,uint256,uint256,bytes,bytes)'
 
+    EIP712_DOMAIN_SCHEMA_HASH = keccak(text="EIP712Domain(string name,string version,address verifyingContract)")
+    EIP712_ORDER_SCHEMA_HASH = keccak(text="Order(address makerAddress,address takerAddress,"
+                                           "address feeRecipientAddress,address senderAddress,"
+                                           "uint256 makerAssetAmount,uint256 takerAssetAmount,"
+                                           "uint256 makerFee,uint256 takerFee,uint256 expirationTimeSeconds,"
+                                           "uint256 salt,bytes makerAssetData,bytes takerAssetData)")
+
     @staticmethod
     def deploy(web3: Web3, zrx_asset: str):
         """Deploy a new instance of the 0x `Exchange` contract.
@@ -330,6 +403,12 @@ class ZrxExchangeV2(Contract):
         self.web3 = web3
         self.address = address
         self._contract = self._get_contract(web3, self.abi, address)
+        self._orders_info_block = None
+        self._orders_info_cache = {}
+        self._domain_hash = keccak(self.EIP712_DOMAIN_SCHEMA_HASH +
+                                   keccak(text="0x Protocol") +
+                                   keccak(text="2") +
+                                   bytes(12) + hexstring_to_bytes(address.address))
 
     def zrx_asset(self) -> str:
         """Get the asset data of the ZRX token contract associated with this `ExchangeV2` contract.
@@ -468,21 +547,58 @@ class ZrxExchangeV2(Contract):
 
         return response_decoded
 
-    def get_order_hash(self, order: Order) -> str:
+    def get_order_hash(self, order: Order, verify: bool = False) -> str:
         """Calculates hash of an order.
 
+        The hash is calculated locally, following the EIP712 scheme used by the exchange contract.
+        If `verify` is `True`, it is also obtained from the exchange contract using `getOrderInfo`
+        and both hashes are compared.
+
         Args:
             order: Order you want to calculate the hash of.
+            verify: Whether the hash should be verified against the exchange contract.
 
         Returns:
             Order hash as a hex string starting with `0x`.
         """
         assert(isinstance(order, Order))
+        assert(isinstance(verify, bool))
 
         # the hash depends on the exchange contract address as well
         assert(order.exchange_contract_address == self.address)
 
-        return bytes_to_hexstring(self._get_order_info(order)[0][1])
+        order_hash = bytes_to_hexstring(self._order_hash(order))
+
+        if verify:
+            contract_order_hash = bytes_to_hexstring(self._get_order_info(order)[0][1])
+            if order_hash != contract_order_hash:
+                raise Exception(f"Order hash mismatch: {order_hash} calculated locally,"
+                                f" {contract_order_hash} returned by the exchange contract")
+
+        return order_hash
+
+    def _order_hash(self, order: Order) -> bytes:
+        def address(value: Address) -> bytes:
+            return bytes(12) + hexstring_to_bytes(value.address)
+
+        def uint256(value: int) -> bytes:
+            return value.to_bytes(32, 'big')
+
+        struct_hash = keccak(self.EIP712_ORDER_SCHEMA_HASH +
+                             address(order.maker) +
+                             address(order.taker) +
+                             address(order.fee_recipient) +
+                             address(order.sender) +
+                             uint256(order.pay_amount.value) +
+                             uint256(order.buy_amount.value) +
+                             uint256(order.maker_fee.value) +
+                             uint256(order.taker_fee.value) +
+                             uint256(order.expiration) +
+                             uint256(order.salt) +
+                             keccak(hexstring_to_bytes(order.pay_asset.serialize())) +
+                             keccak(hexstring_to_bytes(order.buy_asset.serialize())))
+
+        return keccak(b"\x19\x01" + self._domain_hash + struct_hash)
 
     def get_unavailable_buy_amount(self, order: Order) -> Wad:
         """Return the order amount which was either taken or cancelled.
@@ -496,18 +612,81 @@ class ZrxExchangeV2(Contract):
         """
         assert(isinstance(order, Order))
 
-        order_info = self._get_order_info(order)[0]
+        return OrderInfo.from_tuple(self._get_order_info(order)[0]).unavailable_buy_amount(order)
 
-        if order_info[0] in [0,         # INVALID,                     // Default value
-                             1,         # INVALID_MAKER_ASSET_AMOUNT,  // Order does not have a valid maker asset amount
-                             2,         # INVALID_TAKER_ASSET_AMOUNT,  // Order does not have a valid taker asset amount
-                             4,         # EXPIRED,                     // Order has already expired
-                             5,         # FULLY_FILLED,                // Order is fully filled
-                             6]:        # CANCELLED                    // Order has been cancelled
-            return order.buy_amount
+    def get_orders_info(self, orders: List[Order], chunk_size: int = 100, cached: bool = False) -> List[OrderInfo]:
+        """Get statuses and filled amounts of many orders at once.
 
-        else:
-            return Wad(order_info[2])
+        Orders are queried using the `getOrdersInfo` method of the exchange contract, in chunks
+        of `chunk_size` orders so each call stays well below the block gas limit.
+
+        If `cached` is `True`, all calls are made at the latest block and their results are cached
+        until a new block arrives. Only orders which haven't been queried at that block yet are
+        sent to the exchange contract then.
+
+        Args:
+            orders: Orders you want to get the statuses of.
+            chunk_size: Maximum number of orders queried in a single call.
+            cached: Whether the results should be cached for the duration of the latest block.
+
+        Returns:
+            List of :py:class:`pymaker.zrxv2.OrderInfo`, in the same order as `orders`.
+        """
+        assert(isinstance(orders, list))
+        assert(all(isinstance(order, Order) for order in orders))
+        assert(isinstance(chunk_size, int))
+        assert(chunk_size > 0)
+        assert(isinstance(cached, bool))
+
+        if not cached:
+            return self._get_orders_info(orders, chunk_size, 'latest')
+
+        block_number = self.web3.eth.blockNumber
+        if block_number != self._orders_info_block:
+            self._orders_info_block = block_number
+            self._orders_info_cache = {}
+
+        order_hashes = [self.get_order_hash(order) for order in orders]
+        missing = {order_hash: order for order_hash, order in zip(order_hashes, orders)
+                   if order_hash not in self._orders_info_cache}
+
+        for order_info in self._get_orders_info(list(missing.values()), chunk_size, block_number):
+            self._orders_info_cache[order_info.order_hash] = order_info
+
+        return [self._orders_info_cache[order_hash] for order_hash in order_hashes]
+
+    def get_unavailable_buy_amounts(self, orders: List[Order], cached: bool = False) -> List[Wad]:
+        """Return the order amounts which were either taken or cancelled, for many orders at once.
+
+        Args:
+            orders: Orders you want to get the unavailable amounts of.
+            cached: Whether the order statuses should be cached for the duration of the latest block,
+                see `get_orders_info()`.
+
+        Returns:
+            The unavailable amounts of the orders, expressed in terms of their `buy_token` tokens,
+            in the same order as `orders`.
+        """
+        assert(isinstance(orders, list))
+
+        return [order_info.unavailable_buy_amount(order)
+                for order, order_info in zip(orders, self.get_orders_info(orders, cached=cached))]
+
+    def _get_orders_info(self, orders: List[Order], chunk_size: int, block_identifier) -> List[OrderInfo]:
+        method_signature = self.web3.sha3(text=f"getOrdersInfo({self.ORDER_INFO_TYPE}[])")[0:4]
+
+        result = []
+        for i in range(0, len(orders), chunk_size):
+            method_parameters = encode_single(f"({self.ORDER_INFO_TYPE}[])",
+                                              [[self._order_tuple(order) for order in orders[i:i+chunk_size]]])
+
+            request = bytes_to_hexstring(method_signature + method_parameters)
+            response = self.web3.eth.call({'to': self.address.address, 'data': request}, block_identifier)
+            response_decoded = decode_single("((uint8,bytes32,uint256)[])", response)
+
+            result += [OrderInfo.from_tuple(order_info) for order_info in response_decoded[0]]
+
+        return result
 
     def sign_order(self, order: Order) -> Order:
         """Signs an order so it can be submitted to the relayer.
@@ -602,12 +781,17 @@ class ZrxRelayerApiV2:
 
     <https://github.com/0xProject/standard-relayer-api/blob/master/http/v2.md>
 
+    All requests go through a single `requests` session, so connections to the relayer are kept alive
+    and reused. Bulk methods (`configure_orders()`, `submit_orders()` and their async counterparts) send
+    up to `max_workers` requests concurrently. Call `close()` once the client is not needed anymore.
+
     Attributes:
         exchange: The 0x Exchange V2 contract.
         api_server: Base URL of the Standard Relayer API server.
     """
     logger = logging.getLogger()
     timeout = 15.5
+    max_workers = 8
 
     def __init__(self, exchange: ZrxExchangeV2, api_server: str):
         assert(isinstance(exchange, ZrxExchangeV2))
@@ -616,7 +800,26 @@ class ZrxRelayerApiV2:
         self.exchange = exchange
         self.api_server = api_server
 
+        self._session = requests.Session()
+        self._session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers))
+        self._session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+    def close(self):
+        """Shuts down the worker threads of bulk methods and closes connections to the relayer.
+
+        The client can not be used for bulk requests afterwards.
+        """
+        self._executor.shutdown(wait=True)
+        self._session.close()
+
     def get_book(self, pay_token: Address, buy_token: Address, depth: int = 100) -> Tuple[List[Order], List[Order]]:
+        asks, bids = self._get_book_records(pay_token, buy_token, depth)
+
+        return list(map(lambda item: Order.from_json(self.exchange, item['order']), asks)), \
+               list(map(lambda item: Order.from_json(self.exchange, item['order']), bids))
+
+    def _get_book_records(self, pay_token: Address, buy_token: Address, depth: int = 100) -> Tuple[list, list]:
         assert(isinstance(pay_token, Address))
         assert(isinstance(buy_token, Address))
         assert(isinstance(depth, int))
@@ -625,19 +828,19 @@ class ZrxRelayerApiV2:
                   "quoteAssetData": ERC20Asset(buy_token).serialize(),
                   "perPage": depth}
 
-        response = requests.get(f"{self.api_server}/v2/orderbook", params, timeout=self.timeout)
+        response = self._session.get(f"{self.api_server}/v2/orderbook", params=params, timeout=self.timeout)
         if not response.ok:
             raise Exception(f"Failed to fetch 0x orderbook from the relayer: {http_response_summary(response)}")
 
         data = response.json()
 
-        return list(map(lambda item: Order.from_json(self.exchange, item['order']), data['asks']['records'])), \
-               list(map(lambda item: Order.from_json(self.exchange, item['order']), data['bids']['records']))
+        return data['asks']['records'], data['bids']['records']
 
     def get_orders(self, pay_token: Address, buy_token: Address, per_page: int = 100) -> List[Order]:
         """Returns active orders filtered by token pair (one side).
 
-        In order to get them, issues a `/v2/orders` call to the Standard Relayer API.
+        In order to get them, issues `/v2/orders` calls to the Standard Relayer API, fetching all pages.
+        See `iter_orders()` for details.
 
         Args:
             per_page: Maximum number of orders to be downloaded per page. 0x Standard Relayer API
@@ -647,29 +850,37 @@ class ZrxRelayerApiV2:
         Returns:
             Orders, as a list of instances of the :py:class:`pymaker.zrx.Order` class.
         """
+        return list(self.iter_orders(pay_token, buy_token, per_page))
+
+    def iter_orders(self, pay_token: Address, buy_token: Address, per_page: int = 100) -> Iterator[Order]:
+        """Returns active orders filtered by token pair (one side), as they get downloaded.
+
+        The first page is downloaded in order to find out the total number of orders, then all
+        remaining pages are downloaded concurrently. Orders are returned in the relayer order,
+        each page as soon as it and all pages before it have been downloaded.
+
+        Args:
+            per_page: Maximum number of orders to be downloaded per page. 0x Standard Relayer API
+                limitation is 100, but some relayers can handle more so that's why this parameter
+                is exposed.
+
+        Returns:
+            An iterator of instances of the :py:class:`pymaker.zrx.Order` class.
+        """
         assert(isinstance(pay_token, Address))
         assert(isinstance(buy_token, Address))
 
         params = { "exchangeAddress": self.exchange.address.address.lower(),
                    "makerAssetData": ERC20Asset(pay_token).serialize(),
                    "takerAssetData": ERC20Asset(buy_token).serialize(),
-                   "per_page": per_page,
                  }
 
-        response = requests.get(f"{self.api_server}/v2/orders", params=params, timeout=self.timeout)
-        if not response.ok:
-            raise Exception(f"Failed to fetch 0x orders from the relayer: {http_response_summary(response)}")
-
-        data = response.json()
-        if 'records' in data:
-            return list(map(lambda item: Order.from_json(self.exchange, item['order']), data['records']))
-        else:
-            return []
+        return self._iter_orders(params, per_page)
 
     def get_order(self, order_hash: str) -> Order:
         assert(isinstance(order_hash, str))
 
-        response = requests.get(f"{self.api_server}/v2/order/{order_hash}", timeout=self.timeout)
+        response = self._session.get(f"{self.api_server}/v2/order/{order_hash}", timeout=self.timeout)
         if not response.ok:
             raise Exception(f"Failed to 0x order from the relayer: {http_response_summary(response)}")
 
@@ -678,7 +889,8 @@ class ZrxRelayerApiV2:
     def get_orders_by_maker(self, maker: Address, per_page: int = 100) -> List[Order]:
         """Returns all active orders created by `maker`.
 
-        In order to get them, issues a `/v2/orders` call to the Standard Relayer API.
+        In order to get them, issues `/v2/orders` calls to the Standard Relayer API, fetching all pages.
+        See `iter_orders()` for details.
 
         Args:
             maker: Address of the `maker` to filter the orders by.
@@ -689,22 +901,72 @@ class ZrxRelayerApiV2:
         Returns:
             Active orders created by `maker`, as a list of instances of the :py:class:`pymaker.zrx.Order` class.
         """
+        return list(self.iter_orders_by_maker(maker, per_page))
+
+    def iter_orders_by_maker(self, maker: Address, per_page: int = 100) -> Iterator[Order]:
+        """Returns all active orders created by `maker`, as they get downloaded.
+
+        See `iter_orders()` for details.
+
+        Args:
+            maker: Address of the `maker` to filter the orders by.
+            per_page: Maximum number of orders to be downloaded per page. 0x Standard Relayer API
+                limitation is 100, but some relayers can handle more so that's why this parameter
+                is exposed.
+
+        Returns:
+            An iterator of instances of the :py:class:`pymaker.zrx.Order` class.
+        """
         assert(isinstance(maker, Address))
 
         params = { "exchangeAddress": self.exchange.address.address.lower(),
                    "makerAddress": str(maker).lower(),
-                   "per_page": per_page,
                  }
 
-        response = requests.get(f"{self.api_server}/v2/orders", params=params, timeout=self.timeout)
+        return self._iter_orders(params, per_page)
+
+    def _iter_orders(self, params: dict, per_page: int) -> Iterator[Order]:
+        assert(isinstance(params, dict))
+        assert(isinstance(per_page, int))
+        assert(per_page > 0)
+
+        def orders(data: dict) -> List[Order]:
+            return list(map(lambda item: Order.from_json(self.exchange, item['order']), data.get('records', [])))
+
+        data = self._get_orders_page(params, 1, per_page)
+        yield from orders(data)
+
+        if 'total' in data:
+            last_page = math.ceil(int(data['total']) / per_page)
+
+            futures = [self._executor.submit(self._get_orders_page, params, page, per_page)
+                       for page in range(2, last_page + 1)]
+
+            try:
+                for future in futures:
+                    yield from orders(future.result())
+
+            finally:
+                for future in futures:
+                    future.cancel()
+
+        else:
+            # the relayer doesn't tell the total number of orders, so all we can do is to fetch
+            # pages one by one until we get one which isn't full
+            page = 1
+            while len(data.get('records', [])) >= per_page:
+                page += 1
+                data = self._get_orders_page(params, page, per_page)
+                yield from orders(data)
+
+    def _get_orders_page(self, params: dict, page: int, per_page: int) -> dict:
+        response = self._session.get(f"{self.api_server}/v2/orders",
+                                     params={**params, "page": page, "perPage": per_page},
+                                     timeout=self.timeout)
         if not response.ok:
             raise Exception(f"Failed to fetch 0x orders from the relayer: {http_response_summary(response)}")
 
-        data = response.json()
-        if 'records' in data:
-            return list(map(lambda item: Order.from_json(self.exchange, item['order']), data['records']))
-        else:
-            return []
+        return response.json()
 
     def configure_order(self, order: Order) -> Order:
         """Takes a partial order and  receive information required to complete the order:
@@ -729,7 +991,8 @@ class ZrxRelayerApiV2:
         """
         assert(isinstance(order, Order))
 
-        response = requests.get(f"{self.api_server}/v2/order_config", params=order.to_json_without_fees(), timeout=self.timeout)
+        response = self._session.get(f"{self.api_server}/v2/order_config", params=order.to_json_without_fees(),
+                                     timeout=self.timeout)
         if response.status_code == 200:
             data = response.json()
             #{"senderAddress":"0xc8924d8cd9a758a4150afe7cc7030effaff1aecc","feeRecipientAddress":"0xc8924d8cd9a758a4150afe7cc7030effaff1aecc","makerFee":"0","takerFee":"0"}
@@ -756,7 +1019,7 @@ class ZrxRelayerApiV2:
         """
         assert(isinstance(order, Order))
 
-        response = requests.post(f"{self.api_server}/v2/order", json=order.to_json(), timeout=self.timeout)
+        response = self._session.post(f"{self.api_server}/v2/order", json=order.to_json(), timeout=self.timeout)
         if response.status_code in [200, 201]:
             self.logger.info(f"Placed 0x order: {order}")
             return True
@@ -764,5 +1027,240 @@ class ZrxRelayerApiV2:
             self.logger.warning(f"Failed to place 0x order: {http_response_summary(response)}")
             return False
 
+    def configure_orders(self, orders: List[Order]) -> List[Order]:
+        """Configures many orders at once, see `configure_order()`.
+
+        Args:
+            orders: Orders which should be configured.
+
+        Returns:
+            Configured copies of the orders, in the same order as `orders`.
+        """
+        return synchronize([self.configure_orders_async(orders)])[0]
+
+    async def configure_orders_async(self, orders: List[Order]) -> List[Order]:
+        """Configures many orders at once, see `configure_order()`.
+
+        Up to `max_workers` orders are being configured concurrently.
+
+        Args:
+            orders: Orders which should be configured.
+
+        Returns:
+            Configured copies of the orders, in the same order as `orders`.
+        """
+        assert(isinstance(orders, list))
+
+        return await self._run_many(self.configure_order, orders)
+
+    def submit_orders(self, orders: List[Order]) -> List[bool]:
+        """Submits many orders to the relayer at once, see `submit_order()`.
+
+        Args:
+            orders: Orders to be submitted.
+
+        Return:
+            List of `True` or `False` values, telling whether the submission of each order was successful,
+            in the same order as `orders`.
+        """
+        return synchronize([self.submit_orders_async(orders)])[0]
+
+    async def submit_orders_async(self, orders: List[Order]) -> List[bool]:
+        """Submits many orders to the relayer at once, see `submit_order()`.
+
+        Up to `max_workers` orders are being submitted concurrently.
+
+        Args:
+            orders: Orders to be submitted.
+
+        Return:
+            List of `True` or `False` values, telling whether the submission of each order was successful,
+            in the same order as `orders`.
+        """
+        assert(isinstance(orders, list))
+
+        return await self._run_many(self.submit_order, orders)
+
+    async def _run_many(self, function, orders: List[Order]) -> list:
+        loop = asyncio.get_event_loop()
+        return list(await asyncio.gather(*[loop.run_in_executor(self._executor, function, order)
+                                           for order in orders]))
+
     def __repr__(self):
         return f"ZrxRelayerApiV2()"
+
+
+class ZrxRelayerWebSocketApiV2:
+    """A client for the `orders` channel of the Standard 0x Relayer API V2 WebSocket endpoint.
+
+    <https://github.com/0xProject/standard-relayer-api/blob/master/ws/v2.md>
+
+    Keeps a local mirror of the relayer order book of a single token pair, so `get_book()` is
+    answered from memory instead of polling `/v2/orderbook`. Orders are added or updated by their
+    order hash when they appear in an `update` message, and removed when their remaining fillable
+    amount (`remainingTakerAssetAmount` in the order metadata) drops to zero.
+
+    The WebSocket protocol does not provide an order book snapshot on subscription. If `relayer_api`
+    is specified, the mirror gets seeded with the `/v2/orderbook` of the relayer every time the connection
+    gets (re)established. Seeded orders are filtered and keyed the same way as orders from `update` messages.
+
+    The connection is maintained by a background thread, see `start()` and `stop()`.
+
+    Attributes:
+        exchange: The 0x Exchange V2 contract.
+        ws_server: URL of the Standard Relayer API WebSocket endpoint.
+        pay_token: Address of the base token of the pair.
+        buy_token: Address of the quote token of the pair.
+        relayer_api: Optional HTTP client used to seed the order book mirror.
+    """
+
+    logger = logging.getLogger()
+    reconnect_delay = 5.0
+
+    def __init__(self, exchange: ZrxExchangeV2, ws_server: str, pay_token: Address, buy_token: Address,
+                 relayer_api: Optional[ZrxRelayerApiV2] = None):
+        assert(isinstance(exchange, ZrxExchangeV2))
+        assert(isinstance(ws_server, str))
+        assert(isinstance(pay_token, Address))
+        assert(isinstance(buy_token, Address))
+        assert(isinstance(relayer_api, ZrxRelayerApiV2) or (relayer_api is None))
+
+        self.exchange = exchange
+        self.ws_server = ws_server
+        self.pay_token = pay_token
+        self.buy_token = buy_token
+        self.relayer_api = relayer_api
+
+        self._pay_asset_data = ERC20Asset(pay_token).serialize()
+        self._buy_asset_data = ERC20Asset(buy_token).serialize()
+        self._orders = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._loop = None
+        self._task = None
+        self._thread = None
+
+    def start(self):
+        """Starts the background thread maintaining the WebSocket connection."""
+        assert(self._thread is None)
+
+        self._loop = asyncio.new_event_loop()
+        self._task = self._loop.create_task(self._listen())
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Closes the WebSocket connection and stops the background thread."""
+        if self._thread is not None:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+            self._thread.join()
+            self._thread = None
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Waits until the connection has been established and the order book mirror has been seeded.
+
+        Args:
+            timeout: Maximum time to wait (in seconds), or `None` to wait indefinitely.
+
+        Returns:
+            `True` if the order book mirror is ready, `False` if the timeout has passed.
+        """
+        return self._ready.wait(timeout)
+
+    def get_book(self) -> Tuple[List[Order], List[Order]]:
+        """Returns the current state of the order book mirror.
+
+        Returns:
+            A tuple of asks (orders selling `pay_token` for `buy_token`), sorted from the lowest price,
+            and bids (orders selling `buy_token` for `pay_token`), sorted from the highest price.
+        """
+        with self._lock:
+            orders = list(self._orders.values())
+
+        asks = [order for order in orders if order.pay_asset == ERC20Asset(self.pay_token)]
+        bids = [order for order in orders if order.pay_asset == ERC20Asset(self.buy_token)]
+
+        return sorted(asks, key=lambda order: order.buy_to_sell_price), \
+               sorted(bids, key=lambda order: order.sell_to_buy_price, reverse=True)
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop.close()
+
+    async def _listen(self):
+        while True:
+            try:
+                async with websockets.connect(self.ws_server) as websocket:
+                    for maker_asset_data, taker_asset_data in [(self._pay_asset_data, self._buy_asset_data),
+                                                               (self._buy_asset_data, self._pay_asset_data)]:
+                        await websocket.send(json.dumps({"type": "subscribe",
+                                                         "channel": "orders",
+                                                         "requestId": str(uuid.uuid4()),
+                                                         "payload": {"makerAssetData": maker_asset_data,
+                                                                     "takerAssetData": taker_asset_data}}))
+
+                    # updates received while the book is being seeded wait in the socket,
+                    # so they get applied on top of the seeded order book
+                    await self._seed()
+                    self._ready.set()
+                    self.logger.info(f"Subscribed to 0x orders at {self.ws_server}")
+
+                    async for message in websocket:
+                        self._handle(json.loads(message))
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as e:
+                self.logger.warning(f"0x WebSocket connection to {self.ws_server} failed: {e}")
+
+            self._ready.clear()
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _seed(self):
+        if self.relayer_api is None:
+            return
+
+        asks, bids = await asyncio.get_event_loop().run_in_executor(None, self.relayer_api._get_book_records,
+                                                                    self.pay_token, self.buy_token)
+
+        orders = {}
+        for record in asks + bids:
+            self._apply(orders, record)
+
+        with self._lock:
+            self._orders = orders
+
+    def _handle(self, message: dict):
+        if message.get('type') != 'update' or message.get('channel') != 'orders':
+            return
+
+        for record in message.get('payload', []):
+            with self._lock:
+                self._apply(self._orders, record)
+
+    def _apply(self, orders: dict, record: dict):
+        order = Order.from_json(self.exchange, record['order'])
+        meta_data = record.get('metaData', {})
+
+        if order.exchange_contract_address != self.exchange.address:
+            return
+
+        if (order.pay_asset, order.buy_asset) not in [(ERC20Asset(self.pay_token), ERC20Asset(self.buy_token)),
+                                                      (ERC20Asset(self.buy_token), ERC20Asset(self.pay_token))]:
+            return
+
+        order_hash = (meta_data.get('orderHash') or self.exchange.get_order_hash(order)).lower()
+
+        if int(meta_data.get('remainingTakerAssetAmount', order.buy_amount.value)) == 0:
+            orders.pop(order_hash, None)
+        else:
+            orders[order_hash] = order
+
+    def __repr__(self):
+        return f"ZrxRelayerWebSocketApiV2('{self.ws_server}')"
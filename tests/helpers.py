@@ -15,10 +15,30 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import asyncio
+import json
+import os
+import threading
 import time
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn
 from unittest.mock import Mock
+from urllib.parse import urlparse, parse_qs
 
+import pytest
+from eth_abi import decode_abi, encode_abi, encode_single
+from eth_utils import event_abi_to_log_topic
+import websockets
+from hexbytes import HexBytes
 from web3 import Web3
+from web3.providers.base import BaseProvider
+
+from pymaker.stub import ContractStub
+
+
+# Benchmarks print their timings instead of asserting on them, and only run if `PYMAKER_BENCHMARK` is set:
+#   PYMAKER_BENCHMARK=1 py.test -s -k benchmark tests/
+benchmark = pytest.mark.skipif(not os.environ.get('PYMAKER_BENCHMARK'), reason="PYMAKER_BENCHMARK is not set")
 
 
 def is_hashable(v):
@@ -58,3 +78,234 @@ def reset(web3: Web3, snap_id):
     assert(isinstance(web3, Web3))
 
     return web3.manager.request_blocking("evm_revert", [snap_id])
+
+
+class StubProvider(BaseProvider):
+    """Answers JSON-RPC requests locally, so contract clients can be tested without an Ethereum node.
+
+    `responses` maps method names either to a static result or to a function taking
+    the request params and returning the result. `eth_getCode` answers with some code
+    by default, so contract clients can be instantiated. All requests are recorded.
+    """
+    def __init__(self, responses: dict):
+        self.responses = {**{'eth_getCode': '0x6060'}, **responses}
+        self.requests = []
+
+    def make_request(self, method, params):
+        self.requests.append((method, params))
+
+        if method not in self.responses:
+            raise Exception(f"Unexpected method {method}")
+
+        response = self.responses[method]
+        return {'jsonrpc': '2.0', 'id': 1, 'result': response(params) if callable(response) else response}
+
+    def requests_of(self, method: str) -> list:
+        return [params for request_method, params in self.requests if request_method == method]
+
+
+def eth_call_responder(abi: list, functions: dict):
+    """Builds an `eth_call` response function for `StubProvider` out of plain Python functions.
+
+    `functions` maps contract function names (or signatures, if overloaded) to functions taking
+    the decoded call arguments and returning the result, or a list of results if the contract
+    function has more than one output. Calls of other functions raise an exception.
+    """
+    stub = ContractStub.for_abi(abi)
+    selectors = {'0x' + stub.function(name).selector.hex(): (stub.function(name), function)
+                 for name, function in functions.items()}
+
+    def respond(params):
+        data = params[0]['data']
+        if data[:10] not in selectors:
+            raise Exception(f"Unexpected call {data[:10]}")
+
+        stub_function, function = selectors[data[:10]]
+        result = function(*decode_abi(stub_function.input_types, bytes.fromhex(data[10:])))
+        return '0x' + encode_abi(stub_function.output_types,
+                                 [result] if len(stub_function.output_types) == 1 else result).hex()
+
+    return respond
+
+
+def encode_log(event_abi: dict, args: dict, address: str, block_number: int, log_index: int = 0) -> dict:
+    """Builds a raw log entry, as it would be returned by `eth_getLogs`, for the given event and arguments."""
+    indexed = [input for input in event_abi['inputs'] if input['indexed']]
+    not_indexed = [input for input in event_abi['inputs'] if not input['indexed']]
+
+    return {'address': address,
+            'topics': [HexBytes(event_abi_to_log_topic(event_abi))] +
+                      [HexBytes(encode_single(input['type'], args[input['name']])) for input in indexed],
+            'data': '0x' + encode_abi([input['type'] for input in not_indexed],
+                                      [args[input['name']] for input in not_indexed]).hex(),
+            'blockNumber': block_number,
+            'blockHash': HexBytes(block_number.to_bytes(32, 'big')),
+            'transactionHash': HexBytes((block_number * 1000 + log_index).to_bytes(32, 'big')),
+            'transactionIndex': 0,
+            'logIndex': log_index}
+
+
+class StubRelayer:
+    """Minimal Standard Relayer API (V0 and V2) server, running on a local port in a background thread.
+
+    Serves `orders_v0` and `orders_v2` (lists of orders in their JSON representation) with pagination
+    and filtering, accepts new orders and responds to fee and order configuration requests. Every request
+    gets recorded in `requests` as a `(method, path, params)` tuple. If set, `gate` gets called with the same
+    `(method, path, params)` before each response is sent, so tests can hold responses back.
+    """
+    def __init__(self):
+        self.orders_v0 = []
+        self.orders_v2 = []
+        self.order_config = {"senderAddress": "0x0000000000000000000000000000000000000000",
+                             "feeRecipientAddress": "0x0000000000000000000000000000000000000000",
+                             "makerFee": "0",
+                             "takerFee": "0"}
+        self.include_total = True
+        self.gate = None
+        self.requests = []
+        self.connections = set()
+
+        relayer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                self._handle('GET')
+
+            def do_POST(self):
+                self._handle('POST')
+
+            def _handle(self, method: str):
+                url = urlparse(self.path)
+                params = {key: value[0] for key, value in parse_qs(url.query).items()}
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+                relayer.requests.append((method, url.path, params))
+                relayer.connections.add(self.client_address)
+                if relayer.gate is not None:
+                    relayer.gate(method, url.path, params)
+
+                status, response = relayer.handle(method, url.path, params, json.loads(body) if body else None)
+                response = json.dumps(response).encode('utf-8')
+
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(response)))
+                self.end_headers()
+                self.wfile.write(response)
+
+            def log_message(self, format, *args):
+                pass
+
+        class Server(ThreadingMixIn, HTTPServer):
+            daemon_threads = True
+
+        self.server = Server(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def handle(self, method: str, path: str, params: dict, body):
+        if method == 'GET' and path == '/v0/orders':
+            orders = [order for order in self.orders_v0
+                      if all(order.get(key) == params[key]
+                             for key in ['makerTokenAddress', 'takerTokenAddress', 'maker'] if key in params)]
+            return 200, self._page(orders, params, 'per_page')
+
+        if method == 'GET' and path == '/v2/orders':
+            orders = [order for order in self.orders_v2
+                      if all(order.get(key) == params[key]
+                             for key in ['makerAssetData', 'takerAssetData', 'makerAddress'] if key in params)]
+            data = {'page': int(params.get('page', 1)),
+                    'perPage': int(params.get('perPage', 100)),
+                    'records': [{'order': order, 'metaData': {}} for order in self._page(orders, params, 'perPage')]}
+            if self.include_total:
+                data['total'] = len(orders)
+            return 200, data
+
+        if method == 'GET' and path == '/v2/orderbook':
+            def side(maker_asset_data, taker_asset_data):
+                return {'records': [{'order': order, 'metaData': {}} for order in self.orders_v2
+                                    if order['makerAssetData'] == maker_asset_data
+                                    and order['takerAssetData'] == taker_asset_data]}
+
+            return 200, {'asks': side(params['baseAssetData'], params['quoteAssetData']),
+                         'bids': side(params['quoteAssetData'], params['baseAssetData'])}
+
+        if method == 'POST' and path == '/v0/fees':
+            return 200, {'feeRecipient': self.order_config['feeRecipientAddress'],
+                         'makerFee': self.order_config['makerFee'],
+                         'takerFee': self.order_config['takerFee']}
+
+        if method == 'POST' and path == '/v0/order':
+            self.orders_v0.append(body)
+            return 201, {}
+
+        if method == 'GET' and path == '/v2/order_config':
+            return 200, self.order_config
+
+        if method == 'POST' and path == '/v2/order':
+            if body.get('signature') is None:
+                return 400, {'code': 100, 'reason': 'Validation failed'}
+            self.orders_v2.append(body)
+            return 201, {}
+
+        return 404, {}
+
+    @staticmethod
+    def _page(orders: list, params: dict, per_page_param: str) -> list:
+        page = int(params.get('page', 1))
+        per_page = int(params.get(per_page_param, 100))
+        return orders[(page - 1) * per_page:page * per_page]
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class StubWebSocketRelayer:
+    """Minimal Standard Relayer API V2 WebSocket server, running on a local port in a background thread.
+
+    Records all messages received from clients in `messages`, and broadcasts messages
+    passed to `send()` to all connected clients.
+    """
+    def __init__(self):
+        self.messages = []
+        self.clients = set()
+
+        self.loop = asyncio.new_event_loop()
+        self.server = self.loop.run_until_complete(websockets.serve(self._handle, '127.0.0.1', 0, loop=self.loop))
+        self.url = f"ws://127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    async def _handle(self, websocket, path):
+        self.clients.add(websocket)
+        try:
+            async for message in websocket:
+                self.messages.append(json.loads(message))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.clients.discard(websocket)
+
+    def send(self, message: dict):
+        async def broadcast():
+            for client in list(self.clients):
+                await client.send(json.dumps(message))
+
+        asyncio.run_coroutine_threadsafe(broadcast(), self.loop).result()
+
+    def disconnect(self):
+        async def close():
+            for client in list(self.clients):
+                await client.close()
+
+        asyncio.run_coroutine_threadsafe(close(), self.loop).result()
+
+    def stop(self):
+        self.disconnect()
+        self.server.close()
+        asyncio.run_coroutine_threadsafe(self.server.wait_closed(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
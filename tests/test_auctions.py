@@ -16,16 +16,23 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
+import time
+
 import pytest
 from datetime import datetime
+from eth_abi import encode_abi
+from hexbytes import HexBytes
 from web3 import Web3
 
 from pymaker import Address
 from pymaker.approval import directly, hope_directly
-from pymaker.auctions import AuctionContract, Flipper, Flapper, Flopper
+from pymaker.auctions import AuctionContract, AuctionIndex, Flipper, Flapper, Flopper, FlipperModel, FlapperModel, \
+    FlopperModel
 from pymaker.deployment import DssDeployment
 from pymaker.dss import Collateral, Urn
 from pymaker.numeric import Wad, Ray, Rad
+from pymaker.stub import ContractStub
+from tests.helpers import StubProvider, encode_log, eth_call_responder
 from tests.test_dss import wrap_eth, mint_mkr, set_collateral_price, wait, frob, cleanup_urn, max_dart, simulate_bite
 
 
@@ -119,6 +126,9 @@ def check_active_auctions(auction: AuctionContract):
         assert isinstance(bid.guy, Address)
         assert bid.guy != Address("0x0000000000000000000000000000000000000000")
 
+    index = AuctionIndex(auction)
+    assert [bid.id for bid in index.active_auctions()] == [bid.id for bid in auction.active_auctions()]
+
 
 class TestFlipper:
     @pytest.fixture(scope="session")
@@ -145,6 +155,7 @@ class TestFlipper:
         assert bid <= current_bid.tab
         assert bid > current_bid.bid
         assert (bid >= Rad(flipper.beg()) * current_bid.bid) or (bid == current_bid.tab)
+        assert FlipperModel.from_contract(flipper).validate_tend(current_bid, lot, bid) is None
 
         assert flipper.tend(id, lot, bid).transact(from_address=address)
 
@@ -164,6 +175,7 @@ class TestFlipper:
         assert bid == current_bid.tab
         assert lot < current_bid.lot
         assert flipper.beg() * lot <= current_bid.lot
+        assert FlipperModel.from_contract(flipper).validate_dent(current_bid, lot, bid) is None
 
         assert flipper.dent(id, lot, bid).transact(from_address=address)
 
@@ -294,7 +306,9 @@ class TestFlipper:
         wait(mcd, our_address, flipper.ttl()+1)
         now = datetime.now().timestamp()
         assert 0 < current_bid.tic < now or current_bid.end < now
+        assert [bid.id for bid in flipper.finished_auctions()] == [kick]
         assert flipper.deal(kick).transact(from_address=our_address)
+        assert flipper.finished_auctions() == []
         assert len(flipper.active_auctions()) == 0
         log = flipper.past_logs(1)[0]
         assert isinstance(log, Flipper.DealLog)
@@ -487,3 +501,394 @@ class TestFlopper:
         assert isinstance(log, Flopper.DealLog)
         assert log.usr == our_address
         assert log.id == kick
+
+
+def flipper_kick_log(address: str, id: int, guy: Address, block_number: int, log_index: int) -> dict:
+    event_abi = [member for member in Flipper.abi if member.get('name') == 'Kick'][0]
+    return encode_log(event_abi, {'id': id, 'lot': 2, 'bid': 0, 'tab': 3, 'usr': guy.address, 'gal': guy.address},
+                      address, block_number, log_index)
+
+
+def flipper_note_log(address: str, name: str, id: int, guy: Address, block_number: int, log_index: int) -> dict:
+    function = ContractStub.for_abi(Flipper.abi).function(name)
+    calldata = function.selector + encode_abi(function.input_types, [id] + [1] * (len(function.input_types) - 1))
+
+    log = encode_log({'name': 'LogNote', 'type': 'event', 'anonymous': True, 'inputs': []}, {},
+                     address, block_number, log_index)
+    log['topics'] = [HexBytes(function.selector.ljust(32, bytes(1))),
+                     HexBytes(bytes(12) + bytes.fromhex(guy.address[2:])),
+                     HexBytes(id.to_bytes(32, 'big')),
+                     HexBytes(bytes(32))]
+    log['data'] = '0x' + encode_abi(['bytes'], [calldata]).hex()
+    return log
+
+
+class TestAuctionIndex:
+    flipper_address = '0x11223344556600000000000000000000000000ff'
+    guy = Address('0x0000000000000000000000000000000000000001')
+
+    def setup_method(self):
+        self.block_number = 10
+        self.logs = []
+        self.bids = {}
+        self.provider = StubProvider({'eth_blockNumber': lambda params: hex(self.block_number),
+                                      'eth_getLogs': lambda params: self.logs,
+                                      'eth_call': eth_call_responder(Flipper.abi, {'bids': self.bid})})
+        self.flipper = Flipper(Web3(self.provider), Address(self.flipper_address))
+        self.index = AuctionIndex(self.flipper, 5)
+
+    def bid(self, id: int) -> list:
+        end = self.bids.get(id, 0)
+        guy = self.guy.address if end > 0 else '0x' + '00' * 20
+        return [id, 2, guy, 0, end, guy, guy, 3]
+
+    def kick(self, id: int, end: int = None):
+        self.bids[id] = end or int(time.time()) + 3600
+        self.logs.append(flipper_kick_log(self.flipper_address, id, self.guy, self.block_number, len(self.logs)))
+
+    def note(self, name: str, id: int):
+        self.logs.append(flipper_note_log(self.flipper_address, name, id, self.guy, self.block_number, len(self.logs)))
+
+    def bid_calls(self):
+        return [(int(params[0]['data'][10:], 16), params[1]) for params in self.provider.requests_of('eth_call')]
+
+    def test_should_index_kicked_auctions(self):
+        # given
+        self.kick(1)
+        self.kick(2)
+
+        # when
+        auctions = self.index.active_auctions()
+
+        # then
+        assert [bid.id for bid in auctions] == [1, 2]
+        assert all(isinstance(bid, Flipper.Bid) for bid in auctions)
+        assert self.index.live_ids() == [1, 2]
+        assert sorted(self.bid_calls()) == [(1, hex(10)), (2, hex(10))]
+
+    def test_should_remove_dealt_and_yanked_auctions(self):
+        # given
+        self.kick(1)
+        self.kick(2)
+        self.kick(3)
+        self.index.update()
+
+        # when
+        self.block_number = 11
+        self.logs = []
+        self.note('deal', 1)
+        self.note('yank', 3)
+        self.index.update()
+
+        # then
+        assert self.index.live_ids() == [2]
+        assert self.index.bids(1) is None
+        assert len(self.bid_calls()) == 3
+
+    def test_should_refresh_only_auctions_with_new_bids(self):
+        # given
+        for id in range(1, 101):
+            self.kick(id)
+        self.index.update()
+
+        # when
+        self.block_number = 11
+        self.logs = []
+        self.note('tend', 7)
+        self.note('dent', 9)
+        self.note('tick', 42)
+        self.bids[7] = self.bids[7] + 1
+        self.index.update()
+
+        # then
+        assert len(self.index.active_auctions()) == 100
+        assert sorted(self.bid_calls()[100:]) == [(7, hex(11)), (9, hex(11)), (42, hex(11))]
+        assert self.index.bids(7).end == self.bids[7]
+
+    def test_snapshot(self):
+        # given
+        self.kick(1)
+        self.kick(2)
+        self.kick(3)
+        self.index.update()
+
+        # when
+        self.block_number = 11
+        self.logs = []
+        self.note('deal', 2)
+        self.index.update()
+
+        # then
+        assert self.index.snapshot() == (11, [self.index.bids(1), self.index.bids(3)])
+        assert [bid.id for bid in self.index.snapshot()[1]] == [1, 3]
+
+    def test_should_not_report_expired_auctions_as_active(self):
+        # given
+        self.kick(1, end=int(time.time()) - 10)
+        self.kick(2)
+
+        # expect
+        assert [bid.id for bid in self.index.active_auctions()] == [2]
+        assert self.index.live_ids() == [1, 2]
+
+    def test_should_be_used_by_the_auction_contract(self):
+        # given
+        self.kick(1)
+        self.flipper.use_index(self.index)
+
+        # expect
+        assert [bid.id for bid in self.flipper.active_auctions()] == [1]
+        assert self.index.last_block == 10
+
+    def test_should_query_only_new_blocks(self):
+        # given
+        self.index.update()
+        self.index.update()
+
+        # when
+        self.block_number = 12
+        self.index.update()
+
+        # then
+        assert [(params[0]['fromBlock'], params[0]['toBlock']) for params in self.provider.requests_of('eth_getLogs')] \
+               == [(hex(5), hex(10)), (hex(11), hex(12))]
+
+
+class TestAuctionPastLogs:
+    flipper_address = '0x11223344556600000000000000000000000000ff'
+    guy = Address('0x0000000000000000000000000000000000000001')
+
+    def setup_method(self):
+        self.logs = [flipper_kick_log(self.flipper_address, 1, self.guy, 10, 0),
+                     flipper_kick_log(self.flipper_address, 2, self.guy, 10, 1),
+                     flipper_note_log(self.flipper_address, 'tend', 1, self.guy, 11, 0),
+                     flipper_note_log(self.flipper_address, 'dent', 2, self.guy, 12, 0),
+                     flipper_note_log(self.flipper_address, 'deal', 1, self.guy, 13, 0)]
+        self.provider = StubProvider({'eth_blockNumber': hex(20),
+                                      'eth_getLogs': self.get_logs})
+        self.flipper = Flipper(Web3(self.provider), Address(self.flipper_address))
+
+    def get_logs(self, params):
+        # a very simple version of topic filtering done by the node
+        def matches(log):
+            for topic, expected in zip(log['topics'], params[0].get('topics', [])):
+                expected = expected if isinstance(expected, list) else [expected]
+                if None not in expected and topic.hex() not in expected:
+                    return False
+            return True
+
+        return [log for log in self.logs if matches(log)]
+
+    def test_should_filter_logs_by_topics(self):
+        # when
+        logs = self.flipper.past_logs(15)
+
+        # then
+        assert [type(log) for log in logs] == [Flipper.KickLog, Flipper.KickLog, Flipper.TendLog, Flipper.DentLog,
+                                               AuctionContract.DealLog]
+        assert self.provider.requests_of('eth_getLogs')[0][0]['topics'] == \
+               [['0xc84ce3a1172f0dec3173f04caaa6005151a4bfe40d4c9f3ea28dba5f719b2a7a',
+                 '0x4b43ed1200000000000000000000000000000000000000000000000000000000',
+                 '0x5ff3a38200000000000000000000000000000000000000000000000000000000',
+                 '0xc959c42b00000000000000000000000000000000000000000000000000000000']]
+        assert self.provider.requests_of('eth_getLogs')[0][0]['fromBlock'] == hex(5)
+
+    def test_should_filter_logs_by_auction_id(self):
+        # when
+        logs = self.flipper.past_logs(15, id=1)
+
+        # then
+        assert [type(log) for log in logs] == [Flipper.KickLog, Flipper.TendLog, AuctionContract.DealLog]
+        assert all(log.id == 1 for log in logs)
+        assert self.provider.requests_of('eth_getLogs')[0][0]['topics'][1:] == \
+               [None, '0x0000000000000000000000000000000000000000000000000000000000000001']
+
+    def test_should_not_filter_lognotes_without_signatures(self):
+        # when
+        self.flipper.get_past_lognotes(15, Flipper.abi)
+
+        # then
+        assert 'topics' not in self.provider.requests_of('eth_getLogs')[0][0]
+
+
+class TestAuctionModels:
+    now = 1500000000
+    guy = Address('0x0000000000000000000000000000000000000001')
+    other_guy = Address('0x0000000000000000000000000000000000000002')
+
+    def flip_bid(self, bid: Rad, lot: Wad = Wad.from_number(10), tic: int = 0) -> Flipper.Bid:
+        return Flipper.Bid(id=1, bid=bid, lot=lot, guy=self.guy, tic=tic, end=self.now + 3600, usr=self.guy,
+                           gal=self.guy, tab=Rad.from_number(100))
+
+    def test_flipper_tend(self):
+        # given
+        model = FlipperModel(beg=Wad.from_number(1.05), ttl=600, tau=3600)
+        bid = self.flip_bid(Rad.from_number(50))
+
+        # expect
+        assert model.validate_tend(bid, bid.lot, Rad.from_number(52.5), self.now) is None
+        assert model.validate_tend(bid, bid.lot, Rad.from_number(52.4), self.now) == "Flipper/insufficient-increase"
+        assert model.validate_tend(bid, bid.lot, Rad.from_number(50), self.now) == "Flipper/bid-not-higher"
+        assert model.validate_tend(bid, bid.lot, Rad.from_number(101), self.now) == "Flipper/higher-than-tab"
+        assert model.validate_tend(bid, Wad.from_number(9), Rad.from_number(60), self.now) == "Flipper/lot-not-matching"
+        assert model.min_tend_bid(bid) == Rad.from_number(52.5)
+
+        # when
+        new_bid = model.tend(bid, self.other_guy, bid.lot, Rad.from_number(60), self.now)
+
+        # then
+        assert new_bid.guy == self.other_guy
+        assert new_bid.bid == Rad.from_number(60)
+        assert new_bid.tic == self.now + 600
+        assert bid.guy == self.guy
+
+    def test_flipper_tend_can_always_reach_tab(self):
+        # given
+        model = FlipperModel(beg=Wad.from_number(1.05), ttl=600, tau=3600)
+        bid = self.flip_bid(Rad.from_number(99))
+
+        # expect
+        assert model.min_tend_bid(bid) == Rad.from_number(100)
+        assert model.validate_tend(bid, bid.lot, Rad.from_number(100), self.now) is None
+
+    def test_flipper_switches_to_dent_phase(self):
+        # given
+        model = FlipperModel(beg=Wad.from_number(1.05), ttl=600, tau=3600)
+        bid = model.tend(self.flip_bid(Rad.from_number(99)), self.other_guy, Wad.from_number(10), Rad.from_number(100),
+                         self.now)
+
+        # expect
+        assert model.is_dent_phase(bid)
+        assert model.min_tend_bid(bid) is None
+        assert model.validate_tend(bid, bid.lot, Rad.from_number(101), self.now) == "Flipper/higher-than-tab"
+
+        # and
+        lot = model.max_dent_lot(bid)
+        assert model.validate_dent(bid, lot, bid.tab, self.now) is None
+        assert model.validate_dent(bid, lot + Wad(1), bid.tab, self.now) == "Flipper/insufficient-decrease"
+        assert model.validate_dent(bid, bid.lot, bid.tab, self.now) == "Flipper/lot-not-lower"
+        assert model.dent(bid, self.guy, lot, bid.tab, self.now + 1).lot == lot
+
+    def test_flipper_dent_requires_tab(self):
+        # given
+        model = FlipperModel(beg=Wad.from_number(1.05), ttl=600, tau=3600)
+        bid = self.flip_bid(Rad.from_number(50))
+
+        # expect
+        assert model.max_dent_lot(bid) is None
+        assert model.validate_dent(bid, Wad.from_number(5), Rad.from_number(50), self.now) == "Flipper/tend-not-finished"
+        with pytest.raises(ValueError):
+            model.dent(bid, self.other_guy, Wad.from_number(5), Rad.from_number(50), self.now)
+
+    def test_expiry(self):
+        # given
+        model = FlipperModel(beg=Wad.from_number(1.05), ttl=600, tau=3600)
+        bid = self.flip_bid(Rad.from_number(50), tic=self.now + 600)
+
+        # expect
+        assert model.is_active(bid, self.now)
+        assert not model.is_active(bid, self.now + 600)
+        assert model.validate_tend(bid, bid.lot, Rad.from_number(60), self.now + 600) == "Flipper/already-finished-tic"
+        assert model.validate_deal(bid, self.now) == "Flipper/not-finished"
+        assert model.validate_deal(bid, self.now + 601) is None
+
+        # and
+        unbid = self.flip_bid(Rad(0))
+        assert model.validate_tend(unbid, unbid.lot, Rad.from_number(60), self.now + 3600) == \
+               "Flipper/already-finished-end"
+        assert model.validate_deal(unbid, self.now + 3601) == "Flipper/not-finished"
+        assert model.validate_tick(unbid, self.now) == "Flipper/not-finished"
+        assert model.tick(unbid, self.now + 3601).end == self.now + 3601 + 3600
+        assert model.validate_tick(bid, self.now + 3601) == "Flipper/bid-already-placed"
+
+    def test_flapper(self):
+        # given
+        model = FlapperModel(beg=Wad.from_number(1.05), ttl=600, tau=3600)
+        bid = Flapper.Bid(id=1, bid=Wad.from_number(10), lot=Rad.from_number(1000), guy=self.guy, tic=0,
+                          end=self.now + 3600)
+
+        # expect
+        assert model.min_tend_bid(bid) == Wad.from_number(10.5)
+        assert model.validate_tend(bid, bid.lot, Wad.from_number(10.5), self.now) is None
+        assert model.validate_tend(bid, bid.lot, Wad.from_number(10.4), self.now) == "Flapper/insufficient-increase"
+        assert model.tend(bid, self.other_guy, bid.lot, Wad.from_number(11), self.now).bid == Wad.from_number(11)
+
+        # and
+        assert FlapperModel(beg=Wad.from_number(1.05), ttl=600, tau=3600, live=False) \
+                   .validate_tend(bid, bid.lot, Wad.from_number(11), self.now) == "Flapper/not-live"
+
+    def test_flopper(self):
+        # given
+        model = FlopperModel(beg=Wad.from_number(1.05), ttl=600, tau=3600, pad=Wad.from_number(1.5))
+        bid = Flopper.Bid(id=1, bid=Rad.from_number(50000), lot=Wad.from_number(21), guy=self.guy, tic=0,
+                          end=self.now + 3600)
+
+        # expect
+        assert model.max_dent_lot(bid) == Wad.from_number(20)
+        assert model.validate_dent(bid, Wad.from_number(20), bid.bid, self.now) is None
+        assert model.validate_dent(bid, Wad.from_number(20.1), bid.bid, self.now) == "Flopper/insufficient-decrease"
+        assert model.validate_dent(bid, Wad.from_number(20), Rad.from_number(1), self.now) == "Flopper/not-matching-bid"
+
+        # and
+        assert model.tick(bid, self.now + 3601).lot == Wad.from_number(31.5)
+
+    def test_validation_should_agree_with_min_bid(self):
+        # given
+        model = FlipperModel(beg=Wad.from_number(1.05), ttl=600, tau=3600)
+        bid = self.flip_bid(Rad.from_number(50))
+        candidates = [Rad.from_number(50 + i / 1000) for i in range(10000)]
+
+        # when
+        valid = [candidate for candidate in candidates if model.validate_tend(bid, bid.lot, candidate, self.now) is None]
+
+        # then
+        assert valid[0] == model.min_tend_bid(bid)
+        assert all(candidate >= model.min_tend_bid(bid) for candidate in valid)
+        assert len(valid) == len([candidate for candidate in candidates if candidate >= model.min_tend_bid(bid)])
+
+
+class TestFinishedAuctions:
+    flipper_address = '0x11223344556600000000000000000000000000ff'
+    guy = Address('0x0000000000000000000000000000000000000001')
+    now = 1500000000
+
+    def setup_method(self):
+        self.bids = {}
+        self.provider = StubProvider({'eth_blockNumber': hex(10),
+                                      'eth_getBlockByNumber': {'number': hex(10), 'timestamp': hex(self.now)},
+                                      'eth_getLogs': [],
+                                      'eth_call': eth_call_responder(Flipper.abi, {'kicks': lambda: len(self.bids),
+                                                                                   'bids': self.bid})})
+        self.flipper = Flipper(Web3(self.provider), Address(self.flipper_address))
+
+    def bid(self, id: int) -> list:
+        (tic, end) = self.bids[id]
+        guy = self.guy.address if end > 0 else '0x' + '00' * 20
+        return [id, 2, guy, tic, end, guy, guy, 3]
+
+    def test_should_return_only_finished_auctions(self):
+        # given
+        self.bids[1] = (self.now - 10, self.now + 3600)  # bid expired
+        self.bids[2] = (self.now + 10, self.now + 3600)  # bid still active
+        self.bids[3] = (0, self.now - 10)                # ended without bids, needs `tick`
+        self.bids[4] = (0, 0)                            # already dealt
+        self.bids[5] = (self.now + 10, self.now - 10)    # auction ended
+
+        # when
+        auctions = self.flipper.finished_auctions()
+
+        # then
+        assert [bid.id for bid in auctions] == [1, 5]
+        assert all(params[1] == hex(10) for params in self.provider.requests_of('eth_call'))
+
+    def test_should_use_the_index(self):
+        # given
+        self.flipper.use_index(AuctionIndex(self.flipper, 5))
+
+        # when
+        auctions = self.flipper.finished_auctions()
+
+        # then
+        assert auctions == []
+        assert len(self.provider.requests_of('eth_getLogs')) == 1
+        assert self.provider.requests_of('eth_call') == []
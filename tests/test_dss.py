@@ -16,19 +16,26 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import json
+import os
 import pytest
 import time
 from datetime import datetime
+from eth_abi import encode_abi, encode_single
+from hexbytes import HexBytes
 from web3 import Web3
 
 from pymaker import Address
 from pymaker.approval import directly, hope_directly
 from pymaker.deployment import DssDeployment
-from pymaker.dss import Vat, Vow, Cat, Ilk, Urn, Jug, GemJoin, DaiJoin, Collateral
+from pymaker.dss import Vat, Vow, Cat, Ilk, Urn, Jug, GemJoin, DaiJoin, Collateral, Pot, UrnSafetyIndex, \
+    RateAccumulator
 from pymaker.feed import DSValue
 from pymaker.numeric import Wad, Ray, Rad
+from pymaker.stub import ContractStub
 from pymaker.token import DSToken, DSEthToken
+from pymaker.transactional import TxManager
 from tests.conftest import validate_contracts_loaded
+from tests.helpers import StubProvider, encode_log, eth_call_responder, benchmark
 
 
 @pytest.fixture
@@ -274,6 +281,393 @@ class TestConfig:
         assert "flops" in auctions
 
 
+class TestDeploymentStartup:
+    conf = open(os.path.join(os.path.dirname(__file__), '..', 'config', 'testnet-addresses.json'), 'r').read()
+
+    @staticmethod
+    def stand_in_node(latency: float = 0.0) -> StubProvider:
+        def respond_with(result):
+            def respond(params):
+                time.sleep(latency)
+                return result
+
+            return respond
+
+        # all address getters (`GemJoin.gem()`, `Cat.vat()` etc.) answer with the same address
+        return StubProvider({'eth_getCode': respond_with('0x6060'),
+                             'eth_call': respond_with('0x' + encode_single('address', '0x' + '11' * 20).hex())})
+
+    def test_from_json_should_not_make_requests(self):
+        # given
+        provider = self.stand_in_node()
+
+        # when
+        mcd = DssDeployment.from_json(Web3(provider), self.conf)
+
+        # then
+        assert provider.requests == []
+        assert set(mcd.collaterals.keys()) == {'ETH-A', 'ETH-B', 'ETH-C', 'BAT-A', 'ZRX-A'}
+        assert mcd.config.to_dict().items() <= json.loads(self.conf).items()
+
+    def test_should_construct_members_on_first_access(self):
+        # given
+        provider = self.stand_in_node()
+        mcd = DssDeployment.from_json(Web3(provider), self.conf)
+
+        # when
+        vat = mcd.vat
+        cat = mcd.cat
+
+        # then
+        assert isinstance(vat, Vat)
+        assert vat.address == Address(json.loads(self.conf)['MCD_VAT'])
+        assert isinstance(cat, Cat)
+        assert len(provider.requests_of('eth_getCode')) == 2
+        assert provider.requests_of('eth_call') == []
+
+        # when
+        assert mcd.vat is vat
+        assert mcd.config.vat is vat
+        collateral = mcd.collaterals['BAT-A']
+
+        # then
+        assert isinstance(collateral, Collateral)
+        assert isinstance(collateral.gem, DSToken)
+        assert collateral.adapter.address == Address(json.loads(self.conf)['MCD_JOIN_BAT_A'])
+        assert mcd.collaterals['BAT-A'] is collateral
+
+    def test_prewarm(self):
+        # given
+        provider = self.stand_in_node()
+        mcd = DssDeployment.from_json(Web3(provider), self.conf)
+        conf_before = mcd.config.to_dict()
+
+        # when
+        mcd.prewarm()
+        requests = len(provider.requests)
+
+        # then
+        assert isinstance(mcd.pot, Pot)
+        assert isinstance(mcd.dai_adapter, DaiJoin)
+        assert all(isinstance(collateral, Collateral) for collateral in mcd.collaterals.values())
+        assert len(provider.requests) == requests
+        assert {key: value.lower() for key, value in mcd.config.to_dict().items()} == \
+               {key: value.lower() for key, value in conf_before.items()}
+
+    def test_should_make_requests_only_for_constructed_members(self):
+        # given
+        lazy_provider = self.stand_in_node()
+        concurrent_provider = self.stand_in_node()
+        sequential_provider = self.stand_in_node()
+
+        # when
+        DssDeployment.from_json(Web3(lazy_provider), self.conf).vat
+        DssDeployment.from_json(Web3(concurrent_provider), self.conf).prewarm(max_workers=8)
+        DssDeployment.from_json(Web3(sequential_provider), self.conf).prewarm(max_workers=1)
+
+        # then
+        assert len(lazy_provider.requests_of('eth_getCode')) == 1
+        assert lazy_provider.requests_of('eth_call') == []
+
+        # and
+        assert len(concurrent_provider.requests_of('eth_getCode')) == 50
+        assert len(concurrent_provider.requests_of('eth_call')) == 10
+        assert len(concurrent_provider.requests) == len(sequential_provider.requests) == 60
+
+    def test_collaterals_should_be_mutable(self):
+        # given
+        provider = self.stand_in_node()
+        mcd = DssDeployment.from_json(Web3(provider), self.conf)
+        collateral = mcd.collaterals['ETH-A']
+
+        # when
+        mcd.collaterals['ETH-Z'] = collateral
+        del mcd.collaterals['BAT-A']
+
+        # then
+        assert set(mcd.collaterals.keys()) == {'ETH-A', 'ETH-B', 'ETH-C', 'ETH-Z', 'ZRX-A'}
+        assert mcd.collaterals['ETH-Z'] is collateral
+        assert 'MCD_JOIN_BAT_A' not in mcd.config.to_dict()
+
+    @benchmark
+    def test_startup_benchmark(self):
+        # given
+        provider = self.stand_in_node(latency=0.01)
+
+        # when
+        start = time.time()
+        DssDeployment.from_json(Web3(provider), self.conf).prewarm(max_workers=1)
+        eager_time = time.time() - start
+
+        # and
+        start = time.time()
+        DssDeployment.from_json(Web3(provider), self.conf).vat
+        lazy_time = time.time() - start
+
+        # and
+        start = time.time()
+        DssDeployment.from_json(Web3(provider), self.conf, prewarm=True)
+        prewarm_time = time.time() - start
+
+        # then
+        print(f"DssDeployment startup against a node with 10ms latency: {eager_time:.3f}s eager,"
+              f" {lazy_time:.3f}s lazy, {prewarm_time:.3f}s prewarmed")
+
+class TestSingleBlockReads:
+    vat_address = Address('0x11223344556600000000000000000000000000ff')
+    our_address = Address('0x0000000000000000000000000000000000000001')
+
+    @staticmethod
+    def stand_in_vat(results: dict) -> StubProvider:
+        return StubProvider({'eth_blockNumber': 42,
+                             'eth_call': eth_call_responder(Vat.abi, {name: lambda *args, result=result: result
+                                                                      for name, result in results.items()})})
+
+    @staticmethod
+    def vat_state(urn_art: Wad, debt: Rad, live: int = 1) -> dict:
+        return {'ilks': [Wad.from_number(1000).value, Ray.from_number(1).value, Ray.from_number(2).value,
+                         Rad.from_number(100000).value, Rad(0).value],
+                'urns': [Wad.from_number(10).value, urn_art.value],
+                'gem': Wad.from_number(5).value,
+                'dai': Rad.from_number(50).value,
+                'debt': debt.value,
+                'Line': Rad.from_number(1000000).value,
+                'live': live}
+
+    def test_validate_frob(self):
+        # given
+        provider = self.stand_in_vat(self.vat_state(urn_art=Wad.from_number(5), debt=Rad.from_number(1000)))
+        vat = Vat(Web3(provider), self.vat_address)
+
+        # when
+        vat.validate_frob(Ilk('ETH-A'), self.our_address, Wad.from_number(1), Wad.from_number(2))
+
+        # then
+        assert len(provider.requests_of('eth_blockNumber')) == 1
+        assert len(provider.requests_of('eth_call')) == 7
+        assert all(params[1] == hex(42) for params in provider.requests_of('eth_call'))
+
+    def test_validate_frob_should_fail(self):
+        # given
+        over_total_debt_ceiling = self.vat_state(urn_art=Wad.from_number(5), debt=Rad.from_number(1000000))
+        caged = self.vat_state(urn_art=Wad.from_number(5), debt=Rad.from_number(1000), live=0)
+
+        # expect
+        for state in [over_total_debt_ceiling, caged]:
+            with pytest.raises(AssertionError):
+                Vat(Web3(self.stand_in_vat(state)), self.vat_address) \
+                    .validate_frob(Ilk('ETH-A'), self.our_address, Wad.from_number(1), Wad.from_number(2))
+
+    def test_ilk_and_urn(self):
+        # given
+        provider = self.stand_in_vat(self.vat_state(urn_art=Wad.from_number(5), debt=Rad.from_number(1000)))
+        vat = Vat(Web3(provider), self.vat_address)
+
+        # when
+        ilk, urn = vat.ilk_and_urn(Ilk('ETH-A'), self.our_address, block_identifier=17)
+
+        # then
+        assert ilk.name == 'ETH-A'
+        assert ilk.rate == Ray.from_number(1)
+        assert ilk.spot == Ray.from_number(2)
+        assert urn == Urn(self.our_address, ilk, Wad.from_number(10), Wad.from_number(5))
+        assert provider.requests_of('eth_blockNumber') == []
+        assert [params[1] for params in provider.requests_of('eth_call')] == [hex(17), hex(17)]
+
+    def test_ilks(self):
+        # given
+        provider = self.stand_in_vat(self.vat_state(urn_art=Wad.from_number(5), debt=Rad.from_number(1000)))
+        vat = Vat(Web3(provider), self.vat_address)
+
+        # when
+        ilks = vat.ilks(['ETH-A', 'BAT-A'])
+
+        # then
+        assert set(ilks.keys()) == {'ETH-A', 'BAT-A'}
+        assert ilks['BAT-A'].name == 'BAT-A'
+        assert ilks['BAT-A'].spot == Ray.from_number(2)
+        assert set(params[0]['data'][10:] for params in provider.requests_of('eth_call')) == \
+               {Ilk('ETH-A').toBytes().hex(), Ilk('BAT-A').toBytes().hex()}
+        assert all(params[1] == hex(42) for params in provider.requests_of('eth_call'))
+
+
+class TestBiteCandidates:
+    ilks = {'ETH-A': Ilk('ETH-A', rate=Ray.from_number(1.1), spot=Ray.from_number(150)),
+            'BAT-A': Ilk('BAT-A', rate=Ray.from_number(1), spot=Ray.from_number(0.5)),
+            'ZRX-A': Ilk('ZRX-A', rate=Ray.from_number(1), spot=Ray(0))}
+
+    @staticmethod
+    def urn(number: int, ilk: str, ink: float, art: float) -> Urn:
+        return Urn(Address('0x' + '%040x' % number), Ilk(ilk), Wad.from_number(ink), Wad.from_number(art))
+
+    def test_screen(self):
+        # given
+        safe = self.urn(1, 'ETH-A', 1, 100)
+        unsafe_eth = self.urn(2, 'ETH-A', 1, 140)
+        unsafe_bat = self.urn(3, 'BAT-A', 1000, 600)
+        unsafe_by_rate_only = self.urn(4, 'ETH-A', 1, 137)
+        no_price = self.urn(5, 'ZRX-A', 1, 100)
+        empty = self.urn(6, 'BAT-A', 0, 0)
+
+        # when
+        candidates = Cat.screen([safe, unsafe_eth, unsafe_bat, unsafe_by_rate_only, no_price, empty], self.ilks)
+
+        # then
+        assert [candidate.urn for candidate in candidates] == [unsafe_bat, unsafe_eth, unsafe_by_rate_only]
+        assert candidates[0].ilk is self.ilks['BAT-A']
+        assert candidates[0].tab == Rad.from_number(600)
+        assert candidates[0].shortfall == Rad.from_number(100)
+        assert candidates[1].tab == Rad(Wad.from_number(140)) * Rad(Ray.from_number(1.1))
+        assert candidates[2].shortfall == Rad(Wad.from_number(137)) * Rad(Ray.from_number(1.1)) - Rad.from_number(150)
+
+    def test_screen_many_urns(self):
+        # given
+        urns = [self.urn(number, 'ETH-A' if number % 2 else 'BAT-A', 10, number % 1500) for number in range(10000)]
+
+        # when
+        candidates = Cat.screen(urns, self.ilks)
+
+        # then
+        assert len(candidates) > 0
+        assert all(candidates[i].tab >= candidates[i+1].tab for i in range(len(candidates) - 1))
+
+
+def vat_note_log(address: str, name: str, args: list, block_number: int, log_index: int = 0) -> dict:
+    function = ContractStub.for_abi(Vat.abi).function(name)
+    calldata = function.encode(args)
+
+    log = encode_log({'name': 'LogNote', 'type': 'event', 'anonymous': True, 'inputs': []}, {},
+                     address, block_number, log_index)
+    log['topics'] = [HexBytes(function.selector.ljust(32, bytes(1)))] + \
+                    [HexBytes(calldata[4 + 32 * index:36 + 32 * index]) for index in range(3)]
+    log['data'] = '0x' + encode_abi(['bytes'], [calldata]).hex()
+    return log
+
+
+class TestUrnSafetyIndex:
+    vat_address = '0x11223344556600000000000000000000000000ff'
+
+    def setup_method(self):
+        self.block_number = 10
+        self.logs = []
+        self.ilks = {}
+        self.urns = {}
+        self.provider = StubProvider({'eth_blockNumber': lambda params: hex(self.block_number),
+                                      'eth_getLogs': lambda params: self.logs,
+                                      'eth_call': eth_call_responder(Vat.abi, {'ilks': self.ilk, 'urns': self.urn})})
+        self.vat = Vat(Web3(self.provider), Address(self.vat_address))
+        self.index = UrnSafetyIndex(self.vat, from_block=1)
+
+    def ilk(self, ilk: bytes) -> list:
+        (rate, spot) = self.ilks[Ilk.fromBytes(ilk).name]
+        return [0, rate.value, spot.value, 0, 0]
+
+    def urn(self, ilk: bytes, address: str) -> list:
+        (ink, art) = self.urns.get((Ilk.fromBytes(ilk).name, Address(address)), (Wad(0), Wad(0)))
+        return [ink.value, art.value]
+
+    def frob(self, ilk: str, number: int, ink: float, art: float) -> Address:
+        address = Address('0x' + '%040x' % number)
+        self.urns[(ilk, address)] = (Wad.from_number(ink), Wad.from_number(art))
+        self.logs.append(vat_note_log(self.vat_address, 'frob', [Ilk(ilk).toBytes(), address.address,
+                                                                 address.address, address.address, 0, 0],
+                                      self.block_number))
+        return address
+
+    def poke(self, ilk: str, rate: float, spot: float):
+        self.ilks[ilk] = (Ray.from_number(rate), Ray.from_number(spot))
+        self.logs.append(vat_note_log(self.vat_address, 'file(bytes32,bytes32,uint256)',
+                                      [Ilk(ilk).toBytes(), b'spot', Ray.from_number(spot).value], self.block_number))
+
+    def drip(self, ilk: str, rate: float):
+        self.ilks[ilk] = (Ray.from_number(rate), self.ilks[ilk][1])
+        self.logs.append(vat_note_log(self.vat_address, 'fold', [Ilk(ilk).toBytes(), self.vat_address, 0],
+                                      self.block_number))
+
+    def test_should_find_unsafe_urns(self):
+        # given
+        self.poke('ETH-A', 1, 150)
+        self.poke('BAT-A', 1, 0.5)
+        safe = self.frob('ETH-A', 1, 1, 100)
+        unsafe = self.frob('ETH-A', 2, 1, 140)
+        more_unsafe = self.frob('ETH-A', 3, 1, 149)
+        unsafe_bat = self.frob('BAT-A', 4, 1000, 501)
+        self.frob('ETH-A', 5, 1, 0)
+
+        # when
+        self.index.update()
+
+        # then
+        assert [urn.address for urn in self.index.unsafe_urns()] == [unsafe_bat]
+        assert self.index.unsafe_urns(Ilk('ETH-A')) == []
+        assert [urn.address for urn in self.index.urns(Ilk('ETH-A'))] == [more_unsafe, unsafe, safe,
+                                                                          Address('0x' + '%040x' % 5)]
+
+        # when
+        self.logs = []
+        self.block_number = 11
+        self.drip('ETH-A', 1.1)
+        self.index.update()
+
+        # then
+        urns = self.index.unsafe_urns(Ilk('ETH-A'))
+        assert [urn.address for urn in urns] == [more_unsafe, unsafe]
+        assert urns[0].ilk.rate == Ray.from_number(1.1)
+        assert urns[0].art == Wad.from_number(149)
+        assert [candidate.urn.address for candidate in self.index.bite_candidates()] == \
+               [unsafe_bat, more_unsafe, unsafe]
+
+    def test_should_only_read_affected_urns(self):
+        # given
+        self.poke('ETH-A', 1, 150)
+        for number in range(1, 21):
+            self.frob('ETH-A', number, 1, number * 10)
+        self.index.update()
+        calls = len(self.provider.requests_of('eth_call'))
+
+        # when
+        self.logs = []
+        self.block_number = 11
+        self.poke('ETH-A', 1, 100)
+        self.index.update()
+
+        # then
+        assert len(self.provider.requests_of('eth_call')) == calls + 1
+        assert [urn.art for urn in self.index.unsafe_urns()] == [Wad.from_number(200 - 10 * index)
+                                                                 for index in range(10)]
+
+        # when
+        self.logs = []
+        self.block_number = 12
+        self.frob('ETH-A', 20, 3, 200)
+        self.index.update()
+
+        # then
+        assert len(self.provider.requests_of('eth_call')) == calls + 2
+        assert [urn.art for urn in self.index.unsafe_urns()] == [Wad.from_number(190 - 10 * index)
+                                                                 for index in range(9)]
+        assert all(params[1] == hex(12) for params in self.provider.requests_of('eth_call')[-1:])
+
+    def test_should_drop_closed_urns(self):
+        # given
+        self.poke('ETH-A', 1, 150)
+        address = self.frob('ETH-A', 1, 1, 200)
+        self.index.update()
+        assert len(self.index.unsafe_urns()) == 1
+
+        # when
+        self.logs = []
+        self.block_number = 11
+        self.frob('ETH-A', 1, 0, 0)
+        self.logs.append(vat_note_log(self.vat_address, 'fork', [Ilk('ETH-A').toBytes(), address.address,
+                                                                 address.address, 0, 0], self.block_number))
+        self.index.update()
+
+        # then
+        assert self.index.unsafe_urns() == []
+        assert self.index.urns(Ilk('ETH-A')) == []
+
+
 class TestVat:
     @staticmethod
     def ensure_clean_urn(mcd: DssDeployment, collateral: Collateral, address: Address):
@@ -511,6 +905,95 @@ class TestVow:
         assert mcd.vow.kiss(Rad(0)).transact()
 
 
+class TestRateAccumulator:
+    @staticmethod
+    def rpow_reference(x: int, n: int) -> int:
+        # `rpow` of ds-math, written out the way the Solidity code does it
+        def rmul(x, y):
+            return (x * y + 10 ** 27 // 2) // 10 ** 27
+
+        z = x if n % 2 != 0 else 10 ** 27
+        n = n // 2
+        while n != 0:
+            x = rmul(x, x)
+            if n % 2 != 0:
+                z = rmul(z, x)
+            n = n // 2
+
+        return z
+
+    def test_rpow(self):
+        # given
+        five_percent = 1000000001547125957863212448
+
+        # expect
+        assert RateAccumulator.rpow(0, 0) == 10 ** 27
+        assert RateAccumulator.rpow(0, 5) == 0
+        assert RateAccumulator.rpow(10 ** 27, 123456789) == 10 ** 27
+        assert RateAccumulator.rpow(five_percent, 0) == 10 ** 27
+        assert RateAccumulator.rpow(five_percent, 1) == five_percent
+        assert abs(RateAccumulator.rpow(five_percent, 365 * 24 * 60 * 60) - Ray.from_number(1.05).value) < 10 ** 18
+        for n in [2, 3, 17, 1000, 86399, 31536001]:
+            assert RateAccumulator.rpow(five_percent, n) == self.rpow_reference(five_percent, n)
+
+    def test_rpow_should_fail_on_overflow(self):
+        with pytest.raises(ValueError):
+            RateAccumulator.rpow(2 ** 200, 2)
+
+    def test_at(self):
+        # given
+        accumulator = RateAccumulator(value=Ray.from_number(1.5), factor=Ray(1000000001547125957863212448),
+                                      rho=1000000)
+
+        # expect
+        assert accumulator.at(1000000) == Ray.from_number(1.5)
+        assert accumulator.at(1000010) == Ray(RateAccumulator.rpow(1000000001547125957863212448, 10)
+                                              * Ray.from_number(1.5).value // 10 ** 27)
+        assert accumulator.at(1000000 + 365 * 24 * 60 * 60) > Ray.from_number(1.5749)
+
+        with pytest.raises(ValueError):
+            accumulator.at(999999)
+
+    def test_jug_and_pot_accumulators(self):
+        # given
+        jug_address, vat_address, pot_address = '0x' + '33' * 20, '0x' + '11' * 20, '0x' + '44' * 20
+        results = {(jug_address, 'vat'): ['address', vat_address],
+                   (jug_address, 'vow'): ['address', '0x' + '22' * 20],
+                   ('0x' + '22' * 20, 'vat'): ['address', vat_address],
+                   (jug_address, 'base'): ['uint256', 10 ** 9],
+                   (jug_address, 'ilks'): ['(uint256,uint256)', (10 ** 27, 1500)],
+                   (vat_address, 'ilks'): ['(uint256,uint256,uint256,uint256,uint256)',
+                                           (0, Ray.from_number(1.2).value, 0, 0, 0)],
+                   (pot_address, 'chi'): ['uint256', Ray.from_number(1.01).value],
+                   (pot_address, 'dsr'): ['uint256', 10 ** 27 + 10 ** 8],
+                   (pot_address, 'rho'): ['uint256', 2500]}
+        selectors = {'0x' + ContractStub.for_abi(Jug.abi).function(name).selector.hex(): name
+                     for name in ['vat', 'vow', 'base', 'ilks']}
+        selectors.update({'0x' + ContractStub.for_abi(Pot.abi).function(name).selector.hex(): name
+                          for name in ['chi', 'dsr', 'rho']})
+
+        def call(params):
+            key = (params[0]['to'].lower(), selectors[params[0]['data'][:10]])
+            return '0x' + encode_single(*results[key]).hex()
+
+        provider = StubProvider({'eth_blockNumber': 42, 'eth_call': call})
+        jug = Jug(Web3(provider), Address(jug_address))
+        pot = Pot(Web3(provider), Address(pot_address))
+
+        # when
+        rate = jug.accumulator(Ilk('ETH-A'))
+        chi = pot.accumulator(block_identifier=40)
+
+        # then
+        assert rate.value == Ray.from_number(1.2)
+        assert rate.factor == Ray(10 ** 27 + 10 ** 9)
+        assert rate.rho == 1500
+        assert chi.value == Ray.from_number(1.01)
+        assert chi.factor == Ray(10 ** 27 + 10 ** 8)
+        assert chi.rho == 2500
+        assert [params[1] for params in provider.requests_of('eth_call')[-6:]] == [hex(42)] * 3 + [hex(40)] * 3
+
+
 class TestJug:
     def test_getters(self, mcd):
         c = mcd.collaterals['ETH-A']
@@ -527,6 +1010,36 @@ class TestJug:
         # then
         assert mcd.jug.drip(c.ilk).transact()
 
+    def test_accumulator(self, web3, mcd):
+        # given
+        c = mcd.collaterals['ETH-A']
+        accumulator = mcd.jug.accumulator(c.ilk)
+
+        # when
+        receipt = mcd.jug.drip(c.ilk).transact()
+
+        # then
+        timestamp = web3.eth.getBlock(receipt.raw_receipt['blockNumber'])['timestamp']
+        assert accumulator.at(timestamp) == mcd.vat.ilk(c.ilk.name).rate
+        assert mcd.jug.rho(c.ilk) == timestamp
+
+    def test_maintenance(self, web3, mcd):
+        # given
+        tx = TxManager.deploy(web3)
+        ilks = [collateral.ilk for collateral in mcd.collaterals.values()]
+
+        # when
+        transacts = mcd.maintenance(tx, eras=[1])
+
+        # then
+        assert len(transacts) == 1
+        receipt = transacts[0].transact()
+        assert receipt is not None
+
+        # and
+        timestamp = web3.eth.getBlock(receipt.raw_receipt['blockNumber'])['timestamp']
+        assert all(mcd.jug.rho(ilk) == timestamp for ilk in ilks)
+
 
 class TestPot:
     def test_getters(self, mcd):
@@ -541,6 +1054,17 @@ class TestPot:
     def test_drip(self, mcd):
         assert mcd.pot.drip().transact()
 
+    def test_accumulator(self, web3, mcd):
+        # given
+        accumulator = mcd.pot.accumulator()
+
+        # when
+        receipt = mcd.pot.drip().transact()
+
+        # then
+        timestamp = web3.eth.getBlock(receipt.raw_receipt['blockNumber'])['timestamp']
+        assert accumulator.at(timestamp) == mcd.pot.chi()
+
 
 class TestMcd:
     def test_healthy_cdp(self, web3, mcd, our_address):
@@ -15,16 +15,24 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import json
+import os
+import shutil
+import sys
+import tempfile
+
 import pytest
 from mock import Mock
 from web3 import Web3, HTTPProvider
 
 from pymaker import Address
 from pymaker.approval import directly
-from pymaker.etherdelta import EtherDelta, EtherDeltaApi
+from pymaker.etherdelta import EtherDelta, EtherDeltaApi, EtherDeltaState, Order
 from pymaker.numeric import Wad
 from pymaker.token import DSToken
-from tests.helpers import is_hashable, wait_until_mock_called
+from pymaker.stub import ContractStub
+from pymaker.util import bytes_to_hexstring
+from tests.helpers import is_hashable, wait_until_mock_called, StubProvider, encode_log, eth_call_responder
 
 PAST_BLOCKS = 100
 
@@ -172,6 +180,44 @@ class TestEtherDelta:
         assert past_trade[0].give_amount == Wad.from_number(1.5)
         assert past_trade[0].raw['blockNumber'] > 0
 
+    def test_state(self):
+        # given
+        self.etherdelta.approve([self.token1, self.token2], directly())
+        self.etherdelta.deposit_token(self.token1.address, Wad.from_number(10)).transact()
+        self.etherdelta.deposit_token(self.token2.address, Wad.from_number(10)).transact()
+        order = self.etherdelta.create_order(pay_token=self.token1.address, pay_amount=Wad.from_number(2),
+                                             buy_token=self.token2.address, buy_amount=Wad.from_number(4),
+                                             expires=100000000)
+
+        # and
+        state = EtherDeltaState(self.etherdelta, self.web3.eth.blockNumber)
+        state.update()
+
+        # expect
+        assert state.amount_available(order) == Wad.from_number(4)
+        assert state.amount_filled(order) == Wad.from_number(0)
+
+        # when
+        self.etherdelta.trade(order, Wad.from_number(1.5)).transact()
+        self.etherdelta.withdraw_token(self.token1.address, Wad.from_number(9.3)).transact()
+        state.update()
+
+        # then
+        assert state.amount_available(order) == self.etherdelta.amount_available(order) == Wad.from_number(1.4)
+        assert state.amount_filled(order) == self.etherdelta.amount_filled(order) == Wad.from_number(1.5)
+        for token in [self.token1, self.token2]:
+            for user in [self.our_address, self.etherdelta.fee_account()]:
+                assert state.balance_of_token(token.address, user) == \
+                       self.etherdelta.balance_of_token(token.address, user)
+
+        # when
+        self.etherdelta.cancel_order(order).transact()
+        state.update()
+
+        # then
+        assert state.amount_available(order) == Wad.from_number(0)
+        assert state.amount_filled(order) == Wad.from_number(4)
+
     def test_order_comparison(self):
         # given
         order1 = self.etherdelta.create_order(pay_token=self.token1.address, pay_amount=Wad.from_number(2),
@@ -201,6 +247,177 @@ class TestEtherDelta:
         assert repr(self.etherdelta) == f"EtherDelta('{self.etherdelta.address}')"
 
 
+class TestEtherDeltaState:
+    ether_delta_address = '0x8d12a197cb00d4747a1fe03395095ce2a5cc6819'
+    fee_account = Address('0x8888877777666665555544444111110000099999')
+    maker = Address('0x0000000000000000000000000000000000000001')
+    taker = Address('0x0000000000000000000000000000000000000002')
+    token1 = Address('0x0101010101010101010101010101010101010101')
+    token2 = Address('0x0202020202020202020202020202020202020202')
+
+    def setup_method(self):
+        self.block_number = 10
+        self.logs = []
+        self.transactions = {}
+        self.balances = {}
+        self.fills = {}
+        self.provider = StubProvider({'eth_blockNumber': lambda params: hex(self.block_number),
+                                      'eth_getLogs': lambda params: self.logs,
+                                      'eth_call': eth_call_responder(EtherDelta.abi, {
+                                          'feeMake': lambda: Wad.from_number(0.01).value,
+                                          'feeTake': lambda: Wad.from_number(0.02).value,
+                                          'feeAccount': lambda: self.fee_account.address,
+                                          'accountLevelsAddr': lambda: '0x' + '00' * 20,
+                                          'balanceOf': lambda token, user:
+                                              self.balances.get((token.lower(), user.lower()), 0),
+                                          'orderFills': lambda user, order_hash:
+                                              self.fills.get((user.lower(), order_hash), 0)}),
+                                      'eth_getTransactionByHash': lambda params: self.transactions.get(params[0])})
+        self.ether_delta = EtherDelta(Web3(self.provider), Address(self.ether_delta_address))
+        self.state = EtherDeltaState(self.ether_delta, 5)
+
+        self.order = Order(ether_delta=self.ether_delta, maker=self.maker, pay_token=self.token1,
+                           pay_amount=Wad.from_number(5), buy_token=self.token2, buy_amount=Wad.from_number(10),
+                           expires=100, nonce=1234, v=27, r=bytes(32), s=bytes(32))
+        self.order_hash = self.ether_delta._order_hash(self.token2, Wad.from_number(10), self.token1,
+                                                       Wad.from_number(5), 100, 1234)
+
+    def log(self, name: str, **args):
+        event_abi = [member for member in EtherDelta.abi if member.get('name') == name][0]
+        self.logs.append(encode_log(event_abi, args, self.ether_delta_address, self.block_number, len(self.logs)))
+
+    def trade(self, amount: Wad, to: str = ether_delta_address):
+        self.log('Trade', tokenGet=self.token2.address, amountGet=amount.value,
+                 tokenGive=self.token1.address, amountGive=amount.value // 2,
+                 get=self.maker.address, give=self.taker.address)
+
+        trade = ContractStub.for_abi(EtherDelta.abi).function('trade')
+        transaction_hash = bytes_to_hexstring(bytes(self.logs[-1]['transactionHash']))
+        self.transactions[transaction_hash] = {
+            'hash': transaction_hash, 'from': self.taker.address, 'to': to,
+            'input': bytes_to_hexstring(trade.encode([self.token2.address, Wad.from_number(10).value,
+                                                      self.token1.address, Wad.from_number(5).value, 100, 1234,
+                                                      self.maker.address, 27, bytes(32), bytes(32), amount.value]))}
+
+    def test_should_track_deposits_and_withdrawals(self):
+        # given
+        self.log('Deposit', token=self.token1.address, user=self.maker.address, amount=3, balance=3)
+        self.log('Withdraw', token=self.token1.address, user=self.maker.address, amount=1, balance=2)
+
+        # when
+        self.state.update()
+
+        # then
+        assert self.state.last_block == 10
+        assert self.state.balance_of_token(self.token1, self.maker) == Wad(2)
+        assert len(self.provider.requests_of('eth_call')) == 4
+
+    def test_should_read_unknown_values_once_at_the_last_block(self):
+        # given
+        self.balances[(self.token1.address, self.maker.address)] = Wad.from_number(2).value
+        self.state.update()
+
+        # when
+        available = [self.state.amount_available(self.order) for _ in range(10)]
+
+        # then
+        assert available == [Wad.from_number(4)] * 10
+        assert [call[1] for call in self.provider.requests_of('eth_call')[4:]] == [hex(10), hex(10)]
+
+    def test_should_apply_trades(self):
+        # given
+        self.log('Deposit', token=self.token1.address, user=self.maker.address,
+                 amount=Wad.from_number(5).value, balance=Wad.from_number(5).value)
+        self.log('Deposit', token=self.token2.address, user=self.taker.address,
+                 amount=Wad.from_number(5).value, balance=Wad.from_number(5).value)
+        for user in [self.maker, self.fee_account]:
+            self.log('Deposit', token=self.token2.address, user=user.address, amount=0, balance=0)
+        self.log('Deposit', token=self.token1.address, user=self.taker.address, amount=0, balance=0)
+        self.state.update()
+        assert self.state.amount_filled(self.order) == Wad(0)
+
+        # when
+        self.block_number = 11
+        self.trade(Wad.from_number(3))
+        self.state.update()
+
+        # then
+        assert self.state.amount_filled(self.order) == Wad.from_number(3)
+        assert self.state.amount_available(self.order) == Wad.from_number(7)
+        assert self.state.balance_of_token(self.token1, self.maker) == Wad.from_number(3.5)
+        assert self.state.balance_of_token(self.token1, self.taker) == Wad.from_number(1.5)
+        assert self.state.balance_of_token(self.token2, self.maker) == Wad.from_number(2.97)
+        assert self.state.balance_of_token(self.token2, self.taker) == Wad.from_number(1.94)
+        assert self.state.balance_of_token(self.token2, self.fee_account) == Wad.from_number(0.09)
+
+        # and
+        assert len(self.provider.requests_of('eth_getTransactionByHash')) == 1
+
+    def test_should_read_fills_again_if_trade_cannot_be_decoded(self):
+        # given
+        self.balances[(self.token1.address, self.maker.address)] = Wad.from_number(5).value
+        self.state.update()
+        assert self.state.amount_filled(self.order) == Wad(0)
+
+        # when
+        self.block_number = 11
+        self.trade(Wad.from_number(3), to='0x' + '99' * 20)
+        self.fills[(self.maker.address, self.order_hash)] = Wad.from_number(3).value
+        self.state.update()
+
+        # then
+        assert self.state.amount_filled(self.order) == Wad.from_number(3)
+        assert self.provider.requests_of('eth_call')[-1][1] == hex(11)
+
+    def test_should_apply_cancels(self):
+        # given
+        self.balances[(self.token1.address, self.maker.address)] = Wad.from_number(5).value
+        self.log('Cancel', tokenGet=self.token2.address, amountGet=Wad.from_number(10).value,
+                 tokenGive=self.token1.address, amountGive=Wad.from_number(5).value, expires=100, nonce=1234,
+                 user=self.maker.address, v=27, r=bytes(32), s=bytes(32))
+
+        # when
+        self.state.update()
+
+        # then
+        assert self.state.amount_filled(self.order) == Wad.from_number(10)
+        assert self.state.amount_available(self.order) == Wad(0)
+
+    def test_should_not_make_calls_per_order(self):
+        # given
+        orders = [Order(ether_delta=self.ether_delta, maker=self.maker, pay_token=self.token1,
+                        pay_amount=Wad.from_number(5), buy_token=self.token2, buy_amount=Wad.from_number(10),
+                        expires=100, nonce=nonce, v=27, r=bytes(32), s=bytes(32)) for nonce in range(100)]
+        self.balances[(self.token1.address, self.maker.address)] = Wad.from_number(2).value
+        self.state.update()
+        [self.state.amount_available(order) for order in orders]
+        number_of_calls = len(self.provider.requests_of('eth_call'))
+
+        # when
+        for block_number in range(11, 21):
+            self.block_number = block_number
+            self.state.update()
+            available = [self.state.amount_available(order) for order in orders]
+
+        # then
+        assert available == [Wad.from_number(4)] * 100
+        assert len(self.provider.requests_of('eth_call')) == number_of_calls
+
+    def test_should_not_make_expired_orders_available(self):
+        # given
+        self.balances[(self.token1.address, self.maker.address)] = Wad.from_number(5).value
+        self.block_number = 101
+
+        # when
+        self.state.update()
+
+        # then
+        assert self.state.amount_available(self.order) == Wad(0)
+
+    def test_should_have_printable_representation(self):
+        assert repr(self.state) == f"EtherDeltaState('{self.ether_delta.address}', from_block=5)"
+
+
 class TestEtherDeltaApi:
     def setup_method(self):
         self.etherdelta_api = EtherDeltaApi(client_tool_directory='some-dir',
@@ -212,3 +429,110 @@ class TestEtherDeltaApi:
 
     def test_should_have_printable_representation(self):
         assert repr(self.etherdelta_api) == f"EtherDeltaApi()"
+
+
+# Stands in for `etherdelta-client --persistent`. Records its startup and every order received
+# in `log.txt`, fails orders with nonce 13 and exits when it receives an order with nonce 66.
+STUB_CLIENT = """
+import json, os, sys
+
+with open('log.txt', 'a') as log:
+    log.write(json.dumps({'pid': os.getpid(), 'args': sys.argv[1:]}) + '\\n')
+
+print('Connected to socket', flush=True)
+for line in sys.stdin:
+    request = json.loads(line)
+    with open('log.txt', 'a') as log:
+        log.write(json.dumps({'pid': os.getpid(), 'nonce': request['order']['nonce']}) + '\\n')
+
+    if request['order']['nonce'] == 66:
+        sys.exit(1)
+
+    success = request['order']['nonce'] != 13
+    print(json.dumps({'id': request['id'], 'success': success, 'message': 'Added/updated order.'}), flush=True)
+"""
+
+
+class TestEtherDeltaApiPublisher:
+    def setup_method(self):
+        self.directory = tempfile.mkdtemp()
+        with open(os.path.join(self.directory, 'client.py'), 'w') as file:
+            file.write(STUB_CLIENT)
+
+        self.ether_delta = Mock()
+        self.ether_delta.address = Address('0x11223344556600000000000000000000000000ff')
+        self.etherdelta_api = EtherDeltaApi(client_tool_directory=self.directory,
+                                            client_tool_command=f"{sys.executable} client.py",
+                                            api_server='https://127.0.0.1:66666',
+                                            number_of_attempts=2,
+                                            retry_interval=15,
+                                            timeout=10)
+
+    def teardown_method(self):
+        self.etherdelta_api.close()
+        shutil.rmtree(self.directory)
+
+    def log(self):
+        with open(os.path.join(self.directory, 'log.txt')) as file:
+            return [json.loads(line) for line in file]
+
+    def order(self, nonce: int) -> Order:
+        return Order(ether_delta=self.ether_delta, maker=Address('0x0000000000000000000000000000000000000001'),
+                     pay_token=Address('0x0101010101010101010101010101010101010101'), pay_amount=Wad(1),
+                     buy_token=Address('0x0202020202020202020202020202020202020202'), buy_amount=Wad(2),
+                     expires=100, nonce=nonce, v=27, r=bytes(32), s=bytes(32))
+
+    def test_should_publish_orders_using_one_process(self):
+        # when
+        futures = [self.etherdelta_api.publish_order(self.order(nonce)) for nonce in range(100, 120)]
+
+        # then
+        assert [future.result(timeout=30) for future in futures] == [True] * 20
+
+        # and
+        log = self.log()
+        assert len(set(entry['pid'] for entry in log)) == 1
+        assert log[0]['args'] == ['--url', 'https://127.0.0.1:66666', '--timeout', '10', '--retry-interval', '15',
+                                  '--persistent']
+        assert [entry['nonce'] for entry in log[1:]] == list(range(100, 120))
+
+    def test_should_retry_failed_orders(self):
+        # when
+        futures = [self.etherdelta_api.publish_order(self.order(nonce)) for nonce in [12, 13, 14]]
+
+        # then
+        assert [future.result(timeout=30) for future in futures] == [True, False, True]
+        assert [entry['nonce'] for entry in self.log()[1:]] == [12, 13, 13, 14]
+
+    def test_should_restart_the_process_if_it_exits(self):
+        # when
+        futures = [self.etherdelta_api.publish_order(self.order(nonce)) for nonce in [1, 66, 2]]
+
+        # then
+        assert [future.result(timeout=30) for future in futures] == [True, False, True]
+        assert len(set(entry['pid'] for entry in self.log())) == 3
+
+    def test_should_start_the_process_only_once(self):
+        # when
+        futures = [self.etherdelta_api.publish_order(self.order(nonce)) for nonce in range(100, 200)]
+
+        # then
+        assert all(future.result(timeout=30) for future in futures)
+        assert len([entry for entry in self.log() if 'args' in entry]) == 1
+
+    def test_should_fail_orders_if_the_process_can_not_be_started(self):
+        # given
+        self.etherdelta_api.client_tool_command = 'nonexistent-etherdelta-client'
+
+        # when
+        futures = [self.etherdelta_api.publish_order(self.order(nonce))
+                   for nonce in range(EtherDeltaApi.queue_size + 10)]
+
+        # then
+        assert all(future.result(timeout=30) is False for future in futures)
+
+        # when
+        self.etherdelta_api.client_tool_command = f"{sys.executable} client.py"
+
+        # then
+        assert self.etherdelta_api.publish_order(self.order(1)).result(timeout=30) is True
@@ -17,6 +17,7 @@
 
 import pytest
 from hexbytes import HexBytes
+from web3.exceptions import InvalidAddress
 
 from pymaker import Address, Calldata, Receipt, Transfer
 from pymaker.numeric import Wad
@@ -157,6 +158,54 @@ class TestCalldata:
         # expect
         assert calldata2a == calldata2b
 
+    def test_from_signature_should_reuse_compiled_signature(self):
+        # given
+        Calldata.from_signature('transfer(address,uint256)', ['0x11223344556600000000000000000000000000ff', 123])
+        compiled = Calldata._compiled_signatures['transfer(address,uint256)']
+
+        # when
+        Calldata.from_signature('transfer(address,uint256)', ['0x11223344556600000000000000000000000000ff', 456])
+
+        # then
+        assert Calldata._compiled_signatures['transfer(address,uint256)'] is compiled
+
+    def test_from_signature_with_bytes_and_string(self):
+        # given
+        calldata1a = Calldata('0x4b40ebd8'  # function 4byte signature
+                              '1111111111111111111111111111111111111111111111111111111111111111'
+                              '0000000000000000000000000000000000000000000000000000000000000040'
+                              '0000000000000000000000000000000000000000000000000000000000000003'
+                              '6162630000000000000000000000000000000000000000000000000000000000')
+        calldata1b = Calldata.from_signature('f(bytes32,string)', ['0x' + '11' * 32, 'abc'])
+
+        # expect
+        assert calldata1a == calldata1b
+
+    def test_from_signature_should_fail_on_wrong_number_of_arguments(self):
+        with pytest.raises(TypeError):
+            Calldata.from_signature('transfer(address,uint256)', ['0x11223344556600000000000000000000000000ff'])
+
+    def test_from_signature_should_reject_invalid_address(self):
+        with pytest.raises(InvalidAddress):
+            Calldata.from_signature('transfer(address,uint256)', ['0x11223344556600000000000000000000000000FF', 123])
+
+        with pytest.raises(InvalidAddress):
+            Calldata.encode_many('transfer(address,uint256)', [['0x1122334455', 123]])
+
+    def test_encode_many(self):
+        # given
+        rows = [['0x11223344556600000000000000000000000000ff', value] for value in range(100)]
+
+        # when
+        calldatas = Calldata.encode_many('transfer(address,uint256)', rows)
+
+        # then
+        assert calldatas == [Calldata.from_signature('transfer(address,uint256)', row) for row in rows]
+        assert calldatas[46] == Calldata('0xa9059cbb'
+                                   '00000000000000000000000011223344556600000000000000000000000000ff'
+                                   '000000000000000000000000000000000000000000000000000000000000002e')
+
+
 class TestReceipt:
     @pytest.fixture()
     def receipt_success(self) -> dict:
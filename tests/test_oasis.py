@@ -18,16 +18,19 @@ from typing import List
 from unittest.mock import Mock
 
 import pytest
+import threading
 import time
 from web3 import HTTPProvider
 from web3 import Web3
 
-from pymaker import Address, Wad, Contract
-from pymaker.approval import directly
-from pymaker.oasis import SimpleMarket, ExpiringMarket, MatchingMarket, Order
+from pymaker import Address, Wad, Contract, Receipt
+from pymaker.approval import directly, via_tx_manager
+from pymaker.oasis import SimpleMarket, ExpiringMarket, MatchingMarket, Order, OasisOrderBook, BookPage
 from pymaker.token import DSToken
 from pymaker.model import Token
-from tests.helpers import wait_until_mock_called, is_hashable
+from pymaker.transactional import TxManager
+from pymaker.stub import ContractStub
+from tests.helpers import wait_until_mock_called, is_hashable, StubProvider, encode_log, eth_call_responder
 
 PAST_BLOCKS = 100
 
@@ -485,6 +488,78 @@ class GeneralMarketTest:
         assert past_kill[0].raw['blockNumber'] > 0
 
 
+    def test_order_book(self):
+
+        if isinstance(self.otc, MatchingMarket):
+            pay_val = self.token1_tokenclass
+            buy_val = self.token2_tokenclass
+        else:
+            pay_val = self.token1.address
+            buy_val = self.token2.address
+
+        # given
+        self.otc.approve([self.token1, self.token2], directly())
+        self.otc.make(pay_val, Wad.from_number(1), buy_val, Wad.from_number(2)).transact()
+        self.otc.make(pay_val, Wad.from_number(1), buy_val, Wad.from_number(4)).transact()
+
+        # and
+        order_book = OasisOrderBook(self.otc)
+        order_book.update()
+
+        # expect
+        assert order_book.get_orders() == self.otc.get_orders()
+
+        # when
+        self.otc.make(pay_val, Wad.from_number(1), buy_val, Wad.from_number(3)).transact()
+        self.otc.take(1, Wad.from_number(0.25)).transact()
+        self.otc.kill(2).transact()
+        self.otc.bump(3).transact()
+        order_book.update()
+
+        # then
+        assert order_book.get_orders() == self.otc.get_orders()
+        assert order_book.get_order(1).pay_amount == Wad.from_number(0.75)
+        assert order_book.get_order(1).buy_amount == Wad.from_number(1.5)
+        assert order_book.get_order(2) is None
+        assert order_book.get_orders(self.token1.address, self.token2.address) == [self.otc.get_order(1),
+                                                                                   self.otc.get_order(3)]
+        assert order_book.get_orders_by_maker(self.our_address) == self.otc.get_orders_by_maker(self.our_address)
+
+    def test_make_many_and_kill_many(self):
+
+        if isinstance(self.otc, MatchingMarket):
+            pay_val = self.token1_tokenclass
+            buy_val = self.token2_tokenclass
+        else:
+            pay_val = self.token1.address
+            buy_val = self.token2.address
+
+        # given
+        tx = TxManager.deploy(self.web3)
+        tx.approve([self.token1, self.token2], directly())
+        self.otc.approve([self.token1, self.token2], via_tx_manager(tx))
+
+        # when
+        receipts = [transact.transact() for transact in self.otc.make_many(tx, [
+            (pay_val, Wad.from_number(1), buy_val, Wad.from_number(2)),
+            (pay_val, Wad.from_number(1), buy_val, Wad.from_number(3))])]
+
+        # then
+        order_ids = [log_make.order_id for receipt in receipts for log_make in receipt.result]
+        assert len(order_ids) == 2
+        assert all(self.otc.get_order(order_id).maker == tx.address for order_id in order_ids)
+        assert self.token1.balance_of(tx.address) == Wad(0)
+
+        # when
+        balance_before = self.token1.balance_of(self.our_address)
+        receipts = [transact.transact() for transact in self.otc.kill_many(tx, order_ids)]
+
+        # then
+        assert [log_kill.order_id for receipt in receipts for log_kill in receipt.result] == order_ids
+        assert self.otc.get_orders() == []
+        assert self.token1.balance_of(self.our_address) == balance_before + Wad.from_number(2)
+
+
 class TestSimpleMarket(GeneralMarketTest):
     def setup_method(self):
         GeneralMarketTest.setup_method(self)
@@ -700,6 +775,16 @@ class TestMatchingMarketPosition:
         assert self.otc.position(p_token=self.token1_tokenclass, pay_amount=Wad.from_number(1),
                                  b_token=self.token2_tokenclass, buy_amount=Wad.from_number(35)) == 4
 
+    def test_should_calculate_correct_order_position_using_order_book(self):
+        # given
+        order_book = OasisOrderBook(self.otc)
+        order_book.update()
+        self.otc.use_order_book(order_book)
+
+        # expect
+        assert self.otc.position(p_token=self.token1_tokenclass, pay_amount=Wad.from_number(1),
+                                 b_token=self.token2_tokenclass, buy_amount=Wad.from_number(35)) == 4
+
     @pytest.mark.skip(reason="Works unreliably with ganache-cli")
     def test_should_use_correct_order_position_by_default(self):
         # when
@@ -743,3 +828,488 @@ class TestMatchingMarketPosition:
         # then
         assert gas_used_optimal < gas_used_minus_1
         assert gas_used_optimal < gas_used_plus_1
+
+
+def offer_values(offer: tuple) -> list:
+    """Result of `offers(id)` for a `(pay_amount, pay_token, buy_amount, buy_token, maker, timestamp)` tuple."""
+    return [offer[0].value, offer[1].address, offer[2].value, offer[3].address, offer[4].address, offer[5]]
+
+
+class TestOasisOrderBook:
+    market_address = '0x11223344556600000000000000000000000000ff'
+    maker1 = Address('0x0000000000000000000000000000000000000001')
+    maker2 = Address('0x0000000000000000000000000000000000000002')
+    taker = Address('0x0000000000000000000000000000000000000003')
+    token1 = Address('0x000000000000000000000000000000000000000a')
+    token2 = Address('0x000000000000000000000000000000000000000b')
+    token3 = Address('0x000000000000000000000000000000000000000c')
+
+    def setup_method(self):
+        # order 1 and 2 are active, order 3 has been cancelled before the order book gets bootstrapped
+        self.offers = {1: (Wad.from_number(1), self.token1, Wad.from_number(2), self.token2, self.maker1, 1),
+                       2: (Wad.from_number(1), self.token1, Wad.from_number(3), self.token3, self.maker2, 1),
+                       3: (Wad(0), self.token1, Wad(0), self.token2, Address('0x' + '00' * 20), 0)}
+        self.block_number = 10
+        self.logs = []
+
+        self.provider = StubProvider({'eth_blockNumber': lambda params: hex(self.block_number),
+                                      'eth_call': eth_call_responder(SimpleMarket.abi, {
+                                          'last_offer_id': lambda: len(self.offers),
+                                          'offers': lambda id: offer_values(self.offers[id])}),
+                                      'eth_getLogs': lambda params: self.logs})
+        self.market = SimpleMarket(Web3(self.provider), Address(self.market_address))
+        self.order_book = OasisOrderBook(self.market)
+
+    def log(self, name: str, order_id: int, maker: Address, pay_token: Address, buy_token: Address, **kwargs):
+        event_abi = [member for member in SimpleMarket.abi if member.get('name') == name][0]
+        args = {'id': order_id.to_bytes(32, 'big'), 'pair': bytes(32), 'maker': maker.address,
+                'pay_gem': pay_token.address, 'buy_gem': buy_token.address, 'taker': self.taker.address,
+                'pay_amt': 0, 'buy_amt': 0, 'take_amt': 0, 'give_amt': 0, 'timestamp': 2, **kwargs}
+
+        self.logs.append(encode_log(event_abi, args, self.market_address, self.block_number, len(self.logs)))
+
+    def test_should_bootstrap_from_the_market(self):
+        # when
+        self.order_book.update()
+
+        # then
+        assert self.order_book.last_block == 10
+        assert [order.order_id for order in self.order_book.get_orders()] == [1, 2]
+        assert self.order_book.get_order(1).pay_amount == Wad.from_number(1)
+        assert self.order_book.get_order(1).buy_amount == Wad.from_number(2)
+        assert self.order_book.get_order(1).maker == self.maker1
+        assert self.order_book.get_order(3) is None
+
+        # and
+        assert all(params[1] == hex(10) for params in self.provider.requests_of('eth_call'))
+
+    def test_should_apply_events(self):
+        # given
+        self.order_book.update()
+
+        # when
+        self.block_number = 11
+        self.log('LogMake', 4, self.maker1, self.token1, self.token2,
+                 pay_amt=Wad.from_number(5).value, buy_amt=Wad.from_number(7).value)
+        self.log('LogTake', 1, self.maker1, self.token1, self.token2,
+                 take_amt=Wad.from_number(0.25).value, give_amt=Wad.from_number(0.5).value)
+        self.log('LogKill', 2, self.maker2, self.token1, self.token3)
+        self.log('LogBump', 4, self.maker1, self.token1, self.token2,
+                 pay_amt=Wad.from_number(5).value, buy_amt=Wad.from_number(7).value)
+        self.order_book.update()
+
+        # then
+        assert self.order_book.last_block == 11
+        assert [order.order_id for order in self.order_book.get_orders()] == [1, 4]
+        assert self.order_book.get_order(1).pay_amount == Wad.from_number(0.75)
+        assert self.order_book.get_order(1).buy_amount == Wad.from_number(1.5)
+        assert self.order_book.get_order(4).pay_amount == Wad.from_number(5)
+        assert self.order_book.get_order(4).buy_amount == Wad.from_number(7)
+        assert self.order_book.get_order(4).timestamp == 2
+
+        # and
+        assert [order.order_id for order in self.order_book.get_orders(self.token1, self.token2)] == [1, 4]
+        assert self.order_book.get_orders(self.token1, self.token3) == []
+        assert [order.order_id for order in self.order_book.get_orders_by_maker(self.maker1)] == [1, 4]
+        assert self.order_book.get_orders_by_maker(self.maker2) == []
+
+        # and
+        assert self.provider.requests_of('eth_getLogs')[0][0]['fromBlock'] == hex(11)
+        assert self.provider.requests_of('eth_getLogs')[0][0]['toBlock'] == hex(11)
+
+    def test_should_remove_completely_taken_orders(self):
+        # given
+        self.order_book.update()
+
+        # when
+        self.block_number = 11
+        self.log('LogTake', 1, self.maker1, self.token1, self.token2,
+                 take_amt=Wad.from_number(1).value, give_amt=Wad.from_number(2).value)
+        self.order_book.update()
+
+        # then
+        assert self.order_book.get_order(1) is None
+        assert [order.order_id for order in self.order_book.get_orders()] == [2]
+        assert self.order_book.get_orders_by_maker(self.maker1) == []
+
+    def test_should_not_query_logs_if_no_new_blocks(self):
+        # given
+        self.order_book.update()
+
+        # when
+        self.order_book.update()
+
+        # then
+        assert self.provider.requests_of('eth_getLogs') == []
+
+
+class TestOasisOrderBookPosition:
+    market_address = '0x11223344556600000000000000000000000000ff'
+    maker = Address('0x0000000000000000000000000000000000000001')
+    token1 = Token('AAA', Address('0x000000000000000000000000000000000000000a'), 18)
+    token2 = Token('BBB', Address('0x000000000000000000000000000000000000000b'), 18)
+
+    def setup_method(self):
+        self.offers = [(Wad.from_number(1), self.token1.address, Wad.from_number(amount), self.token2.address,
+                        self.maker, 1) for amount in [11, 55, 44, 34, 36, 21, 45, 51, 15]]
+        self.block_number = 10
+
+        self.provider = StubProvider({'eth_blockNumber': lambda params: hex(self.block_number),
+                                      'eth_call': eth_call_responder(MatchingMarket.abi, {
+                                          'last_offer_id': lambda: len(self.offers),
+                                          'offers': lambda id: offer_values(self.offers[id - 1])}),
+                                      'eth_getLogs': []})
+        self.market = MatchingMarket(Web3(self.provider), Address(self.market_address))
+        self.order_book = OasisOrderBook(self.market)
+
+    def position(self, buy_amount: Wad):
+        return self.market.position(p_token=self.token1, pay_amount=Wad.from_number(1),
+                                    b_token=self.token2, buy_amount=buy_amount)
+
+    def test_should_calculate_position(self):
+        # given
+        self.order_book.update()
+
+        # expect
+        assert self.order_book.position(self.token1.address, Wad.from_number(1),
+                                        self.token2.address, Wad.from_number(35)) == 4
+        assert self.order_book.position(self.token1.address, Wad.from_number(1),
+                                        self.token2.address, Wad.from_number(34)) == 4
+        assert self.order_book.position(self.token1.address, Wad.from_number(1),
+                                        self.token2.address, Wad.from_number(5)) == 0
+        assert self.order_book.position(self.token1.address, Wad.from_number(1),
+                                        self.token2.address, Wad.from_number(100)) == 2
+        assert self.order_book.position(self.token2.address, Wad.from_number(1),
+                                        self.token1.address, Wad.from_number(1)) == 0
+
+    def test_should_resolve_equal_prices_in_favour_of_older_orders(self):
+        # given
+        self.offers.append((Wad.from_number(2), self.token1.address, Wad.from_number(68), self.token2.address,
+                            self.maker, 1))
+        self.order_book.update()
+
+        # expect
+        assert self.order_book.position(self.token1.address, Wad.from_number(1),
+                                        self.token2.address, Wad.from_number(35)) == 4
+
+    def test_should_not_return_position_if_stale(self):
+        # expect
+        assert self.order_book.position(self.token1.address, Wad.from_number(1),
+                                        self.token2.address, Wad.from_number(35)) is None
+
+        # when
+        self.order_book.update()
+
+        # then
+        assert self.order_book.position(self.token1.address, Wad.from_number(1),
+                                        self.token2.address, Wad.from_number(35), 10) == 4
+        assert self.order_book.position(self.token1.address, Wad.from_number(1),
+                                        self.token2.address, Wad.from_number(35), 11) is None
+
+    def test_market_should_use_order_book(self):
+        # given
+        self.order_book.update()
+        self.market.use_order_book(self.order_book)
+        self.market.get_orders = Mock()
+
+        # expect
+        assert self.position(Wad.from_number(35)) == 4
+        assert self.market.get_orders.call_count == 0
+
+    def test_market_should_fall_back_if_order_book_stale(self):
+        # given
+        self.order_book.update()
+        self.market.use_order_book(self.order_book, max_lag=1)
+        self.market.get_orders = Mock(return_value=self.order_book.get_orders())
+
+        # when
+        self.block_number = 11
+
+        # then
+        assert self.position(Wad.from_number(35)) == 4
+        assert self.market.get_orders.call_count == 0
+
+        # when
+        self.block_number = 12
+
+        # then
+        assert self.position(Wad.from_number(35)) == 4
+        assert self.market.get_orders.call_count == 1
+
+    def test_should_keep_price_levels_in_sync(self):
+        # given
+        self.order_book.update()
+
+        # when
+        self.order_book._remove(4)
+
+        # then
+        assert self.order_book.position(self.token1.address, Wad.from_number(1),
+                                        self.token2.address, Wad.from_number(35)) == 6
+
+    def test_positions_should_not_query_the_node(self):
+        # given
+        self.offers = [(Wad.from_number(1), self.token1.address, Wad.from_number(amount), self.token2.address,
+                        self.maker, 1) for amount in range(1, 1001)]
+        self.order_book.update()
+        self.market.use_order_book(self.order_book)
+
+        # and
+        calls_before = len(self.provider.requests_of('eth_call'))
+        block_numbers_before = len(self.provider.requests_of('eth_blockNumber'))
+
+        # when
+        for amount in range(500, 520):
+            assert self.position(Wad.from_number(amount + 0.5)) == amount
+
+        # then
+        assert calls_before == 1001
+        assert len(self.provider.requests_of('eth_call')) == calls_before
+        assert len(self.provider.requests_of('eth_blockNumber')) == block_numbers_before + 20
+
+
+class TestMatchingMarketGetBooks:
+    market_address = '0x11223344556600000000000000000000000000ff'
+    support_address = '0x11223344556600000000000000000000000000fe'
+    maker = '0x0000000000000000000000000000000000000001'
+    token1 = Token('AAA', Address('0x000000000000000000000000000000000000000a'), 18)
+    token2 = Token('BBB', Address('0x000000000000000000000000000000000000000b'), 18)
+    token3 = Token('CCC', Address('0x000000000000000000000000000000000000000c'), 6)
+
+    def setup_method(self):
+        # sorted order lists of each pair, from the best to the worst order
+        self.books = {(self.token1.address, self.token2.address): list(range(1, 151)),
+                      (self.token2.address, self.token1.address): [151, 152, 153],
+                      (self.token1.address, self.token3.address): [],
+                      (self.token3.address, self.token1.address): [154]}
+        self.eth_call = eth_call_responder(MatchingMarket.abi_support + MatchingMarket.abi, {
+            'getOffers(address,address,address)': lambda market, pay_token, buy_token:
+                self.offers_from(self.books[(Address(pay_token), Address(buy_token))], 0),
+            'getOffers(address,uint256)': lambda market, order_id:
+                self.offers_from(self.book_of(order_id), self.book_of(order_id).index(order_id)),
+            'getWorseOffer': self.worse_offer})
+        self.provider = StubProvider({'eth_call': self.eth_call})
+        self.market = MatchingMarket(Web3(self.provider), Address(self.market_address), Address(self.support_address))
+
+    def offers_from(self, book: list, index: int) -> list:
+        ids = (book[index:index+100] + [0] * 100)[:100]
+        return [ids, [id * 10**18 for id in ids], [2 * id * 10**6 for id in ids],
+                [self.maker if id else '0x' + '00' * 20 for id in ids], [id for id in ids]]
+
+    def book_of(self, order_id: int) -> list:
+        return [book for book in self.books.values() if order_id in book][0]
+
+    def worse_offer(self, order_id: int) -> int:
+        book = self.book_of(order_id)
+        index = book.index(order_id) + 1
+        return book[index] if index < len(book) else 0
+
+    def test_should_fetch_both_sides_of_all_pairs(self):
+        # when
+        pages = list(self.market.get_books([(self.token1, self.token2), (self.token1, self.token3)]))
+
+        # then
+        assert all(isinstance(page, BookPage) for page in pages)
+        assert len([page for page in pages if page.is_last]) == 4
+
+        # and
+        def orders_of(p_token: Token, b_token: Token):
+            return [order for page in pages if page.pay_token == p_token and page.buy_token == b_token
+                    for order in page.orders]
+
+        assert [order.order_id for order in orders_of(self.token1, self.token2)] == list(range(1, 151))
+        assert [order.order_id for order in orders_of(self.token2, self.token1)] == [151, 152, 153]
+        assert orders_of(self.token1, self.token3) == []
+        assert [order.order_id for order in orders_of(self.token3, self.token1)] == [154]
+
+        # and
+        assert orders_of(self.token3, self.token1)[0].pay_amount == Wad.from_number(154 * 10**12)
+        assert orders_of(self.token3, self.token1)[0].buy_amount == Wad(2 * 154 * 10**6)
+        assert orders_of(self.token3, self.token1)[0].maker == Address(self.maker)
+
+    def test_should_stream_pages_of_a_side_in_order(self):
+        # when
+        pages = [page for page in self.market.get_books([(self.token1, self.token2)], both_sides=False)]
+
+        # then
+        assert [len(page.orders) for page in pages] == [100, 50]
+        assert [page.is_last for page in pages] == [False, True]
+        # the second page gets requested after the first one, starting from its last order
+        support_stub = ContractStub.for_abi(MatchingMarket.abi_support)
+        calls = [params[0]['data'][:10] for params in self.provider.requests_of('eth_call')]
+        assert calls[0] == '0x' + support_stub.function('getOffers(address,address,address)').selector.hex()
+        assert calls[-1] == '0x' + support_stub.function('getOffers(address,uint256)').selector.hex()
+
+    def test_should_match_get_orders(self):
+        # when
+        pages = list(self.market.get_books([(self.token2, self.token1)], both_sides=False))
+
+        # then
+        assert pages[0].orders == self.market.get_orders(self.token2, self.token1)
+
+    def test_should_propagate_errors(self):
+        # given
+        del self.books[(self.token3.address, self.token1.address)]
+
+        # expect
+        with pytest.raises(Exception):
+            list(self.market.get_books([(self.token1, self.token3)]))
+
+    def test_should_fetch_pairs_concurrently(self):
+        # given
+        first_calls = threading.Barrier(4, timeout=10)
+        first_call_selector = ContractStub.for_abi(MatchingMarket.abi_support) \
+            .function('getOffers(address,address,address)').selector.hex()
+
+        def blocking_eth_call(params):
+            # the first call of each of the four sides only returns once all of them are in flight
+            if params[0]['data'].startswith('0x' + first_call_selector):
+                first_calls.wait()
+
+            return self.eth_call(params)
+
+        self.provider.responses['eth_call'] = blocking_eth_call
+
+        # when
+        pages = list(self.market.get_books([(self.token1, self.token2), (self.token1, self.token3)], max_workers=4))
+
+        # then
+        assert len([page for page in pages if page.is_last]) == 4
+        assert not first_calls.broken
+
+    def test_should_fetch_pairs_serially_with_one_worker(self):
+        # given
+        lock = threading.Lock()
+        in_flight = []
+        max_in_flight = []
+
+        def tracking_eth_call(params):
+            with lock:
+                in_flight.append(params)
+                max_in_flight.append(len(in_flight))
+            try:
+                return self.eth_call(params)
+            finally:
+                with lock:
+                    in_flight.remove(params)
+
+        self.provider.responses['eth_call'] = tracking_eth_call
+
+        # when
+        list(self.market.get_books([(self.token1, self.token2), (self.token1, self.token3)], max_workers=1))
+
+        # then
+        assert max(max_in_flight) == 1
+
+
+class TestSimpleMarketBulkOrders:
+    market_address = '0x11223344556600000000000000000000000000ff'
+    tx_manager_address = Address('0x00000000000000000000000000000000000000ee')
+    other_maker = Address('0x0000000000000000000000000000000000000001')
+    token1 = Address('0x000000000000000000000000000000000000000a')
+    token2 = Address('0x000000000000000000000000000000000000000b')
+
+    def setup_method(self):
+        # order 3 has been cancelled already, order 4 is not owned by the `TxManager`
+        self.offers = {
+            1: (Wad.from_number(1), self.token1, Wad.from_number(2), self.token2, self.tx_manager_address, 1),
+            2: (Wad.from_number(1), self.token2, Wad.from_number(3), self.token1, self.tx_manager_address, 1),
+            3: (Wad(0), self.token1, Wad(0), self.token2, Address('0x' + '00' * 20), 0),
+            4: (Wad.from_number(1), self.token1, Wad.from_number(2), self.token2, self.other_maker, 1)}
+
+        self.provider = StubProvider({'eth_blockNumber': hex(10),
+                                      'eth_call': eth_call_responder(SimpleMarket.abi, {
+                                          'offers': lambda id: offer_values(self.offers[id])}),
+                                      'eth_estimateGas': self.estimate_gas})
+        self.market = SimpleMarket(Web3(self.provider), Address(self.market_address))
+        self.tx_manager = TxManager(Web3(self.provider), self.tx_manager_address)
+
+    def estimate_gas(self, params):
+        if self.offers[int(params[0]['data'][10:], 16)][4] != Address(params[0]['from']):
+            raise ValueError("gas required exceeds allowance or always failing transaction")
+
+        return 21000 + 50000
+
+    def receipt(self, *logs) -> Receipt:
+        return Receipt({'transactionHash': bytes(32), 'gasUsed': 100000, 'logs': list(logs)})
+
+    def log(self, name: str, order_id: int, maker: Address, pay_token: Address, pay_amount: Wad,
+            buy_token: Address, buy_amount: Wad, log_index: int):
+        event_abi = [member for member in SimpleMarket.abi if member.get('name') == name][0]
+        args = {'id': order_id.to_bytes(32, 'big'), 'pair': bytes(32), 'maker': maker.address,
+                'pay_gem': pay_token.address, 'buy_gem': buy_token.address,
+                'pay_amt': pay_amount.value, 'buy_amt': buy_amount.value, 'timestamp': 2}
+
+        return encode_log(event_abi, args, self.market_address, 10, log_index)
+
+    def test_make_many(self):
+        # given
+        orders = [(self.token1, Wad.from_number(1), self.token2, Wad.from_number(2)) for _ in range(25)]
+
+        # when
+        transacts = self.market.make_many(self.tx_manager, orders, 3000000)
+
+        # then
+        assert [len(transact.parameters[1]) // (20 + 32 + 4 + 4 * 32) for transact in transacts] == [13, 12]
+        assert transacts[0].parameters[0] == [self.token1.address, self.token2.address]
+        assert self.provider.requests_of('eth_estimateGas') == []
+
+    def test_make_many_result(self):
+        # given
+        orders = [(self.token1, Wad.from_number(1), self.token2, Wad.from_number(2)),
+                  (self.token2, Wad.from_number(1), self.token1, Wad.from_number(3)),
+                  (self.token1, Wad.from_number(2), self.token2, Wad.from_number(4))]
+        transact = self.market.make_many(self.tx_manager, orders)[0]
+
+        # when
+        # the second order got completely matched, the third one partially
+        result = transact.result_function(self.receipt(
+            self.log('LogMake', 5, self.tx_manager_address, self.token1, Wad.from_number(1),
+                     self.token2, Wad.from_number(2), 0),
+            self.log('LogMake', 7, self.other_maker, self.token2, Wad.from_number(1),
+                     self.token1, Wad.from_number(2), 1),
+            self.log('LogMake', 6, self.tx_manager_address, self.token1, Wad.from_number(1),
+                     self.token2, Wad.from_number(2), 2)))
+
+        # then
+        assert [log_make.order_id for log_make in result] == [5, 6]
+
+    def test_make_many_result_of_identical_orders(self):
+        # given
+        orders = [(self.token1, Wad.from_number(1), self.token2, Wad.from_number(2)) for _ in range(2)]
+        transact = self.market.make_many(self.tx_manager, orders)[0]
+
+        # when
+        # the first order got completely matched, the second one partially
+        result = transact.result_function(self.receipt(
+            self.log('LogMake', 5, self.tx_manager_address, self.token1, Wad.from_number(0.5),
+                     self.token2, Wad.from_number(1), 0)))
+
+        # then
+        assert len(result) == 1
+        assert result[0].order_id == 5
+        assert result[0].pay_amount == Wad.from_number(0.5)
+
+    def test_kill_many(self):
+        # when
+        transacts = self.market.kill_many(self.tx_manager, [1, 2, 3, 4])
+
+        # then
+        assert len(transacts) == 1
+        assert len(transacts[0].parameters[1]) == 2 * (20 + 32 + 4 + 32)
+        assert transacts[0].parameters[0] == [self.token1.address, self.token2.address]
+        assert all(params[1] == hex(10) for params in self.provider.requests_of('eth_call'))
+
+    def test_kill_many_result(self):
+        # given
+        transact = self.market.kill_many(self.tx_manager, [1, 2])[0]
+
+        # when
+        result = transact.result_function(self.receipt(
+            self.log('LogKill', 2, self.tx_manager_address, self.token2, Wad.from_number(1),
+                     self.token1, Wad.from_number(3), 0)))
+
+        # then
+        assert result[0] is None
+        assert result[1].order_id == 2
+        assert result[1].pay_token == self.token2
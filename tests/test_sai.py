@@ -16,13 +16,18 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import pytest
+from eth_abi import encode_abi
+from hexbytes import HexBytes
+from web3 import Web3
 
 from pymaker import Address
 from pymaker.deployment import Deployment
 from pymaker.feed import DSValue
 from pymaker.numeric import Wad, Ray
-from pymaker.sai import Tub, Tap, Top, Vox
-from tests.helpers import time_travel_by
+from pymaker.sai import Tub, Tap, Top, Vox, Cup, CupIndex, CupSafety
+from pymaker.stub import ContractStub
+from pymaker.util import int_to_bytes32
+from tests.helpers import time_travel_by, StubProvider, encode_log, eth_call_responder
 
 
 class TestTub:
@@ -306,6 +311,45 @@ class TestTub:
         # then
         assert deployment.tub.safe(1)
 
+    def test_cup_index(self, deployment: Deployment):
+        # given
+        index = CupIndex(deployment.tub, deployment.web3.eth.blockNumber)
+        deployment.tub.join(Wad.from_number(10)).transact()
+        deployment.tub.mold_cap(Wad.from_number(100000)).transact()
+        DSValue(web3=deployment.web3, address=deployment.tub.pip()).poke_with_int(Wad.from_number(250).value).transact()
+
+        # when
+        deployment.tub.open().transact()
+        deployment.tub.open().transact()
+        deployment.tub.lock(1, Wad.from_number(4)).transact()
+        deployment.tub.draw(1, Wad.from_number(1000)).transact()
+        index.update()
+
+        # then
+        assert [cup.cup_id for cup in index.cups()] == [1, 2]
+        assert index.cups()[0].art == deployment.tub.cups(1).art
+        assert index.safety.tab(index.cups()[0]) == deployment.tub.tab(1)
+        assert index.unsafe_cups() == []
+
+        # when
+        DSValue(web3=deployment.web3, address=deployment.tub.pip()).poke_with_int(Wad.from_number(150).value).transact()
+        index.update()
+
+        # then
+        assert [cup.cup_id for cup in index.unsafe_cups()] == [1]
+        assert not deployment.tub.safe(1)
+        assert deployment.tub.safe(2)
+
+        # when
+        deployment.tub.bite(1).transact()
+        deployment.tub.shut(2).transact()
+        index.update()
+
+        # then
+        assert [cup.cup_id for cup in index.cups()] == [1]
+        assert index.unsafe_cups() == []
+        assert [cup.art for cup in deployment.tub.cups_many([1, 2])] == [deployment.tub.cups(1).art, Wad(0)]
+
     def test_mold_gap_and_gap(self, deployment: Deployment):
         # given
         assert deployment.tub.gap() == Wad.from_number(1)
@@ -554,3 +598,106 @@ class TestVox:
     def test_default_par(self, deployment: Deployment):
         # expect
         assert deployment.vox.par() == Ray.from_number(1)
+
+
+class TestCupSafety:
+    def test_safe(self):
+        # given
+        safety = CupSafety(tag=Ray.from_number(300), mat=Ray.from_number(1.5), chi=Ray.from_number(1.1),
+                           par=Ray.from_number(1))
+        lad = Address('0x0000000000000000000000000000000000000001')
+
+        # expect
+        assert safety.tab(Cup(1, lad, ink=Wad.from_number(1), art=Wad.from_number(100))) == Wad.from_number(110)
+        assert safety.safe(Cup(1, lad, ink=Wad.from_number(1), art=Wad.from_number(100)))
+        assert safety.safe(Cup(2, lad, ink=Wad.from_number(0.55), art=Wad.from_number(100)))
+        assert not safety.safe(Cup(3, lad, ink=Wad.from_number(0.549999), art=Wad.from_number(100)))
+        assert safety.safe(Cup(4, lad, ink=Wad(0), art=Wad(0)))
+
+
+class TestCupIndex:
+    tub_address = '0x11223344556600000000000000000000000000ff'
+    vox_address = '0x00000000000000000000000000000000000000aa'
+    lad = Address('0x0000000000000000000000000000000000000001')
+
+    def setup_method(self):
+        self.block_number = 10
+        self.logs = []
+        self.cups = {}
+        self.tag = Ray.from_number(300)
+        self.provider = StubProvider({'eth_blockNumber': lambda params: hex(self.block_number),
+                                      'eth_getLogs': lambda params: self.logs,
+                                      'eth_call': eth_call_responder(Tub.abi + Vox.abi, {
+                                          'cups': self.cup,
+                                          'vox': lambda: self.vox_address,
+                                          'tag': lambda: self.tag.value,
+                                          'mat': lambda: Ray.from_number(1.5).value,
+                                          'chi': lambda: Ray.from_number(1).value,
+                                          'par': lambda: Ray.from_number(1).value})})
+        self.tub = Tub(Web3(self.provider), Address(self.tub_address))
+        self.index = CupIndex(self.tub, from_block=1)
+
+    def cup(self, cup_id: bytes) -> list:
+        cup = self.cups.get(int.from_bytes(cup_id, 'big'))
+        return [cup.lad.address, cup.ink.value, cup.art.value, 0] if cup else ['0x' + '00' * 20, 0, 0, 0]
+
+    def new_cup(self, cup_id: int, ink: float, art: float):
+        self.cups[cup_id] = Cup(cup_id, self.lad, ink=Wad.from_number(ink), art=Wad.from_number(art))
+        self.logs.append(encode_log([member for member in Tub.abi if member.get('name') == 'LogNewCup'][0],
+                                    {'lad': self.lad.address, 'cup': int_to_bytes32(cup_id)},
+                                    self.tub_address, self.block_number))
+
+    def note(self, name: str, cup_id: int):
+        selector = ContractStub.for_abi(Tub.abi).function(name).selector
+        log = encode_log({'name': 'LogNote', 'type': 'event', 'anonymous': True, 'inputs': []}, {},
+                         self.tub_address, self.block_number)
+        log['topics'] = [HexBytes(selector.ljust(32, bytes(1))),
+                         HexBytes(bytes(12) + self.lad.as_bytes()),
+                         HexBytes(int_to_bytes32(cup_id)),
+                         HexBytes(bytes(32))]
+        log['data'] = '0x' + encode_abi(['uint256', 'bytes'], [0, selector + int_to_bytes32(cup_id)]).hex()
+        self.logs.append(log)
+
+    def test_should_track_cups_and_their_safety(self):
+        # given
+        self.new_cup(1, 1, 100)
+        self.new_cup(2, 1, 180)
+        self.new_cup(3, 0, 0)
+
+        # when
+        self.index.update()
+
+        # then
+        assert [cup.cup_id for cup in self.index.cups()] == [1, 2, 3]
+        assert self.index.unsafe_cups() == []
+
+        # when
+        self.logs = []
+        self.block_number = 11
+        self.tag = Ray.from_number(200)
+        self.index.update()
+
+        # then
+        assert [cup.cup_id for cup in self.index.unsafe_cups()] == [2]
+        assert all(params[1] == hex(11) for params in self.provider.requests_of('eth_call')[-4:])
+
+    def test_should_only_read_affected_cups(self):
+        # given
+        for cup_id in range(1, 11):
+            self.new_cup(cup_id, 1, 100)
+        self.index.update()
+        calls = len(self.provider.requests_of('eth_call'))
+
+        # when
+        self.logs = []
+        self.block_number = 11
+        self.cups[4] = Cup(4, self.lad, ink=Wad.from_number(1), art=Wad.from_number(250))
+        self.note('draw', 4)
+        del self.cups[7]
+        self.note('shut', 7)
+        self.index.update()
+
+        # then
+        assert len(self.provider.requests_of('eth_call')) == calls + 2 + 4
+        assert [cup.cup_id for cup in self.index.cups()] == [1, 2, 3, 4, 5, 6, 8, 9, 10]
+        assert [cup.cup_id for cup in self.index.unsafe_cups()] == [4]
@@ -0,0 +1,156 @@
+# This file is part of Maker Keeper Framework.
+#
+# Copyright (C) 2019 reverendus
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import time
+
+import pytest
+from eth_abi import encode_abi, decode_abi
+from web3 import Web3
+from web3.utils.abi import get_abi_output_types
+
+from pymaker import Address
+from pymaker.auctions import Flipper
+from pymaker.dss import Vat, Ilk, Urn
+from pymaker.numeric import Wad
+from pymaker.oasis import MatchingMarket
+from pymaker.sai import Tub
+from pymaker.stub import ContractStub
+from pymaker.token import ERC20Token
+from tests.helpers import StubProvider, benchmark
+
+
+class TestContractStub:
+    def test_should_compile_all_functions_of_bundled_abis(self):
+        for abi in [Vat.abi, Tub.abi, Flipper.abi, MatchingMarket.abi, ERC20Token.abi]:
+            stubs = ContractStub.for_abi(abi).functions()
+            assert len(stubs) == len([member for member in abi if member.get('type') == 'function'])
+
+    def test_should_share_stubs_between_instances(self):
+        assert ContractStub.for_abi(Vat.abi) is ContractStub.for_abi(Vat.abi)
+        assert ContractStub.for_abi(Vat.abi).function('urns') is ContractStub.for_abi(Vat.abi).function('urns')
+
+    def test_selector_and_encoding(self):
+        # given
+        stub = ContractStub.for_abi(ERC20Token.abi).function('balanceOf')
+
+        # expect
+        assert stub.signature == 'balanceOf(address)'
+        assert stub.selector == bytes.fromhex('70a08231')
+        assert stub.encode(['0x11223344556600000000000000000000000000ff']) == \
+               bytes.fromhex('70a08231'
+                             '00000000000000000000000011223344556600000000000000000000000000ff')
+
+    def test_decoding(self):
+        # given
+        urns = ContractStub.for_abi(Vat.abi).function('urns')
+        bids = ContractStub.for_abi(Flipper.abi).function('bids')
+
+        # expect
+        assert urns.decode(encode_abi(['uint256', 'uint256'], [5, 7])) == [5, 7]
+        assert bids.decode(encode_abi(bids.output_types, [1, 2, '0xabababababababababababababababababababab',
+                                                          3, 4, '0x' + '00' * 20, '0x' + '00' * 20, 5]))[2] == \
+               '0xABaBaBaBABabABabAbAbABAbABabababaBaBABaB'
+
+    def test_should_fail_on_overloaded_or_unknown_function(self):
+        with pytest.raises(ValueError):
+            ContractStub.for_abi(Vat.abi).function('file')
+
+        with pytest.raises(ValueError):
+            ContractStub.for_abi(Vat.abi).function('nonexistent')
+
+        assert ContractStub.for_abi(Vat.abi).function('file(bytes32,uint256)').input_types == ['bytes32', 'uint256']
+
+
+class TestBoundContractStub:
+    def test_vat_urn(self):
+        # given
+        provider = StubProvider({'eth_call': '0x' + encode_abi(['uint256', 'uint256'],
+                                                               [Wad.from_number(3).value,
+                                                                Wad.from_number(100).value]).hex()})
+        vat = Vat(Web3(provider), Address('0x11223344556600000000000000000000000000ff'))
+
+        # when
+        urn = vat.urn(Ilk('ETH-A'), Address('0x0000000000000000000000000000000000000001'))
+
+        # then
+        assert isinstance(urn, Urn)
+        assert urn.ink == Wad.from_number(3)
+        assert urn.art == Wad.from_number(100)
+        assert provider.requests_of('eth_call')[0][0]['data'] == \
+               '0x2424be5c' \
+               '4554482d41000000000000000000000000000000000000000000000000000000' \
+               '0000000000000000000000000000000000000000000000000000000000000001'
+
+    def test_call_many(self):
+        # given
+        def balance_of(params):
+            return '0x' + encode_abi(['uint256'], [int(params[0]['data'][-2:], 16)]).hex()
+
+        provider = StubProvider({'eth_blockNumber': 42, 'eth_call': balance_of})
+        token = ERC20Token(Web3(provider), Address('0x11223344556600000000000000000000000000ff'))
+
+        # when
+        balances = token._stub.call_many([('balanceOf', [Address('0x00000000000000000000000000000000000000'
+                                                                 + '%02x' % i).address]) for i in range(20)])
+
+        # then
+        assert balances == list(range(20))
+        assert len(provider.requests_of('eth_blockNumber')) == 1
+        assert all(params[1] == hex(42) for params in provider.requests_of('eth_call'))
+
+    def test_should_encode_and_decode_like_web3(self):
+        # given
+        provider = StubProvider({})
+        vat = Vat(Web3(provider), Address('0x11223344556600000000000000000000000000ff'))
+        urns = ContractStub.for_abi(Vat.abi).function('urns')
+        args = [Ilk('ETH-A').toBytes(), '0x0000000000000000000000000000000000000001']
+        result = encode_abi(['uint256', 'uint256'], [Wad.from_number(3).value, Wad.from_number(100).value])
+
+        # when
+        function = vat._contract.get_function_by_name('urns')(*args)
+
+        # then
+        assert '0x' + urns.encode(args).hex() == function._encode_transaction_data()
+        assert urns.decode(result) == list(decode_abi(get_abi_output_types(function.abi), result))
+        assert urns.decode(result) == [Wad.from_number(3).value, Wad.from_number(100).value]
+
+    @benchmark
+    def test_vat_urn_encode_decode_benchmark(self):
+        # given
+        provider = StubProvider({})
+        vat = Vat(Web3(provider), Address('0x11223344556600000000000000000000000000ff'))
+        urns = ContractStub.for_abi(Vat.abi).function('urns')
+        args = [Ilk('ETH-A').toBytes(), '0x0000000000000000000000000000000000000001']
+        result = encode_abi(['uint256', 'uint256'], [Wad.from_number(3).value, Wad.from_number(100).value])
+
+        # when
+        start = time.time()
+        for _ in range(10000):
+            urns.encode(args)
+            urns.decode(result)
+        stub_time = time.time() - start
+
+        # and
+        start = time.time()
+        for _ in range(10000):
+            function = vat._contract.get_function_by_name('urns')(*args)
+            function._encode_transaction_data()
+            decode_abi(get_abi_output_types(function.abi), result)
+        web3_time = time.time() - start
+
+        # then
+        print(f"10000 Vat.urn encode/decode cycles: {stub_time:.3f}s with stubs, {web3_time:.3f}s with web3.py")
@@ -18,11 +18,12 @@
 import pytest
 from web3 import Web3, HTTPProvider
 
-from pymaker import Address
+from pymaker import Address, Calldata, Invocation
 from pymaker.approval import directly
 from pymaker.numeric import Wad
 from pymaker.token import DSToken
 from pymaker.transactional import TxManager
+from tests.helpers import StubProvider
 
 
 class TestTxManager:
@@ -112,3 +113,85 @@ class TestTxManager:
 
     def test_should_have_printable_representation(self):
         assert repr(self.tx) == f"TxManager('{self.tx.address}')"
+
+
+class TestTxManagerChunking:
+    def setup_method(self):
+        # gas used by each invocation is encoded in its calldata, `ff` means the invocation fails
+        def estimate_gas(params):
+            if params[0]['data'].endswith('ff'):
+                raise ValueError("gas required exceeds allowance or always failing transaction")
+
+            return 21000 + int(params[0]['data'][-4:], 16) * 1000
+
+        self.provider = StubProvider({'eth_estimateGas': estimate_gas})
+        self.tx = TxManager(Web3(self.provider), Address('0x11223344556600000000000000000000000000ff'))
+        self.target = Address('0x0000000000000000000000000000000000000001')
+
+    def invocation(self, gas: int) -> Invocation:
+        return Invocation(self.target, Calldata('0x12345678' + '%04x' % gas))
+
+    def invocations_of(self, transact) -> list:
+        script = transact.parameters[1]
+        result = []
+        while script:
+            length = int.from_bytes(script[20:52], byteorder='big')
+            result.append('0x' + script[52:52+length].hex())
+            script = script[52+length:]
+
+        return result
+
+    def test_estimate_invocations(self):
+        # when
+        estimates = self.tx.estimate_invocations([self.invocation(30), self.invocation(0xff), self.invocation(40)])
+
+        # then
+        assert estimates == [30000, None, 40000]
+        assert {params[0]['from'] for params in self.provider.requests_of('eth_estimateGas')} == \
+               {'0x11223344556600000000000000000000000000ff'}
+
+    def test_execute_chunked(self):
+        # given
+        invocations = [self.invocation(100) for _ in range(5)]
+
+        # when
+        transacts = self.tx.execute_chunked([], invocations, 300000)
+
+        # then
+        assert len(transacts) == 3
+        assert [len(self.invocations_of(transact)) for transact in transacts] == [2, 2, 1]
+        assert all(transact.function_name == 'execute' for transact in transacts)
+
+    def test_execute_chunked_should_account_for_tokens(self):
+        # given
+        invocations = [self.invocation(100) for _ in range(5)]
+        tokens = [Address('0x0000000000000000000000000000000000000002')]
+
+        # when
+        transacts = self.tx.execute_chunked(tokens, invocations, 300000)
+
+        # then
+        assert [len(self.invocations_of(transact)) for transact in transacts] == [1, 1, 1, 1, 1]
+        assert transacts[0].parameters[0] == ['0x0000000000000000000000000000000000000002']
+
+    def test_execute_chunked_should_skip_failing_invocations(self):
+        # given
+        invocations = [self.invocation(10), self.invocation(0xff), self.invocation(20)]
+
+        # when
+        transacts = self.tx.execute_chunked([], invocations, 3000000)
+
+        # then
+        assert len(transacts) == 1
+        assert self.invocations_of(transacts[0]) == ['0x12345678000a', '0x123456780014']
+
+    def test_execute_chunked_should_not_drop_oversized_invocations(self):
+        # when
+        transacts = self.tx.execute_chunked([], [self.invocation(500), self.invocation(10)], 300000)
+
+        # then
+        assert [self.invocations_of(transact) for transact in transacts] == [['0x123456780' + '1f4'], ['0x12345678000a']]
+
+    def test_execute_chunked_nothing_to_execute(self):
+        # expect
+        assert self.tx.execute_chunked([], [self.invocation(0xff)], 3000000) == []
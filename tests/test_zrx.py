@@ -27,8 +27,9 @@ from pymaker.approval import directly
 from pymaker.deployment import deploy_contract
 from pymaker.numeric import Wad
 from pymaker.token import DSToken, ERC20Token
-from pymaker.zrx import ZrxExchange, Order, ZrxRelayerApi
-from tests.helpers import is_hashable, wait_until_mock_called
+from pymaker.util import hexstring_to_bytes
+from pymaker.zrx import ZrxExchange, Order, ZrxRelayerApi, ZrxFillTracker
+from tests.helpers import is_hashable, wait_until_mock_called, StubProvider, StubRelayer, encode_log
 
 PAST_BLOCKS = 100
 
@@ -166,6 +167,35 @@ class TestZrx:
         # then
         assert self.exchange.get_unavailable_buy_amount(signed_order) == Wad.from_number(3.5)
 
+    def test_fill_tracker(self):
+        # given
+        self.exchange.approve([self.token1, self.token2], directly())
+        fill_tracker = ZrxFillTracker(self.exchange, self.web3.eth.blockNumber + 1)
+
+        # and
+        order1 = self.exchange.sign_order(self.exchange.create_order(pay_token=self.token1.address,
+                                                                     pay_amount=Wad.from_number(10),
+                                                                     buy_token=self.token2.address,
+                                                                     buy_amount=Wad.from_number(4),
+                                                                     expiration=1763920792))
+        order2 = self.exchange.sign_order(self.exchange.create_order(pay_token=self.token1.address,
+                                                                     pay_amount=Wad.from_number(10),
+                                                                     buy_token=self.token2.address,
+                                                                     buy_amount=Wad.from_number(4),
+                                                                     expiration=1763920792))
+
+        # when
+        self.exchange.fill_order(order1, Wad.from_number(1.5)).transact()
+        self.exchange.fill_order(order1, Wad.from_number(1)).transact()
+        self.exchange.cancel_order(order2).transact()
+        fill_tracker.update()
+
+        # then
+        assert fill_tracker.get_unavailable_buy_amount(order1) == Wad.from_number(2.5)
+        assert fill_tracker.get_unavailable_buy_amount(order1) == self.exchange.get_unavailable_buy_amount(order1)
+        assert fill_tracker.get_unavailable_buy_amount(order2) == Wad.from_number(4)
+        assert fill_tracker.get_unavailable_buy_amount(order2) == self.exchange.get_unavailable_buy_amount(order2)
+
     def test_remaining_buy_amount_and_remaining_sell_amount(self):
         # given
         self.exchange.approve([self.token1, self.token2], directly())
@@ -243,6 +273,161 @@ class TestZrx:
         assert repr(self.exchange) == f"ZrxExchange('{self.exchange.address}')"
 
 
+class TestZrxFillTracker:
+    exchange_address = '0x12459c951127e0c374ff9105dda097662a027093'
+    maker = Address('0x0046cac6668bef45b517a1b816a762f4f8add2a9')
+
+    def setup_method(self):
+        self.block_number = 10
+        self.logs = []
+        self.provider = StubProvider({'eth_blockNumber': lambda params: hex(self.block_number),
+                                      'eth_getLogs': lambda params: self.logs})
+        self.exchange = ZrxExchange(Web3(self.provider), Address(self.exchange_address))
+        self.fill_tracker = ZrxFillTracker(self.exchange, 5, self.maker)
+
+        self.order = Order(exchange=self.exchange,
+                           maker=self.maker,
+                           taker=Address('0x0000000000000000000000000000000000000000'),
+                           maker_fee=Wad(0),
+                           taker_fee=Wad(0),
+                           pay_token=Address('0x59adcf176ed2f6788a41b8ea4c4904518e62b6a4'),
+                           pay_amount=Wad.from_number(11),
+                           buy_token=Address('0x2956356cd2a2bf3202f771f50d3d14a367b48070'),
+                           buy_amount=Wad.from_number(0.0308),
+                           salt=50626048444772008084444062440502087868712695090943879708059561407114509847312,
+                           fee_recipient=Address('0xa258b39954cef5cb142fd567a46cddb31a670124'),
+                           expiration=1511988904,
+                           exchange_contract_address=Address(self.exchange_address),
+                           ec_signature_r=None,
+                           ec_signature_s=None,
+                           ec_signature_v=None)
+        self.order_hash = '0x02266a4887256fdf16b47ca13e3f2cca76f93724842f3f7ddf55d92fb6601b6f'
+
+    def log(self, name: str, order_hash: str, **kwargs):
+        event_abi = [member for member in ZrxExchange.abi if member.get('name') == name][0]
+        args = {'maker': self.maker.address, 'taker': '0x' + '00' * 20, 'feeRecipient': '0x' + '00' * 20,
+                'makerToken': self.order.pay_token.address, 'takerToken': self.order.buy_token.address,
+                'tokens': bytes(32), 'orderHash': hexstring_to_bytes(order_hash),
+                'filledMakerTokenAmount': 0, 'filledTakerTokenAmount': 0, 'paidMakerFee': 0, 'paidTakerFee': 0,
+                'cancelledMakerTokenAmount': 0, 'cancelledTakerTokenAmount': 0, **kwargs}
+
+        self.logs.append(encode_log(event_abi, args, self.exchange_address, self.block_number, len(self.logs)))
+
+    def test_should_calculate_order_hash_locally(self):
+        # expect
+        assert self.exchange._order_hash(self.order) == hexstring_to_bytes(self.order_hash)
+
+    def test_should_track_fills_and_cancels(self):
+        # given
+        self.log('LogFill', self.order_hash, filledTakerTokenAmount=Wad.from_number(0.01).value)
+        self.log('LogFill', self.order_hash, filledTakerTokenAmount=Wad.from_number(0.002).value)
+        self.log('LogFill', '0x' + '11' * 32, filledTakerTokenAmount=Wad.from_number(5).value)
+        self.log('LogCancel', self.order_hash, cancelledTakerTokenAmount=Wad.from_number(0.0058).value)
+
+        # when
+        self.fill_tracker.update()
+
+        # then
+        assert self.fill_tracker.last_block == 10
+        assert self.fill_tracker.get_filled_buy_amount(self.order) == Wad.from_number(0.012)
+        assert self.fill_tracker.get_cancelled_buy_amount(self.order) == Wad.from_number(0.0058)
+        assert self.fill_tracker.get_unavailable_buy_amount(self.order) == Wad.from_number(0.0178)
+
+    def test_should_query_only_new_blocks(self):
+        # given
+        self.fill_tracker.update()
+        self.log('LogFill', self.order_hash, filledTakerTokenAmount=Wad.from_number(0.01).value)
+
+        # when
+        self.fill_tracker.update()
+        self.logs = []
+        self.fill_tracker.update()
+
+        # and
+        self.block_number = 12
+        self.fill_tracker.update()
+
+        # then
+        assert len(self.provider.requests_of('eth_getLogs')) == 2
+        assert self.provider.requests_of('eth_getLogs')[0][0]['fromBlock'] == hex(5)
+        assert self.provider.requests_of('eth_getLogs')[0][0]['toBlock'] == hex(10)
+        assert self.provider.requests_of('eth_getLogs')[1][0]['fromBlock'] == hex(11)
+        assert self.provider.requests_of('eth_getLogs')[1][0]['toBlock'] == hex(12)
+
+        # and
+        assert self.provider.requests_of('eth_getLogs')[0][0]['topics'][1] == \
+               '0x0000000000000000000000000046cac6668bef45b517a1b816a762f4f8add2a9'
+
+    def test_should_return_zero_for_unknown_orders(self):
+        # when
+        self.fill_tracker.update()
+
+        # then
+        assert self.fill_tracker.get_unavailable_buy_amount(self.order) == Wad(0)
+        assert self.provider.requests_of('eth_call') == []
+
+
+class TestZrxRelayerApi:
+    exchange_address = Address('0x12459c951127e0c374ff9105dda097662a027093')
+    token1 = Address('0x0101010101010101010101010101010101010101')
+    token2 = Address('0x0202020202020202020202020202020202020202')
+    maker = Address('0x0000000000000000000000000000000000000001')
+
+    def setup_method(self):
+        self.exchange = ZrxExchange(Web3(StubProvider({})), self.exchange_address)
+        self.relayer = StubRelayer()
+        self.relayer_api = ZrxRelayerApi(self.exchange, self.relayer.url)
+
+        self.orders = [Order(exchange=self.exchange, maker=self.maker, taker=Address('0x' + '00' * 20),
+                             maker_fee=Wad(0), taker_fee=Wad(0), pay_token=self.token1, pay_amount=Wad.from_number(1),
+                             buy_token=self.token2, buy_amount=Wad.from_number(2), salt=salt,
+                             fee_recipient=Address('0x' + '00' * 20), expiration=1763920792,
+                             exchange_contract_address=self.exchange_address,
+                             ec_signature_r=None, ec_signature_s=None, ec_signature_v=None) for salt in range(250)]
+        self.relayer.orders_v0 = [order.to_json() for order in self.orders]
+
+    def teardown_method(self):
+        self.relayer_api.close()
+        self.relayer.stop()
+
+    def test_should_fetch_all_pages(self):
+        # expect
+        assert self.relayer_api.get_orders(self.token1, self.token2) == self.orders
+        assert [params['page'] for method, path, params in self.relayer.requests] == ['1', '2', '3']
+
+    def test_should_fetch_all_pages_of_maker_orders(self):
+        # expect
+        assert self.relayer_api.get_orders_by_maker(self.maker, per_page=125) == self.orders
+        assert [params['page'] for method, path, params in self.relayer.requests] == ['1', '2', '3']
+
+    def test_should_calculate_fees_and_submit_orders(self):
+        # given
+        self.relayer.order_config['feeRecipientAddress'] = '0x0000000000000000000000000000000000000004'
+        self.relayer.order_config['makerFee'] = '5'
+        orders = self.orders[0:20]
+
+        # when
+        orders_with_fees = self.relayer_api.calculate_orders_fees(orders)
+        result = self.relayer_api.submit_orders(orders_with_fees)
+
+        # then
+        assert all(order.fee_recipient == Address('0x0000000000000000000000000000000000000004')
+                   for order in orders_with_fees)
+        assert all(order.maker_fee == Wad(5) for order in orders_with_fees)
+        assert result == [True] * 20
+        assert sorted(self.relayer.orders_v0[250:], key=lambda order: int(order['salt'])) == \
+               [order.to_json() for order in orders_with_fees]
+        assert len(self.relayer.connections) <= ZrxRelayerApi.max_workers
+
+    def test_should_stream_orders(self):
+        # when
+        iterator = self.relayer_api.iter_orders(self.token1, self.token2)
+        next(iterator)
+
+        # then
+        assert len(self.relayer.requests) == 1
+
+
 class TestOrder:
     def test_should_be_comparable(self):
         # given
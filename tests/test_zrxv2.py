@@ -16,21 +16,28 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import json
+import threading
+import time
 
 import pkg_resources
 import pytest
-from eth_abi import encode_single
+from eth_abi import encode_single, encode_abi, decode_single
+from eth_account import Account
+from eth_account.messages import defunct_hash_message
+from eth_utils import keccak
 from mock import Mock
 from web3 import EthereumTesterProvider, Web3, HTTPProvider
 
 from pymaker import Address
 from pymaker.approval import directly
+from pymaker.keys import register_private_key
 from pymaker.deployment import deploy_contract
 from pymaker.numeric import Wad
 from pymaker.token import DSToken, ERC20Token
-from pymaker.util import bytes_to_hexstring
-from pymaker.zrxv2 import ZrxExchangeV2, Order, ZrxRelayerApiV2, ERC20Asset
-from tests.helpers import is_hashable, wait_until_mock_called
+from pymaker.util import bytes_to_hexstring, hexstring_to_bytes
+from pymaker.zrxv2 import ZrxExchangeV2, Order, OrderInfo, ZrxRelayerApiV2, ZrxRelayerWebSocketApiV2, ERC20Asset
+from tests.helpers import is_hashable, wait_until_mock_called, StubProvider, StubRelayer, StubWebSocketRelayer, \
+    benchmark
 
 PAST_BLOCKS = 100
 
@@ -118,6 +125,16 @@ class TestZrxV2:
         assert order_hash.startswith('0x')
         assert len(order_hash) == 66
 
+    def test_get_order_hash_should_match_the_exchange_contract(self):
+        # given
+        order = self.exchange.create_order(pay_asset=ERC20Asset(Address("0x0202020202020202020202020202020202020202")),
+                                           pay_amount=Wad.from_number(100),
+                                           buy_asset=ERC20Asset(Address("0x0101010101010101010101010101010101010101")),
+                                           buy_amount=Wad.from_number(2.5), expiration=1763920792)
+
+        # expect
+        assert self.exchange.get_order_hash(order, verify=True) == self.exchange.get_order_hash(order)
+
     def test_sign_order(self):
         # given
         order = self.exchange.create_order(pay_asset=ERC20Asset(Address("0x0202020202020202020202020202020202020202")),
@@ -173,6 +190,35 @@ class TestZrxV2:
         # then
         assert self.exchange.get_unavailable_buy_amount(signed_order) == Wad.from_number(3.5)
 
+    def test_get_orders_info(self):
+        # given
+        self.exchange.approve([self.token1, self.token2], directly())
+
+        # and
+        orders = [self.exchange.sign_order(self.exchange.create_order(pay_asset=ERC20Asset(self.token1.address),
+                                                                      pay_amount=Wad.from_number(10),
+                                                                      buy_asset=ERC20Asset(self.token2.address),
+                                                                      buy_amount=Wad.from_number(4),
+                                                                      expiration=1763920792)) for _ in range(3)]
+        orders[1].salt += 1
+        orders[1] = self.exchange.sign_order(orders[1])
+        orders[2].salt += 2
+        orders[2] = self.exchange.sign_order(orders[2])
+
+        # when
+        self.exchange.fill_order(orders[0], Wad.from_number(3.5)).transact()
+        self.exchange.cancel_order(orders[1]).transact()
+
+        # then
+        orders_info = self.exchange.get_orders_info(orders, chunk_size=2)
+        assert [order_info.status for order_info in orders_info] == [OrderInfo.FILLABLE, OrderInfo.CANCELLED,
+                                                                     OrderInfo.FILLABLE]
+        assert [order_info.order_hash for order_info in orders_info] == [self.exchange.get_order_hash(order)
+                                                                         for order in orders]
+        assert self.exchange.get_unavailable_buy_amounts(orders) == [self.exchange.get_unavailable_buy_amount(order)
+                                                                     for order in orders]
+        assert self.exchange.get_unavailable_buy_amounts(orders) == [Wad.from_number(3.5), Wad.from_number(4), Wad(0)]
+
     def test_remaining_buy_amount_and_remaining_sell_amount(self):
         # given
         self.exchange.approve([self.token1, self.token2], directly())
@@ -248,6 +294,597 @@ class TestZrxV2:
         assert repr(self.exchange) == f"ZrxExchangeV2('{self.exchange.address}')"
 
 
+class TestZrxV2OrderHash:
+    exchange_address = Address('0x11223344556600000000000000000000000000ff')
+    private_key = '0x' + '11' * 32
+
+    def setup_method(self):
+        self.provider = StubProvider({'eth_call': self.eth_call})
+        self.web3 = Web3(self.provider)
+        self.web3.eth.defaultAccount = Account.privateKeyToAccount(self.private_key).address
+        register_private_key(self.web3, self.private_key)
+
+        self.exchange = ZrxExchangeV2(self.web3, self.exchange_address)
+        self.order = self.exchange.create_order(pay_asset=ERC20Asset(Address("0x0202020202020202020202020202020202020202")),
+                                                pay_amount=Wad.from_number(100),
+                                                buy_asset=ERC20Asset(Address("0x0101010101010101010101010101010101010101")),
+                                                buy_amount=Wad.from_number(2.5), expiration=1763920792)
+        self.contract_order_hash = None
+
+    def eth_call(self, params):
+        order_hash = self.contract_order_hash or hexstring_to_bytes(self.expected_order_hash(self.order))
+        return '0x' + encode_single('((uint8,bytes32,uint256))', [(3, order_hash, 0)]).hex()
+
+    def expected_order_hash(self, order: Order) -> str:
+        # straight from the EIP712 spec, with all the encoding done by `eth_abi`
+        domain_hash = keccak(encode_abi(['bytes32', 'bytes32', 'bytes32', 'address'],
+                                        [keccak(text="EIP712Domain(string name,string version,address verifyingContract)"),
+                                         keccak(text="0x Protocol"),
+                                         keccak(text="2"),
+                                         self.exchange_address.address]))
+
+        struct_hash = keccak(encode_abi(['bytes32', 'address', 'address', 'address', 'address', 'uint256', 'uint256',
+                                         'uint256', 'uint256', 'uint256', 'uint256', 'bytes32', 'bytes32'],
+                                        [keccak(text="Order(address makerAddress,address takerAddress,"
+                                                     "address feeRecipientAddress,address senderAddress,"
+                                                     "uint256 makerAssetAmount,uint256 takerAssetAmount,"
+                                                     "uint256 makerFee,uint256 takerFee,"
+                                                     "uint256 expirationTimeSeconds,uint256 salt,"
+                                                     "bytes makerAssetData,bytes takerAssetData)"),
+                                         order.maker.address, order.taker.address,
+                                         order.fee_recipient.address, order.sender.address,
+                                         order.pay_amount.value, order.buy_amount.value,
+                                         order.maker_fee.value, order.taker_fee.value,
+                                         order.expiration, order.salt,
+                                         keccak(hexstring_to_bytes(order.pay_asset.serialize())),
+                                         keccak(hexstring_to_bytes(order.buy_asset.serialize()))]))
+
+        return bytes_to_hexstring(keccak(b"\x19\x01" + domain_hash + struct_hash))
+
+    def test_should_calculate_order_hash_locally(self):
+        # when
+        order_hash = self.exchange.get_order_hash(self.order)
+
+        # then
+        assert order_hash == self.expected_order_hash(self.order)
+        assert self.provider.requests_of('eth_call') == []
+
+    def test_order_hash_should_depend_on_the_exchange_address(self):
+        # given
+        other_exchange = ZrxExchangeV2(self.web3, Address('0x11223344556600000000000000000000000000fe'))
+        other_order = other_exchange.create_order(pay_asset=self.order.pay_asset, pay_amount=self.order.pay_amount,
+                                                  buy_asset=self.order.buy_asset, buy_amount=self.order.buy_amount,
+                                                  expiration=self.order.expiration)
+        other_order.salt = self.order.salt
+
+        # expect
+        assert other_exchange.get_order_hash(other_order) != self.exchange.get_order_hash(self.order)
+
+    def test_should_verify_order_hash(self):
+        # expect
+        assert self.exchange.get_order_hash(self.order, verify=True) == self.expected_order_hash(self.order)
+        assert len(self.provider.requests_of('eth_call')) == 1
+
+        # when
+        self.contract_order_hash = bytes(32)
+
+        # then
+        with pytest.raises(Exception):
+            self.exchange.get_order_hash(self.order, verify=True)
+
+    def test_should_sign_order_hash(self):
+        # when
+        signed_order = self.exchange.sign_order(self.order)
+
+        # then
+        # [0x v2 signatures are `v`, `r`, `s` followed by the signature type]
+        signature = hexstring_to_bytes(signed_order.signature)
+        v, r, s = signature[0], signature[1:33], signature[33:65]
+        message_hash = defunct_hash_message(hexstr=self.expected_order_hash(self.order))
+        assert Address(Account.recoverHash(message_hash, vrs=(v, r, s))) == self.order.maker
+        assert self.provider.requests_of('eth_call') == []
+
+    def test_should_hash_many_orders_locally(self):
+        # given
+        orders = [self.exchange.create_order(pay_asset=self.order.pay_asset, pay_amount=Wad.from_number(amount),
+                                             buy_asset=self.order.buy_asset, buy_amount=self.order.buy_amount,
+                                             expiration=self.order.expiration) for amount in range(1, 101)]
+
+        # when
+        order_hashes = [self.exchange.get_order_hash(order) for order in orders]
+
+        # then
+        assert order_hashes == [self.expected_order_hash(order) for order in orders]
+        assert len(set(order_hashes)) == len(orders)
+        assert self.provider.requests_of('eth_call') == []
+
+    @benchmark
+    def test_hash_and_sign_benchmark(self):
+        # when
+        start = time.time()
+        for _ in range(10000):
+            self.exchange.get_order_hash(self.order)
+        local_hash_time = time.time() - start
+
+        # and
+        start = time.time()
+        for _ in range(1000):
+            self.exchange.get_order_hash(self.order, verify=True)
+        contract_hash_time = time.time() - start
+
+        # and
+        start = time.time()
+        for _ in range(1000):
+            self.exchange.sign_order(self.order)
+        sign_time = time.time() - start
+
+        # then
+        print(f"10000 order hashes: {local_hash_time:.3f}s locally,"
+              f" {contract_hash_time * 10:.3f}s through `getOrderInfo` (extrapolated from 1000)")
+        print(f"10000 order hashes and signatures: {local_hash_time + sign_time * 10:.3f}s"
+              f" (extrapolated from 1000 signatures)")
+
+
+class TestZrxV2OrdersInfo:
+    exchange_address = Address('0x11223344556600000000000000000000000000ff')
+
+    def setup_method(self):
+        self.block_number = 10
+        self.provider = StubProvider({'eth_blockNumber': lambda params: hex(self.block_number),
+                                      'eth_call': self.eth_call})
+        self.web3 = Web3(self.provider)
+        self.web3.eth.defaultAccount = '0x0000000000000000000000000000000000000001'
+
+        self.exchange = ZrxExchangeV2(self.web3, self.exchange_address)
+        self.orders = []
+        for salt in range(250):
+            order = self.exchange.create_order(pay_asset=ERC20Asset(Address("0x0202020202020202020202020202020202020202")),
+                                               pay_amount=Wad.from_number(100),
+                                               buy_asset=ERC20Asset(Address("0x0101010101010101010101010101010101010101")),
+                                               buy_amount=Wad.from_number(2.5), expiration=1763920792)
+            order.salt = salt
+            self.orders.append(order)
+
+    def eth_call(self, params):
+        # [salt 0 is cancelled, salt 1 is fully filled, other orders are filled by `salt` wei]
+        request = hexstring_to_bytes(params[0]['data'])
+        assert request[0:4] == keccak(text=f"getOrdersInfo({ZrxExchangeV2.ORDER_INFO_TYPE}[])")[0:4]
+
+        orders_info = []
+        for order_tuple in decode_single(f"({ZrxExchangeV2.ORDER_INFO_TYPE}[])", request[4:])[0]:
+            salt = order_tuple[9]
+            status = {0: OrderInfo.CANCELLED, 1: OrderInfo.FULLY_FILLED}.get(salt, OrderInfo.FILLABLE)
+            order_hash = hexstring_to_bytes(self.exchange.get_order_hash(self.orders[salt]))
+            orders_info.append((status, order_hash, salt + self.block_number))
+
+        return '0x' + encode_single('((uint8,bytes32,uint256)[])', [orders_info]).hex()
+
+    def test_should_get_orders_info_in_chunks(self):
+        # when
+        orders_info = self.exchange.get_orders_info(self.orders)
+
+        # then
+        assert len(self.provider.requests_of('eth_call')) == 3
+        assert len(orders_info) == 250
+        assert orders_info[0] == OrderInfo(OrderInfo.CANCELLED, self.exchange.get_order_hash(self.orders[0]), Wad(10))
+        assert orders_info[1].status == OrderInfo.FULLY_FILLED
+        assert orders_info[249] == OrderInfo(OrderInfo.FILLABLE, self.exchange.get_order_hash(self.orders[249]),
+                                             Wad(259))
+
+    def test_should_get_unavailable_buy_amounts(self):
+        # when
+        unavailable_buy_amounts = self.exchange.get_unavailable_buy_amounts(self.orders[0:3])
+
+        # then
+        assert unavailable_buy_amounts == [Wad.from_number(2.5), Wad.from_number(2.5), Wad(12)]
+        assert len(self.provider.requests_of('eth_call')) == 1
+
+    def test_should_cache_orders_info_per_block(self):
+        # when
+        orders_info = self.exchange.get_orders_info(self.orders[0:150], cached=True)
+
+        # then
+        assert len(self.provider.requests_of('eth_call')) == 2
+        assert all(params[1] == hex(10) for params in self.provider.requests_of('eth_call'))
+
+        # when
+        # [only the new orders should be queried]
+        assert self.exchange.get_orders_info(self.orders[100:200], cached=True)[0:50] == orders_info[100:150]
+
+        # then
+        assert len(self.provider.requests_of('eth_call')) == 3
+
+        # when
+        self.block_number = 11
+
+        # then
+        assert self.exchange.get_orders_info(self.orders[0:1], cached=True)[0].filled_buy_amount == Wad(11)
+        assert len(self.provider.requests_of('eth_call')) == 4
+        assert self.provider.requests_of('eth_call')[3][1] == hex(11)
+
+    def test_should_not_cache_by_default(self):
+        # when
+        self.exchange.get_orders_info(self.orders[0:10])
+        self.exchange.get_orders_info(self.orders[0:10])
+
+        # then
+        assert len(self.provider.requests_of('eth_call')) == 2
+        assert self.provider.requests_of('eth_call')[0][1] == 'latest'
+
+
+class TestZrxRelayerApiV2:
+    exchange_address = Address('0x11223344556600000000000000000000000000ff')
+    token1 = Address('0x0101010101010101010101010101010101010101')
+    token2 = Address('0x0202020202020202020202020202020202020202')
+    maker = Address('0x0000000000000000000000000000000000000001')
+    other_maker = Address('0x0000000000000000000000000000000000000002')
+
+    def setup_method(self):
+        self.exchange = ZrxExchangeV2(Web3(StubProvider({})), self.exchange_address)
+        self.relayer = StubRelayer()
+        self.relayer_api = ZrxRelayerApiV2(self.exchange, self.relayer.url)
+
+        self.orders = [self.order(self.token1, self.token2, self.maker, salt) for salt in range(230)] + \
+                      [self.order(self.token2, self.token1, self.other_maker, salt) for salt in range(230, 260)]
+        self.relayer.orders_v2 = [order.to_json() for order in self.orders]
+
+    def teardown_method(self):
+        self.relayer_api.close()
+        self.relayer.stop()
+
+    def order(self, pay_token: Address, buy_token: Address, maker: Address, salt: int) -> Order:
+        return Order(exchange=self.exchange, sender=Address('0x' + '00' * 20), maker=maker,
+                     taker=Address('0x' + '00' * 20), maker_fee=Wad(0), taker_fee=Wad(0),
+                     pay_asset=ERC20Asset(pay_token), pay_amount=Wad.from_number(1),
+                     buy_asset=ERC20Asset(buy_token), buy_amount=Wad.from_number(2), salt=salt,
+                     fee_recipient=Address('0x' + '00' * 20), expiration=1763920792,
+                     exchange_contract_address=self.exchange_address, signature='0x1b')
+
+    def test_should_fetch_all_pages(self):
+        # when
+        orders = self.relayer_api.get_orders(self.token1, self.token2)
+
+        # then
+        assert orders == self.orders[0:230]
+        assert sorted(int(params['page']) for method, path, params in self.relayer.requests) == [1, 2, 3]
+        assert all(params['perPage'] == '100' for method, path, params in self.relayer.requests)
+
+    def test_should_fetch_all_pages_of_maker_orders(self):
+        # expect
+        assert self.relayer_api.get_orders_by_maker(self.other_maker, per_page=7) == self.orders[230:260]
+        assert len(self.relayer.requests) == 5
+
+    def test_should_fetch_single_page(self):
+        # expect
+        assert self.relayer_api.get_orders(self.token2, self.token1) == self.orders[230:260]
+        assert len(self.relayer.requests) == 1
+
+    def test_should_fetch_pages_one_by_one_if_total_unknown(self):
+        # given
+        self.relayer.include_total = False
+
+        # expect
+        assert self.relayer_api.get_orders(self.token1, self.token2, per_page=50) == self.orders[0:230]
+        assert [int(params['page']) for method, path, params in self.relayer.requests] == [1, 2, 3, 4, 5]
+
+    def test_should_stream_orders_from_the_first_page(self):
+        # given
+        released = threading.Event()
+        served_pages = []
+
+        def gate(method, path, params):
+            # hold back all pages but the first one, until the first order has been received
+            if params.get('page', '1') != '1':
+                released.wait(10)
+            served_pages.append(int(params.get('page', '1')))
+
+        self.relayer.gate = gate
+
+        # when
+        iterator = self.relayer_api.iter_orders(self.token1, self.token2, per_page=50)
+        first_order = next(iterator)
+
+        # then
+        assert served_pages == [1]
+
+        # when
+        released.set()
+        remaining_orders = list(iterator)
+
+        # then
+        assert [first_order] + remaining_orders == self.orders[0:230]
+        assert sorted(served_pages) == [1, 2, 3, 4, 5]
+
+    def test_should_fetch_pages_concurrently(self):
+        # given
+        # [first page, then the remaining four pages concurrently]
+        remaining_pages = threading.Barrier(4, timeout=10)
+        self.relayer.gate = lambda method, path, params: params.get('page', '1') == '1' or remaining_pages.wait()
+
+        # when
+        orders = self.relayer_api.get_orders(self.token1, self.token2, per_page=50)
+
+        # then
+        assert orders == self.orders[0:230]
+        assert not remaining_pages.broken
+
+    def test_should_submit_orders(self):
+        # given
+        orders = [self.order(self.token1, self.token2, self.maker, salt) for salt in range(1000, 1100)]
+        orders[5].signature = None
+
+        # when
+        result = self.relayer_api.submit_orders(orders)
+
+        # then
+        assert result == [True] * 5 + [False] + [True] * 94
+        assert sorted(self.relayer.orders_v2[260:], key=lambda order: int(order['salt'])) == \
+               [order.to_json() for order in orders if order.signature is not None]
+
+    def test_should_reuse_connections(self):
+        # given
+        orders = [self.order(self.token1, self.token2, self.maker, salt) for salt in range(1000, 1100)]
+
+        # when
+        self.relayer_api.submit_orders(orders)
+        self.relayer_api.submit_orders(orders)
+
+        # then
+        assert len(self.relayer.requests) == 200
+        assert len(self.relayer.connections) <= ZrxRelayerApiV2.max_workers
+
+    def test_should_submit_orders_concurrently(self):
+        # given
+        orders = [self.order(self.token1, self.token2, self.maker, salt) for salt in range(1000, 1040)]
+        lock = threading.Lock()
+        in_flight = []
+        max_in_flight = []
+
+        # [each submission waits until `max_workers` of them are in flight, or a timeout passes]
+        all_workers = threading.Barrier(ZrxRelayerApiV2.max_workers, timeout=10)
+
+        def gate(method, path, params):
+            with lock:
+                in_flight.append(path)
+                max_in_flight.append(len(in_flight))
+            try:
+                all_workers.wait()
+            except threading.BrokenBarrierError:
+                pass
+            finally:
+                with lock:
+                    in_flight.remove(path)
+
+        self.relayer.gate = gate
+
+        # when
+        result = self.relayer_api.submit_orders(orders)
+
+        # then
+        assert result == [True] * len(orders)
+        assert max(max_in_flight) == ZrxRelayerApiV2.max_workers
+        assert not all_workers.broken
+
+    def test_should_not_submit_orders_after_close(self):
+        # given
+        self.relayer_api.close()
+
+        # expect
+        with pytest.raises(RuntimeError):
+            self.relayer_api.submit_orders([self.order(self.token1, self.token2, self.maker, 1000)])
+
+    def test_should_configure_orders(self):
+        # given
+        self.relayer.order_config = {"senderAddress": "0x0000000000000000000000000000000000000003",
+                                     "feeRecipientAddress": "0x0000000000000000000000000000000000000004",
+                                     "makerFee": "5",
+                                     "takerFee": "6"}
+        orders = [self.order(self.token1, self.token2, self.maker, salt) for salt in range(1000, 1020)]
+
+        # when
+        configured_orders = self.relayer_api.configure_orders(orders)
+
+        # then
+        assert [order.salt for order in configured_orders] == list(range(1000, 1020))
+        assert all(order.sender == Address("0x0000000000000000000000000000000000000003") for order in configured_orders)
+        assert all(order.fee_recipient == Address("0x0000000000000000000000000000000000000004")
+                   for order in configured_orders)
+        assert all(order.maker_fee == Wad(5) and order.taker_fee == Wad(6) for order in configured_orders)
+
+    @pytest.mark.asyncio
+    async def test_should_configure_and_submit_orders_asynchronously(self):
+        # given
+        orders = [self.order(self.token1, self.token2, self.maker, salt) for salt in range(1000, 1020)]
+
+        # when
+        configured_orders = await self.relayer_api.configure_orders_async(orders)
+        result = await self.relayer_api.submit_orders_async(configured_orders)
+
+        # then
+        assert result == [True] * 20
+        assert len(self.relayer.orders_v2) == 280
+
+    def test_should_raise_on_error(self):
+        # given
+        self.relayer_api.api_server = self.relayer.url + '/nonexistent'
+
+        # expect
+        with pytest.raises(Exception):
+            self.relayer_api.get_orders(self.token1, self.token2)
+
+
+class TestZrxRelayerWebSocketApiV2:
+    exchange_address = Address('0x11223344556600000000000000000000000000ff')
+    token1 = Address('0x0101010101010101010101010101010101010101')
+    token2 = Address('0x0202020202020202020202020202020202020202')
+    token3 = Address('0x0303030303030303030303030303030303030303')
+    maker = Address('0x0000000000000000000000000000000000000001')
+
+    def setup_method(self):
+        self.exchange = ZrxExchangeV2(Web3(StubProvider({})), self.exchange_address)
+        self.ws_relayer = StubWebSocketRelayer()
+        self.relayer = StubRelayer()
+        self.ws_api = None
+
+    def teardown_method(self):
+        if self.ws_api is not None:
+            self.ws_api.stop()
+        self.ws_relayer.stop()
+        self.relayer.stop()
+
+    def start(self, relayer_api=None):
+        self.ws_api = ZrxRelayerWebSocketApiV2(self.exchange, self.ws_relayer.url, self.token1, self.token2, relayer_api)
+        self.ws_api.reconnect_delay = 0.1
+        self.ws_api.start()
+        assert self.ws_api.wait_until_ready(5)
+
+    def order(self, pay_token: Address, buy_token: Address, pay_amount: int, buy_amount: int, salt: int) -> Order:
+        return Order(exchange=self.exchange, sender=Address('0x' + '00' * 20), maker=self.maker,
+                     taker=Address('0x' + '00' * 20), maker_fee=Wad(0), taker_fee=Wad(0),
+                     pay_asset=ERC20Asset(pay_token), pay_amount=Wad.from_number(pay_amount),
+                     buy_asset=ERC20Asset(buy_token), buy_amount=Wad.from_number(buy_amount), salt=salt,
+                     fee_recipient=Address('0x' + '00' * 20), expiration=1763920792,
+                     exchange_contract_address=self.exchange_address, signature='0x1b')
+
+    def update(self, order: Order, remaining: int = None):
+        meta_data = {'orderHash': self.exchange.get_order_hash(order)}
+        if remaining is not None:
+            meta_data['remainingTakerAssetAmount'] = str(remaining)
+
+        self.ws_relayer.send({'type': 'update', 'channel': 'orders', 'requestId': 'x',
+                              'payload': [{'order': order.to_json(), 'metaData': meta_data}]})
+
+    @staticmethod
+    def wait_for(condition):
+        for _ in range(100):
+            if condition():
+                return True
+            time.sleep(0.05)
+
+        return False
+
+    def test_should_subscribe_to_both_sides(self):
+        # when
+        self.start()
+
+        # then
+        assert self.wait_for(lambda: len(self.ws_relayer.messages) == 2)
+        assert all(message['type'] == 'subscribe' and message['channel'] == 'orders'
+                   for message in self.ws_relayer.messages)
+        assert [(message['payload']['makerAssetData'], message['payload']['takerAssetData'])
+                for message in self.ws_relayer.messages] == \
+               [(ERC20Asset(self.token1).serialize(), ERC20Asset(self.token2).serialize()),
+                (ERC20Asset(self.token2).serialize(), ERC20Asset(self.token1).serialize())]
+        assert len(set(message['requestId'] for message in self.ws_relayer.messages)) == 2
+
+    def test_should_add_update_and_remove_orders(self):
+        # given
+        self.start()
+        ask1 = self.order(self.token1, self.token2, 1, 3, 1)
+        ask2 = self.order(self.token1, self.token2, 1, 2, 2)
+        bid = self.order(self.token2, self.token1, 1, 1, 3)
+
+        # when
+        self.update(ask1)
+        self.update(ask2)
+        self.update(bid)
+
+        # then
+        assert self.wait_for(lambda: self.ws_api.get_book() == ([ask2, ask1], [bid]))
+
+        # when
+        self.update(ask1, remaining=Wad.from_number(1).value)
+        self.update(ask2, remaining=0)
+
+        # then
+        assert self.wait_for(lambda: self.ws_api.get_book() == ([ask1], [bid]))
+
+    def test_should_sort_bids_from_the_highest_price(self):
+        # given
+        self.start()
+        bid1 = self.order(self.token2, self.token1, 2, 1, 1)
+        bid2 = self.order(self.token2, self.token1, 4, 1, 2)
+        bid3 = self.order(self.token2, self.token1, 3, 1, 3)
+
+        # when
+        for bid in [bid1, bid2, bid3]:
+            self.update(bid)
+
+        # then
+        assert self.wait_for(lambda: self.ws_api.get_book() == ([], [bid2, bid3, bid1]))
+
+    def test_should_ignore_other_pairs_and_exchanges(self):
+        # given
+        self.start()
+        other_pair = self.order(self.token1, self.token3, 1, 1, 1)
+        other_exchange = self.order(self.token1, self.token2, 1, 1, 2)
+        other_exchange.exchange_contract_address = Address('0x' + '99' * 20)
+        ask = self.order(self.token1, self.token2, 1, 1, 3)
+
+        # when
+        self.ws_relayer.send({'type': 'update', 'channel': 'orders', 'requestId': 'x',
+                              'payload': [{'order': other_pair.to_json(), 'metaData': {}},
+                                          {'order': other_exchange.to_json(), 'metaData': {}}]})
+        self.update(ask)
+
+        # then
+        assert self.wait_for(lambda: self.ws_api.get_book() == ([ask], []))
+
+    def test_should_seed_the_order_book(self):
+        # given
+        ask = self.order(self.token1, self.token2, 1, 2, 1)
+        bid = self.order(self.token2, self.token1, 1, 1, 2)
+        self.relayer.orders_v2 = [ask.to_json(), bid.to_json(), self.order(self.token1, self.token3, 1, 1, 3).to_json()]
+
+        # when
+        self.start(ZrxRelayerApiV2(self.exchange, self.relayer.url))
+
+        # then
+        assert self.ws_api.get_book() == ([ask], [bid])
+
+        # when
+        self.update(ask, remaining=0)
+
+        # then
+        assert self.wait_for(lambda: self.ws_api.get_book() == ([], [bid]))
+
+    def test_should_seed_only_orders_of_this_exchange(self):
+        # given
+        ask = self.order(self.token1, self.token2, 1, 2, 1)
+        other_exchange = self.order(self.token1, self.token2, 1, 1, 2)
+        other_exchange.exchange_contract_address = Address('0x' + '99' * 20)
+        self.relayer.orders_v2 = [other_exchange.to_json(), ask.to_json()]
+
+        # when
+        self.start(ZrxRelayerApiV2(self.exchange, self.relayer.url))
+
+        # then
+        assert self.ws_api.get_book() == ([ask], [])
+
+    def test_should_reconnect_and_resubscribe(self):
+        # given
+        self.start()
+        assert self.wait_for(lambda: len(self.ws_relayer.messages) == 2)
+
+        # when
+        self.ws_relayer.disconnect()
+
+        # then
+        assert self.wait_for(lambda: len(self.ws_relayer.messages) == 4)
+        assert self.ws_api.wait_until_ready(5)
+
+    def test_should_stop(self):
+        # given
+        self.start()
+
+        # when
+        self.ws_api.stop()
+        self.ws_api = None
+
+        # then
+        assert self.wait_for(lambda: len(self.ws_relayer.clients) == 0)
+
+
 class TestOrder:
     def test_should_be_comparable(self):
         # given
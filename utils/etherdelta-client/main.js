@@ -18,50 +18,128 @@
  */
 
 var args = require('minimist')(process.argv.slice(2));
-const order = args['_'].join(" ");
 const url = args['url'];
 const retryInterval = args['retry-interval'];
 const timeout = args['timeout'];
 
-function publishOrder() {
-  socket.emit('message', JSON.parse(order));
-  console.log('Order sent');
+const io = require('socket.io-client');
+
+if (args['persistent']) {
+  runPersistent();
+} else {
+  runOnce(args['_'].join(" "));
 }
 
-console.log("Sending order '" + order + "' to " + url);
+// Publishes a single order passed as an argument, exits with 0 if it got placed successfully.
+function runOnce(order) {
+  function publishOrder() {
+    socket.emit('message', JSON.parse(order));
+    console.log('Order sent');
+  }
+
+  console.log("Sending order '" + order + "' to " + url);
+
+  const socket = io.connect(url, { transports: ['websocket'] });
+
+  socket.on('connect', () => {
+    console.log("Connected to socket");
+    publishOrder();
+  });
+
+  socket.on('messageResult', (messageResult) => {
+    console.log("Response received: ", messageResult);
+
+    if (messageResult[0] === 'Added/updated order.') {
+      console.log("Order placed successfully");
+      socket.disconnect();
+      setTimeout(() => process.exit(0), 2500);
+    }
+    else {
+      console.log("Order placement failed");
+      setTimeout(publishOrder, retryInterval*1000);
+    }
+  });
 
-const io = require('socket.io-client');
-const socket = io.connect(url, { transports: ['websocket'] });
 
-socket.on('connect', () => {
-  console.log("Connected to socket");
-  publishOrder();
-});
+  socket.on('disconnect', () => {
+    console.log('Disconnected from socket');
+  });
 
-socket.on('messageResult', (messageResult) => {
-  console.log("Response received: ", messageResult);
+  socket.on('reconnect', () => {
+    console.log('Reconnected to socket');
+  });
 
-if (messageResult[0] === 'Added/updated order.') {
-    console.log("Order placed successfully");
-    socket.disconnect();
-    setTimeout(() => process.exit(0), 2500);
+  setTimeout(() => {
+    console.log('Timed out');
+    process.exit(-1);
+  }, timeout*1000);
+}
+
+// Keeps one socket connection open and publishes orders read from stdin, one per line,
+// as `{"id": ..., "order": {...}}`. Orders are published one by one. For every order a
+// `{"id": ..., "success": ..., "message": ...}` line gets written to stdout, all other
+// output lines are informational only.
+function runPersistent() {
+  const pending = [];
+  let current = null;
+  let connected = false;
+
+  const socket = io.connect(url, { transports: ['websocket'] });
+
+  function publishOrder() {
+    if (current !== null && connected) {
+      socket.emit('message', current.order);
+    }
   }
-  else {
-    console.log("Order placement failed");
-    setTimeout(publishOrder, retryInterval*1000);
+
+  function finishOrder(success, message) {
+    clearTimeout(current.timeoutTimer);
+    clearTimeout(current.retryTimer);
+    console.log(JSON.stringify({ id: current.id, success: success, message: message }));
+    current = null;
+    nextOrder();
   }
-});
 
+  function nextOrder() {
+    if (current === null && pending.length > 0) {
+      current = pending.shift();
+      current.timeoutTimer = setTimeout(() => finishOrder(false, 'Timed out'), timeout*1000);
+      publishOrder();
+    }
+  }
+
+  socket.on('connect', () => {
+    console.log("Connected to socket");
+    connected = true;
+    publishOrder();
+  });
 
-socket.on('disconnect', () => {
-  console.log('Disconnected from socket');
-});
+  socket.on('messageResult', (messageResult) => {
+    if (current === null) {
+      return;
+    }
 
-socket.on('reconnect', () => {
-  console.log('Reconnected to socket');
-});
+    if (messageResult[0] === 'Added/updated order.') {
+      finishOrder(true, messageResult[0]);
+    }
+    else {
+      console.log("Order placement failed: ", messageResult);
+      current.retryTimer = setTimeout(publishOrder, retryInterval*1000);
+    }
+  });
 
-setTimeout(() => {
-  console.log('Timed out');
-  process.exit(-1);
-}, timeout*1000);
+  socket.on('disconnect', () => {
+    console.log('Disconnected from socket');
+    connected = false;
+  });
+
+  require('readline').createInterface({ input: process.stdin })
+    .on('line', (line) => {
+      pending.push(JSON.parse(line));
+      nextOrder();
+    })
+    .on('close', () => {
+      socket.disconnect();
+      process.exit(0);
+    });
+}